@@ -9,7 +9,7 @@ from pydantic import BaseModel
 
 from app.core.auth import get_current_admin
 from app.core.supabase_service import supabase
-from app.core.vector_store import VectorStore
+from app.core.vector_store import get_vector_store
 from app.services.supabase_content_repository import SupabaseContentRepository
 from app.config import settings
 from app.api.models.requests import IngestRequest
@@ -17,7 +17,7 @@ from app.api.models.requests import IngestRequest
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-_vector_store = VectorStore()
+_vector_store = get_vector_store()
 _content_repository = SupabaseContentRepository()
 
 
@@ -83,3 +83,33 @@ class UserProfile(BaseModel):
 class ListUsersResponse(BaseModel):
     users: List[UserProfile]
     total: int
+
+class ProfileFunction(BaseModel):
+    function: str
+    self: int
+    total: int
+
+class ProfileResponse(BaseModel):
+    mode: str
+    interval_ms: float
+    duration_s: float
+    ticks: int
+    samples: int
+    top_functions: List[ProfileFunction]
+    collapsed: str
+
+class ProfileCapture(BaseModel):
+    name: str
+    captured_at: str
+    method: Optional[str] = None
+    path: Optional[str] = None
+    status: Optional[int] = None
+    elapsed_ms: Optional[float] = None
+    mode: str
+    duration_s: float
+    samples: int
+    top_functions: List[ProfileFunction] = []
+
+class ListProfileCapturesResponse(BaseModel):
+    captures: List[ProfileCapture]
+    total: int
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiler
+from app.core.auth import get_current_admin
+from app.config import settings
+from .models import ListProfileCapturesResponse, ProfileCapture, ProfileResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+# ---------------------------------------------------------------------------
+# POST /api/admin/profile  — sample the running worker for a few seconds
+# ---------------------------------------------------------------------------
+
+@router.post("/profile", response_model=ProfileResponse)
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    mode: str = Query("wall", pattern="^(wall|cpu)$", description="wall: all threads; cpu: only threads using CPU"),
+    interval_ms: float = Query(None, ge=1, le=1000, description="Sampling period (defaults to PROFILER_INTERVAL_MS)"),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    admin: dict = Depends(get_current_admin),
+):
+    """Profile this worker while it keeps serving requests; ``format=collapsed`` downloads flamegraph input."""
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILER_MAX_SECONDS:g}")
+    if not profiler.capture_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    try:
+        try:
+            sampler = profiler.SamplingProfiler(mode=mode, interval_ms=interval_ms, max_seconds=seconds).start()
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        logger.info(f"Admin {admin.id} started a {seconds:g}s {mode} profile")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            result = sampler.stop()
+    finally:
+        profiler.capture_lock.release()
+
+    if format == "collapsed":
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        return PlainTextResponse(
+            result.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{mode}-{stamp}.collapsed"'},
+        )
+    return ProfileResponse(**result.summary(), collapsed=result.collapsed())
+
+
+# ---------------------------------------------------------------------------
+# GET /api/admin/profile/captures  — profiles saved for slow requests
+# ---------------------------------------------------------------------------
+
+@router.get("/profile/captures", response_model=ListProfileCapturesResponse)
+async def list_profile_captures(admin: dict = Depends(get_current_admin)):
+    captures = [ProfileCapture(**meta) for meta in profiler.list_captures()]
+    return ListProfileCapturesResponse(captures=captures, total=len(captures))
+
+
+@router.get("/profile/captures/{name}", response_class=PlainTextResponse)
+async def download_profile_capture(name: str, admin: dict = Depends(get_current_admin)):
+    collapsed = profiler.read_capture(name)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile capture not found")
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{name}.collapsed"'},
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 import logging
 from datetime import datetime, timezone
-from app.core.auth import get_current_admin
+from app.core.auth import get_current_admin, invalidate_user_access
 from app.core.supabase_service import supabase
 from .models import (
     ChangeRoleRequest, ChangeRoleResponse,
@@ -98,6 +98,7 @@ async def change_user_role(request: ChangeRoleRequest, admin: dict = Depends(get
 
         if not update_response.data:
             raise HTTPException(status_code=500, detail="Failed to update user role")
+        invalidate_user_access(request.user_id)
 
         logger.info(f"Admin {admin.id} changed user {request.user_id} role from {current_role} to {request.new_role}")
 
@@ -184,6 +185,7 @@ async def deactivate_user(
                 status_code=500,
                 detail="Failed to deactivate user"
             )
+        invalidate_user_access(user_id)
 
         # Log the action
         reason_text = f"Reason: {request.reason}" if request.reason else "No reason provided"
@@ -265,6 +267,7 @@ async def reactivate_user(
                 status_code=500,
                 detail="Failed to reactivate user"
             )
+        invalidate_user_access(user_id)
 
         # Log the action
         logger.info(
@@ -342,7 +345,11 @@ async def delete_user(
             .eq("email", user_email)\
             .execute()
 
-        supabase.auth.admin.delete_user(user_id)
+        try:
+            supabase.auth.admin.delete_user(user_id)
+        finally:
+            # Even a failed call may have removed the user; never keep serving its cached access.
+            invalidate_user_access(user_id)
 
         # Log the action
         logger.warning(
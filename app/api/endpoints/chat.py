@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Tuple, Union
 import logging
 import json
 import os
@@ -12,18 +12,23 @@ from app.config import settings
 from app.services.content_repository import ContentRepository
 from app.services.supabase_content_repository import SupabaseContentRepository
 from app.core.auth import get_current_user, supabase
-from app.core.embeddings import EmbeddingModel
+from app.core.chunk_cache import compact_citations, hydrate_citations
+from app.core.feedback_queue import feedback_queue
 from app.core.feedback_service import FeedbackService
+from app.core.history_cache import history_cache
+from app.core.metrics import record_cache, track_call
+from app.core.supabase_clients import is_missing_function
+from app.core.tracing import span
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["chat"])
 
+# Messages of the session passed to the LLM as conversation history.
+_HISTORY_LIMIT = 10
+
 # Initialize chat service
 chat_service = ChatService()
 
-# Phase 2: shared embedding model + feedback service for event recording.
-# EmbeddingModel is lazy-loaded (model downloads on first encode call).
-_embedding_model = EmbeddingModel()
 _feedback_service = FeedbackService()
 
 # Initialize content repository (same logic as ingest.py)
@@ -59,41 +64,21 @@ async def send_message(request: ChatMessageRequest, user: Any = Depends(get_curr
     Send a message, run RAG, and persist history.
     """
     try:
-        # 1. Verify Session Ownership
-        session_check = supabase.table("chat_sessions")\
-            .select("id")\
-            .eq("id", request.session_id)\
-            .eq("user_id", user.id)\
-            .execute()
-        if not session_check.data:
+        # 1. Verify ownership, save the user message and load the recent
+        # history (chronological, including the new message) in one round trip
+        turn = _begin_chat_turn(request.session_id, user.id, request.content)
+        if turn is None:
             raise HTTPException(status_code=404, detail="Session not found")
+        conversation_history, history_version = turn
 
-        # 2. Save User Message
-        user_msg = {
-            "session_id": request.session_id,
-            "role": "user",
-            "content": request.content,
-        }
-        user_msg_res = supabase.table("chat_messages").insert(user_msg).execute()
-        
-        # 3. Retrieve History (last 10 messages for context)
-        history_res = supabase.table("chat_messages")\
-            .select("role, content")\
-            .eq("session_id", request.session_id)\
-            .order("created_at", desc=True)\
-            .limit(10)\
-            .execute()
-        
-        # Reverse to get chronological order [oldest ... newest]
-        conversation_history = list(reversed(history_res.data)) if history_res.data else []
-
-        # 4. Run RAG
+        # 2. Run RAG
         # We reuse the existing ask_question logic
-        result = chat_service.ask_question(
-            request.content, 
-            top_k=settings.DEFAULT_TOP_K, 
-            conversation_history=conversation_history
-        )
+        with span("ask_question"):
+            result = chat_service.ask_question(
+                request.content, 
+                top_k=settings.DEFAULT_TOP_K, 
+                conversation_history=conversation_history
+            )
 
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result.get("error", "RAG Error"))
@@ -107,23 +92,26 @@ async def send_message(request: ChatMessageRequest, user: Any = Depends(get_curr
         # can reconstruct the same visual segments without re-running RAG.
         relevant_images = result.get("relevant_images") or []
 
-        # 5. Save Assistant Message
+        # 3. Save Assistant Message before replying, so the next turn's
+        # history includes it and the returned id can be rated at once. The
+        # database assigns the id and created_at (same clock as the user
+        # message's).
         assistant_msg = {
             "session_id": request.session_id,
             "role": "assistant",
             "content": answer_text,
             # Store both citations (for feedback re-ranking) and
-            # relevant_images (for UI reconstruction on reload).
+            # relevant_images (for UI reconstruction on reload). Citations
+            # keep only chunk_id/score/rank; GET /messages/{id}/citations
+            # hydrates the text from document_chunks when it is needed.
             "metadata": {
-                "citations": citations,
+                "citations": compact_citations(citations),
                 "relevant_images": relevant_images,
             },
         }
-        
-        assistant_msg_res = supabase.table("chat_messages").insert(assistant_msg).execute()
-        
-        # 6. Return Response
-        saved_msg = assistant_msg_res.data[0]
+        saved_msg = _save_assistant_message(assistant_msg, history_version)
+
+        # 4. Return Response
         return ChatMessageResponse(
             id=saved_msg["id"],
             role="assistant",
@@ -139,83 +127,129 @@ async def send_message(request: ChatMessageRequest, user: Any = Depends(get_curr
         logger.error(f"Error processing message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def _record_phase2_feedback_event(message_id: str, rating: Optional[int]) -> None:
+def _begin_chat_turn(session_id: str, user_id: str, content: str) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
     """
-    Background task: keep chunk_feedback_events consistent with the user's
-    current rating for a message.
-
-    Always deletes any existing events for this message_id first, then inserts
-    fresh ones if the new rating is non-null.  This covers three cases:
-      • New vote      (rating = +1/-1, no prior events)  → insert
-      • Changed vote  (rating = +1/-1, prior events exist) → delete old, insert new
-      • Cleared vote  (rating = None)                    → delete old, done
-
-    Runs AFTER the HTTP response has been sent (FastAPI BackgroundTasks), so
-    the ~100-200 ms sentence-transformer inference never adds latency to the
-    feedback endpoint.  Fails silently — never surfaces to the user.
+    Check session ownership, insert the user message and return the last
+    ``_HISTORY_LIMIT`` messages (oldest first) with the session's history
+    version, or None if the session is not the user's.
+
+    Uses the ``begin_chat_turn`` RPC (one round trip), which skips the history
+    query when this worker's cached copy is still current, and falls back to
+    separate queries only on databases where the function does not exist.
     """
+    cached = history_cache.get(session_id)
     try:
-        # Step A: always delete stale events for this message first.
-        # message_id is implicitly user-scoped (messages belong to sessions
-        # which belong to one user), so this is safe with no user_id filter.
-        supabase.table("chunk_feedback_events").delete().eq("message_id", message_id).execute()
-
-        # If the user cleared their rating, we're done — no new events to store.
-        if rating is None:
-            return
-
-        # Step B: fetch the assistant message (session_id + created_at + citations)
-        asst_res = (
-            supabase.table("chat_messages")
-            .select("session_id, created_at, metadata")
-            .eq("id", message_id)
-            .eq("role", "assistant")
-            .single()
+        with span("begin_turn"), track_call("supabase", "rpc_begin_chat_turn"):
+            turn_res = supabase.rpc("begin_chat_turn", {
+                "p_session_id": session_id,
+                "p_user_id": user_id,
+                "p_content": content,
+                "p_history_limit": _HISTORY_LIMIT,
+                "p_known_version": cached[0] if cached else None,
+            }).execute()
+    except Exception as exc:
+        history_cache.invalidate(session_id)
+        # Any other failure may come after the RPC committed the user message;
+        # running the separate queries then would insert it a second time.
+        if not is_missing_function(exc):
+            logger.error(f"begin_chat_turn RPC failed: {exc}")
+            raise
+        logger.warning(f"begin_chat_turn RPC unavailable, using separate queries: {exc}")
+        return _begin_chat_turn_per_query(session_id, user_id, content)
+    turn = turn_res.data
+    if not turn:
+        history_cache.invalidate(session_id)
+        return None
+
+    history = turn.get("history")
+    record_cache("chat_history", hit=history is None)
+    if history is None:
+        history = (cached[1] + [{"role": "user", "content": content}])[-_HISTORY_LIMIT:]
+    version = turn.get("history_version")
+    if version is not None:
+        history_cache.put(session_id, version, history)
+    return history, version
+
+def _begin_chat_turn_per_query(session_id: str, user_id: str, content: str) -> Optional[Tuple[List[Dict[str, Any]], None]]:
+    """Fallback for databases without the RPC: ownership check, insert and history select."""
+    with span("session_check"), track_call("supabase", "select_chat_session"):
+        session_check = supabase.table("chat_sessions")\
+            .select("id")\
+            .eq("id", session_id)\
+            .eq("user_id", user_id)\
             .execute()
-        )
-        asst_row = asst_res.data if asst_res and asst_res.data else None
-        if not asst_row:
-            return
-
-        # Step C: extract chunk_ids from the stored citations
-        citations = (asst_row.get("metadata") or {}).get("citations") or []
-        chunk_ids = [
-            c["chunk_id"]
-            for c in citations
-            if isinstance(c, dict) and c.get("chunk_id")
-        ]
-        if not chunk_ids:
-            return
-
-        # Step D: find the most recent user message sent *before* this reply
-        user_msg_res = (
-            supabase.table("chat_messages")
-            .select("content")
-            .eq("session_id", asst_row["session_id"])
-            .eq("role", "user")
-            .lt("created_at", asst_row["created_at"])
-            .order("created_at", desc=True)
-            .limit(1)
+    if not session_check.data:
+        return None
+
+    user_msg = {
+        "session_id": session_id,
+        "role": "user",
+        "content": content,
+    }
+    with span("message_insert"), track_call("supabase", "insert_chat_message"):
+        supabase.table("chat_messages").insert(user_msg).execute()
+
+    with span("history"), track_call("supabase", "select_chat_history"):
+        history_res = supabase.table("chat_messages")\
+            .select("role, content")\
+            .eq("session_id", session_id)\
+            .order("created_at", desc=True)\
+            .limit(_HISTORY_LIMIT)\
             .execute()
-        )
-        user_rows = user_msg_res.data if user_msg_res else []
-        query_text = user_rows[0]["content"] if user_rows else None
-        if not query_text:
-            return
-
-        # Step E: encode the query — the slow CPU step, safe here off the critical path
-        query_embedding = _embedding_model.encode_query(query_text)
-
-        # Step F: persist one event row per cited chunk (fresh, no duplicates)
-        _feedback_service.record_feedback_events(
-            chunk_ids=chunk_ids,
-            message_id=message_id,
-            query_embedding=query_embedding,
-            rating=rating,
-        )
-    except Exception as exc:
-        logger.warning("Phase 2 background feedback event failed (non-fatal): %s", exc)
 
+    # Reverse to get chronological order [oldest ... newest]
+    return (list(reversed(history_res.data)) if history_res.data else []), None
+
+def _save_assistant_message(assistant_msg: Dict[str, Any], history_version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Insert the assistant reply and add it to this worker's cached history of
+    the session.  Returns the saved row; raises if the insert fails.
+    """
+    session_id = assistant_msg["session_id"]
+    try:
+        with span("message_insert"), track_call("supabase", "insert_chat_message"):
+            saved_res = supabase.table("chat_messages").insert(assistant_msg).execute()
+    except Exception:
+        history_cache.invalidate(session_id)
+        raise
+    if history_version is not None:
+        reply = {"role": "assistant", "content": assistant_msg["content"]}
+        history_cache.append(session_id, history_version, reply, _HISTORY_LIMIT)
+    return saved_res.data[0]
+
+@router.get("/messages/{message_id}/citations")
+async def get_message_citations(message_id: str, user: Any = Depends(get_current_user)):
+    """
+    Full citations (chunk text, source and URLs) of one assistant message.
+    """
+    try:
+        with track_call("supabase", "select_chat_message"):
+            msg_res = supabase.table("chat_messages")\
+                .select("session_id, metadata")\
+                .eq("id", message_id)\
+                .eq("role", "assistant")\
+                .execute()
+        if not msg_res.data:
+            raise HTTPException(status_code=404, detail="Message not found")
+        message = msg_res.data[0]
+
+        with track_call("supabase", "select_chat_session"):
+            session_check = supabase.table("chat_sessions")\
+                .select("id")\
+                .eq("id", message["session_id"])\
+                .eq("user_id", user.id)\
+                .execute()
+        if not session_check.data:
+            raise HTTPException(status_code=404, detail="Message not found")
+
+        citations = (message.get("metadata") or {}).get("citations") or []
+        return {"message_id": message_id, "citations": hydrate_citations(supabase, citations)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching citations: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/feedback")
 async def submit_feedback(
@@ -231,7 +265,7 @@ async def submit_feedback(
     try:
         # Verify the message belongs to a session owned by this user
         msg_check = supabase.table("chat_messages")\
-            .select("id, session_id")\
+            .select("id, session_id, metadata")\
             .eq("id", request.message_id)\
             .execute()
 
@@ -267,20 +301,27 @@ async def submit_feedback(
             logger.warning("Atomic feedback RPC failed: %s", exc)
             raise HTTPException(status_code=500, detail="Failed to save feedback")
 
-        # ── Phase 2: Schedule query-aware event sync as a background task ───────
-        # Always schedule — not just for new votes.  The background task handles
-        # all three transitions:
+        # Re-ranking reads net scores from an in-memory snapshot; reload the
+        # rated chunks so this worker's next answer reflects the vote at once.
+        if settings.FEEDBACK_ENABLED:
+            citations = (msg_check.data[0].get("metadata") or {}).get("citations") or []
+            _feedback_service.refresh_chunk_scores(
+                [c["chunk_id"] for c in citations if isinstance(c, dict) and c.get("chunk_id")]
+            )
+
+        # ── Phase 2: Queue the query-aware event sync ────────────────────────
+        # Always queue — not just for new votes.  The write-behind queue
+        # (app/core/feedback_queue.py) reads the message's current rating when
+        # it flushes and handles all three transitions in batches:
         #   changed vote  → delete stale events, insert fresh ones
         #   new vote      → delete (no-op), insert fresh ones
         #   cleared vote  → delete stale events, nothing to insert
-        # The sentence-transformer encode_query() (~100-200 ms on CPU) only
-        # runs inside the task, after the response is already sent.
+        # The sentence-transformer encode (~100-200 ms on CPU) runs in the
+        # queue's flush, never before the response is sent.
         if settings.FEEDBACK_ENABLED:
-            background_tasks.add_task(
-                _record_phase2_feedback_event,
-                message_id=request.message_id,
-                rating=request.rating,
-            )
+            feedback_queue.submit(request.message_id)
+            if settings.FEEDBACK_QUEUE_FLUSH_SECONDS <= 0:
+                background_tasks.add_task(feedback_queue.flush)
 
         return {"success": True, "score": request.rating}
     except HTTPException:
@@ -1,7 +1,10 @@
+import importlib.util
 import logging
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.api.models.responses import HealthResponse
 from app.config import settings
+from app.core import warmup
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,15 @@ async def health_check():
         version=settings.API_VERSION
     )
 
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe for the load balancer: 503 while this worker is still
+    warming up (embedding model, vector store connections), 200 afterwards.
+    """
+    snapshot = warmup.state.snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
+
 @router.get("/health/detailed")
 async def detailed_health_check():
     """
@@ -26,10 +38,11 @@ async def detailed_health_check():
 
     # 1. Pinecone connectivity
     try:
-        if settings.PINECONE_API_KEY:
-            from pinecone import Pinecone
-            pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-            pc.list_indexes()
+        if settings.VECTOR_STORE_BACKEND == "memory":
+            checks["pinecone"] = {"status": "ok", "index": settings.PINECONE_INDEX_NAME, "backend": "memory"}
+        elif settings.PINECONE_API_KEY:
+            from app.core.vector_store import pinecone_client
+            pinecone_client().list_indexes()
             checks["pinecone"] = {"status": "ok", "index": settings.PINECONE_INDEX_NAME}
         else:
             checks["pinecone"] = {"status": "not_configured", "detail": "PINECONE_API_KEY not set"}
@@ -39,7 +52,7 @@ async def detailed_health_check():
 
     # 2. Supabase connectivity
     try:
-        if settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY:
+        if settings.SUPABASE_BACKEND == "memory" or (settings.SUPABASE_URL and settings.SUPABASE_SERVICE_ROLE_KEY):
             from app.core.supabase_service import supabase
             # A lightweight query to verify the connection
             supabase.table("profiles").select("id").limit(1).execute()
@@ -59,12 +72,12 @@ async def detailed_health_check():
     else:
         checks["azure_openai"] = {"status": "not_configured", "detail": "AZURE_OPENAI_API_KEY or AZURE_OPENAI_ENDPOINT not set"}
 
-    # 4. Embedding model (sentence-transformers package availability)
-    try:
-        from sentence_transformers import SentenceTransformer  # noqa: F401
+    # 4. Embedding model (sentence-transformers package availability; checked
+    #    without importing it, which would load PyTorch on the event loop)
+    if importlib.util.find_spec("sentence_transformers") is not None:
         checks["embedding_model"] = {"status": "ok", "model": settings.EMBED_MODEL_NAME}
-    except ImportError as e:
-        logger.warning(f"Embedding model health check failed: {e}")
+    else:
+        logger.warning("Embedding model health check failed: sentence-transformers not installed")
         checks["embedding_model"] = {"status": "error", "detail": "sentence-transformers package not installed"}
 
     # Overall status
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import logging
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
@@ -8,8 +9,10 @@ from fastapi import APIRouter, HTTPException
 from app.api.models.requests import BulkIngestRequest, IngestRequest
 from app.api.models.responses import BulkIngestResponse, IngestResponse
 from app.config import settings
-from app.core.embeddings import EmbeddingModel
-from app.core.vector_store import VectorStore
+from app.core.chunk_cache import chunk_cache
+from app.core.embeddings import create_embedding_model
+from app.core.metrics import INGESTION_DURATION
+from app.core.vector_store import get_vector_store
 from app.services.document_processor import DocumentProcessor
 from app.services.content_repository import ContentRepository
 from app.services.supabase_content_repository import SupabaseContentRepository
@@ -22,8 +25,8 @@ router = APIRouter(prefix="/ingest", tags=["ingestion"])
 
 # Initialize services
 _document_processor = DocumentProcessor()
-_vector_store = VectorStore()
-_embedding_model = EmbeddingModel()
+_vector_store = get_vector_store()
+_embedding_model = create_embedding_model()
 _content_repository = ContentRepository()
 
 if settings.SUPABASE_URL and settings.SUPABASE_BUCKET:
@@ -37,6 +40,7 @@ else:
 @router.post("/document", response_model=IngestResponse, include_in_schema=False)
 async def ingest_document(request: IngestRequest) -> IngestResponse:
     """Ingest a single document into storage and the vector index."""
+    started = time.perf_counter()
     try:
         file_path = _locate_document(request.filename)
         processed = _document_processor.process_document(file_path)
@@ -57,6 +61,7 @@ async def ingest_document(request: IngestRequest) -> IngestResponse:
             chunk_count,
             updated["image_count"],
         )
+        INGESTION_DURATION.labels("document").observe(time.perf_counter() - started)
 
         return IngestResponse(
             success=True,
@@ -78,6 +83,7 @@ async def ingest_document(request: IngestRequest) -> IngestResponse:
 @router.post("/bulk", response_model=BulkIngestResponse, include_in_schema=False)
 async def bulk_ingest(request: BulkIngestRequest) -> BulkIngestResponse:
     """Ingest all documents from the documents directory."""
+    started = time.perf_counter()
     try:
         directory = settings.DOCUMENTS_DIR / request.subdirectory if request.subdirectory else settings.DOCUMENTS_DIR
         if not directory.exists():
@@ -121,6 +127,7 @@ async def bulk_ingest(request: BulkIngestRequest) -> BulkIngestResponse:
                 })
                 logger.error("Failed to process %s: %s", result.get("source"), result.get("error"))
 
+        INGESTION_DURATION.labels("bulk").observe(time.perf_counter() - started)
         return BulkIngestResponse(
             success=True,
             message=f"Bulk ingestion completed: {successful_files} successful, {failed_files} failed",
@@ -242,6 +249,7 @@ def _prepare_vectors(processed: Dict[str, Any]) -> Tuple[List[Tuple[str, List[fl
     try:
         # use upsert so re-ingestion won't error on duplicate PKs
         supabase.table("document_chunks").upsert(rows).execute()
+        chunk_cache.invalidate(doc_id=doc_id)
     except Exception as db_exc:
         logger.error("Failed to upsert %d chunks for doc_id=%s to document_chunks: %s", len(rows), doc_id, db_exc)
         raise
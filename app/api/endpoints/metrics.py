@@ -0,0 +1,22 @@
+import logging
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.metrics import render_latest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    rendered = render_latest()
+    if rendered is None:
+        return PlainTextResponse(
+            "Metrics disabled: set METRICS_ENABLED=true and install prometheus-client.",
+            status_code=503,
+        )
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Security, Query
+import base64
+import json
+import logging
+from datetime import datetime
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Security, Query, Response
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from app.core.auth import get_current_user, get_user_client
+from app.core.history_cache import history_cache
+from app.core.supabase_clients import is_missing_function
 
+logger = logging.getLogger(__name__)
 router = APIRouter(tags=["sessions"])
 
 # Models
@@ -32,9 +40,101 @@ class ChatMessage(BaseModel):
 
 # Endpoints
 
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just past ``row`` (newest-first order)."""
+    raw = json.dumps({"created_at": row["created_at"], "id": str(row["id"])}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(str(data["created_at"])), UUID(str(data["id"]))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _session_summaries(
+    user_client,
+    user_id: str,
+    limit: Optional[int],
+    before: Optional[Tuple[datetime, UUID]],
+    search: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Sessions with message count and last user message in one round trip (get_session_summaries RPC)."""
+    params: Dict[str, Any] = {"p_user_id": user_id, "p_limit": limit}
+    if before:
+        params["p_before_created_at"], params["p_before_id"] = before[0].isoformat(), str(before[1])
+    # Only sent when set, so a database with the unfiltered RPC still serves plain pages.
+    if search:
+        params["p_search"] = search
+    if since:
+        params["p_since"] = since.isoformat()
+    return user_client.rpc("get_session_summaries", params).execute().data or []
+
+
+def _session_summaries_per_session(
+    user_client,
+    limit: Optional[int],
+    before: Optional[Tuple[datetime, UUID]],
+    search: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Fallback for databases without the RPC: one chat_messages query per session."""
+    query = user_client.table("chat_sessions")\
+        .select("*, chat_messages(count)")\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)
+    if before:
+        # Same (created_at, id) keyset as the RPC, so ties with the cursor row are kept.
+        query = _keyset_filter(query, "lt", *before)
+    if since:
+        query = query.gte("created_at", since.isoformat())
+    # The search also matches the last question, known only per session below.
+    if limit is not None and not search:
+        query = query.limit(limit)
+    response = query.execute()
+
+    sessions = []
+    for row in response.data:
+        msg_count_data = row.pop("chat_messages", [])
+        msg_count = msg_count_data[0]["count"] if msg_count_data else 0
+        row["message_count"] = msg_count
+        row["last_message"] = None
+
+        if msg_count > 0:
+            last_msg = user_client.table("chat_messages")\
+                .select("content")\
+                .eq("session_id", row["id"])\
+                .eq("role", "user")\
+                .order("created_at", desc=True)\
+                .limit(1)\
+                .execute()
+            if last_msg.data:
+                row["last_message"] = last_msg.data[0]["content"][:100]
+
+        if search and not _matches_search(row, search):
+            continue
+        sessions.append(row)
+        if limit is not None and len(sessions) >= limit:
+            break
+    return sessions
+
+
+def _matches_search(row: Dict[str, Any], search: str) -> bool:
+    needle = search.lower()
+    return any(needle in (row.get(key) or "").lower() for key in ("title", "last_message"))
+
+
 @router.get("/sessions")
 async def get_sessions(
+    response: Response,
     detail: bool = Query(False, description="Include message counts and last message preview"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size for detail=true (default: all sessions)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    q: Optional[str] = Query(None, max_length=200, description="detail=true: title or last question contains this (case-insensitive)"),
+    since: Optional[datetime] = Query(None, description="detail=true: only sessions created at or after this timestamp"),
     current_user = Depends(get_current_user),
     user_client = Depends(get_user_client)
 ):
@@ -42,43 +142,39 @@ async def get_sessions(
     Get all chat sessions for the current user.
     Pass ?detail=true to include message counts and last message preview (used by History page).
     Default lightweight response returns only session metadata (used by Chat sidebar).
+
+    With detail=true, ?limit=N returns one page, newest first; when more
+    sessions exist the X-Next-Cursor response header holds the ?cursor= for
+    the next page.  ?q= and ?since= filter on the server, so every page (and
+    the cursor) covers matching sessions only.
     """
     try:
         if not detail:
             # Lightweight query — just session metadata, single DB call
-            response = user_client.table("chat_sessions")\
+            sessions_response = user_client.table("chat_sessions")\
                 .select("id, user_id, title, created_at")\
                 .order("created_at", desc=True)\
                 .execute()
-            return response.data
+            return sessions_response.data
 
-        # Detailed query — includes message counts and last message preview
-        response = user_client.table("chat_sessions")\
-            .select("*, chat_messages(count)")\
-            .order("created_at", desc=True)\
-            .execute()
-
-        sessions = []
-        for row in response.data:
-            msg_count_data = row.pop("chat_messages", [])
-            msg_count = msg_count_data[0]["count"] if msg_count_data else 0
-            row["message_count"] = msg_count
-            row["last_message"] = None
-
-            if msg_count > 0:
-                last_msg = user_client.table("chat_messages")\
-                    .select("content")\
-                    .eq("session_id", row["id"])\
-                    .eq("role", "user")\
-                    .order("created_at", desc=True)\
-                    .limit(1)\
-                    .execute()
-                if last_msg.data:
-                    row["last_message"] = last_msg.data[0]["content"][:100]
-
-            sessions.append(row)
+        before = _decode_cursor(cursor) if cursor else None
+        search = (q or "").strip() or None
+        # One extra row tells whether another page exists.
+        fetch = limit + 1 if limit is not None else None
+        try:
+            sessions = _session_summaries(user_client, current_user.id, fetch, before, search, since)
+        except Exception as e:
+            if not is_missing_function(e):
+                raise
+            logger.warning(f"get_session_summaries RPC unavailable, querying per session: {e}")
+            sessions = _session_summaries_per_session(user_client, fetch, before, search, since)
 
+        if limit is not None and len(sessions) > limit:
+            sessions = sessions[:limit]
+            response.headers["X-Next-Cursor"] = _encode_cursor(sessions[-1])
         return sessions
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -104,16 +200,58 @@ async def create_session(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Columns per ?metadata= mode. "light" keeps only the images the chat UI
+# rebuilds on reload; "none" drops the metadata column entirely.
+_MESSAGE_COLUMNS = {
+    "full": "*",
+    "light": "id, session_id, role, content, created_at, relevant_images:metadata->relevant_images",
+    "none": "id, session_id, role, content, created_at",
+}
+
+
+def _keyset_filter(query, op: str, created_at: datetime, row_id: Optional[UUID]):
+    """
+    Rows strictly before (``lt``) / after (``gt``) the (created_at, id) cursor.
+
+    Only parsed values are accepted: their string forms cannot contain the
+    quotes, commas or parentheses that would change the ``or`` expression.
+    """
+    timestamp = created_at.isoformat()
+    if row_id is None:
+        return getattr(query, op)("created_at", timestamp)
+    return query.or_(
+        f'created_at.{op}."{timestamp}",'
+        f'and(created_at.eq."{timestamp}",id.{op}."{row_id}")'
+    )
+
+
 @router.get("/sessions/{session_id}", response_model=List[ChatMessage])
 async def get_session_history(
     session_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (default: the whole session)"),
+    before: Optional[datetime] = Query(None, description="Only messages created before this created_at"),
+    before_id: Optional[UUID] = Query(None, description="id of the ?before= message, to page past equal timestamps"),
+    after: Optional[datetime] = Query(None, description="Only messages created after this created_at"),
+    after_id: Optional[UUID] = Query(None, description="id of the ?after= message, to page past equal timestamps"),
+    metadata: str = Query("full", pattern="^(full|light|none)$", description="full, light (images only) or none"),
     current_user = Depends(get_current_user),
     user_client = Depends(get_user_client)
 ):
     """
     Get message history for a specific session.
     RLS ensures user can only access their own sessions.
+
+    Messages are always returned oldest first. With ?limit=N the page is the
+    N newest messages (older than ?before= if given), or the N oldest newer
+    than ?after=; X-Has-More says whether more exist in that direction, and
+    the created_at of the first / last message is the next cursor.  Pass
+    that message's id as ?before_id= / ?after_id= too: the page then starts
+    strictly past (created_at, id), so messages sharing a timestamp are
+    neither skipped nor repeated.
     """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
     try:
         # Verify session ownership
         session_check = user_client.table("chat_sessions")\
@@ -124,14 +262,31 @@ async def get_session_history(
         if not session_check.data:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        # Fetch messages
-        messages = user_client.table("chat_messages")\
-            .select("*")\
-            .eq("session_id", session_id)\
-            .order("created_at", desc=False)\
-            .execute()
-            
-        return messages.data
+        # Fetch messages; paging backwards reads newest-first, then flips the page.
+        newest_first = limit is not None and not after
+        query = user_client.table("chat_messages")\
+            .select(_MESSAGE_COLUMNS[metadata])\
+            .eq("session_id", session_id)
+        if before:
+            query = _keyset_filter(query, "lt", before, before_id)
+        if after:
+            query = _keyset_filter(query, "gt", after, after_id)
+        query = query.order("created_at", desc=newest_first).order("id", desc=newest_first)
+        if limit is not None:
+            # One extra row tells whether another page exists.
+            query = query.limit(limit + 1)
+        messages = query.execute().data or []
+
+        if limit is not None:
+            response.headers["X-Has-More"] = "true" if len(messages) > limit else "false"
+            messages = messages[:limit]
+        if newest_first:
+            messages.reverse()
+        if metadata == "light":
+            for message in messages:
+                images = message.pop("relevant_images", None)
+                message["metadata"] = {"relevant_images": images} if images else None
+        return messages
     except HTTPException:
         raise
     except Exception as e:
@@ -168,6 +323,7 @@ async def delete_session(
             .delete()\
             .eq("id", session_id)\
             .execute()
+        history_cache.invalidate(session_id)
 
         return {"success": True}
     except HTTPException:
@@ -210,6 +366,7 @@ async def update_session_title(
                 status_code=500,
                 detail="Failed to update session title"
             )
+        history_cache.invalidate(session_id)
         
         return update_response.data[0]
     
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import List, Dict, Any
-from supabase import create_client
+from app.core.supabase_clients import create_client
 import os
 import re
 import uuid
@@ -8,25 +8,42 @@ app/services/supabase_content_repository.py and app/transcription/summarize_tran
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 from dotenv import load_dotenv
 import asyncio
+import hashlib
+import logging
 import tempfile
-import whisper
+import time
 import os
 from datetime import timedelta
-from supabase import create_client
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
+from app.core.supabase_clients import get_client
 import uuid
 
 from app.config import settings
+from app.core.embeddings import create_embedding_model
+from app.core.metrics import INGESTION_DURATION, QUEUE_DEPTH
+from app.core.vector_store import get_vector_store
+from app.transcription.audio import (
+    audio_track_path,
+    extract_audio_track,
+    hold_audio_track,
+    probe_duration,
+    prune_audio_cache,
+    release_audio_track,
+)
+from app.transcription.backends import get_backend
+from app.transcription.chunked import iter_transcribed_windows
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 # Load .env from project root
 BASE_DIR = Path(__file__).resolve().parents[2]
 load_dotenv(BASE_DIR / ".env")
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
 # --------- small helpers (timestamp formatting + renderers) ---------
@@ -116,24 +133,104 @@ def _upload_bytes(bucket: str, storage_path: str, data: bytes, content_type: str
     if not url or not key:
         raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY required for video operations")
     
-    sb = create_client(url, key)
+    sb = get_client(url, key)
     opts = {"upsert": "true"}
     if content_type:
         opts["contentType"] = content_type
     sb.storage.from_(bucket).upload(storage_path, data, opts)
     return sb.storage.from_(bucket).get_public_url(storage_path)
 
-# --------- Whisper transcription ---------
-def _transcribe_to_segments(tmp_video_path: str, model_name: str = "small", language: str | None = None):
-    model = whisper.load_model(model_name)
-    result = model.transcribe(
-        tmp_video_path,
-        language=language,
-        verbose=False,
-        word_timestamps=False,
-        condition_on_previous_text=True,
+def _public_url(bucket: str, storage_path: str) -> str:
+    """Return the public URL a file will have once uploaded (no network call)."""
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY required for video operations")
+    return get_client(url, key).storage.from_(bucket).get_public_url(storage_path)
+
+# --------- transcription ---------
+def _prepare_audio(tmp_video_path: str, content_hash: str) -> str:
+    """
+    Reduce the upload to a cached 16 kHz mono WAV and return its path.
+    Falls back to the original file if ffmpeg cannot extract an audio track.
+    The caller holds the track (``hold_audio_track``) and prunes the cache
+    once transcription is over.
+    """
+    try:
+        audio_path = extract_audio_track(tmp_video_path, settings.AUDIO_CACHE_DIR, content_hash)
+    except Exception as exc:
+        logger.warning("Audio extraction failed, transcribing the original file: %s", exc)
+        return tmp_video_path
+    return str(audio_path)
+
+def _prune_audio_cache(track: Path) -> None:
+    """Trim the audio cache, keeping ``track`` (just used) and tracks other uploads hold."""
+    try:
+        prune_audio_cache(settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_MB * 1024 * 1024, protected=[track])
+    except Exception as exc:
+        logger.warning("Audio cache pruning failed: %s", exc)
+
+def _transcribe_to_segments(
+    media_path: str,
+    model_name: str = "small",
+    language: str | None = None,
+    backend_name: str | None = None,
+):
+    return get_backend(backend_name).transcribe(media_path, model_name, language)
+
+def _use_chunked_mode(media_path: str, requested: bool | None) -> bool:
+    """Decide between one-shot and chunked transcription (explicit request wins, else by duration)."""
+    if requested is False:
+        return False
+    threshold = settings.TRANSCRIBE_CHUNKED_MIN_SECONDS
+    if requested is None and not threshold:
+        return False
+    duration = probe_duration(media_path)
+    if duration is None:
+        return False
+    return bool(requested) or duration >= threshold
+
+def _transcribe_chunked_and_index(
+    media_path: str,
+    slug: str,
+    model_name: str,
+    language: str | None,
+    bucket: str,
+    original_video_url: str,
+    backend_name: str | None = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Transcribe in parallel windows and index each window's chunks as soon as it
+    is ready, so the start of a long video is searchable before the end is done.
+    Transcript URLs are known up front; the files themselves are uploaded once
+    the full transcript exists.  If any window fails, the chunks already
+    indexed are deleted again, so a failed upload leaves nothing behind and a
+    retry does not duplicate them.
+    """
+    txt_url, srt_url, vtt_url = (
+        _public_url(bucket, f"videos/{slug}/transcripts/{slug}.{fmt}") for fmt in ("txt", "srt", "vtt")
     )
-    return [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]} for s in result["segments"]]
+    segments: List[Dict[str, Any]] = []
+    written: List[str] = []
+    try:
+        for window, window_segments in iter_transcribed_windows(
+            media_path, model_name, language, backend_name=backend_name
+        ):
+            segments.extend(window_segments)
+            written += _write_transcript_chunks(slug, window_segments, original_video_url, txt_url, srt_url, vtt_url)
+            logger.info(
+                "Indexed window %d (%.0fs-%.0fs) of %s: %d segments, %d chunks so far",
+                window.index, window.core_start, window.core_end, slug, len(window_segments), len(written),
+            )
+    except Exception:
+        if written:
+            logger.warning("Chunked transcription of %s failed; removing %d indexed chunks", slug, len(written))
+            try:
+                _delete_transcript_chunks(written)
+            except Exception as exc:
+                logger.error("Failed to remove partial chunks of %s: %s", slug, exc)
+        raise
+    return segments, len(written)
 
 # --------- API: upload video, transcribe, save outputs ---------
 @router.post("/upload")
@@ -141,11 +238,13 @@ async def upload_and_transcribe(
     slug: str = Form(..., description="Video slug, e.g., cfc-vid-1"),
     file: UploadFile = File(..., description="Video/Audio file (.mp4, .mov, .m4a, etc.)"),
     model: str = Form("small", description="Whisper model: tiny/base/small/medium/large"),
+    backend: str | None = Form(None, description="Transcription backend: whisper/faster-whisper (default from config)"),
     language: str | None = Form(None, description="Force language like 'en' (optional)"),
+    chunked: bool | None = Form(None, description="Transcribe in parallel windows (default: automatic for long media)"),
 ) -> JSONResponse:
     """
-    1) Upload the original to Supabase: videos/original/{slug}.ext
-    2) Transcribe with Whisper
+    1) Upload the original to Supabase: videos/original/{slug}.ext (and extract a cached 16 kHz audio track)
+    2) Transcribe with the selected backend (long media: parallel windows, indexed as they finish)
     3) Save TXT/SRT/VTT + Markdown summary to Supabase
     4) Return public URLs
     """
@@ -156,7 +255,15 @@ async def upload_and_transcribe(
     if not slug or "/" in slug:
         raise HTTPException(400, "slug must be non-empty and cannot contain '/'")
 
+    try:
+        backend_name = get_backend(backend).name
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
     tmp_path = None
+    track = None
+    started = time.perf_counter()
+    QUEUE_DEPTH.labels("video_uploads").inc()
     try:
         # 0) read file bytes (and validate)
         raw = await file.read()
@@ -164,19 +271,38 @@ async def upload_and_transcribe(
             raise HTTPException(400, "empty file")
         ext = (Path(file.filename).suffix or ".mp4").lower()
 
-        # stash to a temp file so Whisper can read it
+        # stash to a temp file so ffmpeg can read it
         with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
             tmp.write(raw)
             tmp_path = tmp.name
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(raw).hexdigest())
+        # Held from before extraction until transcription is over, so no other
+        # upload's pruning deletes the track while this one reads it.
+        track = audio_track_path(settings.AUDIO_CACHE_DIR, content_hash)
+        hold_audio_track(track)
 
-        # 1) upload original under videos/{slug}/original/
+        # 1) upload original under videos/{slug}/original/ while the audio track is extracted
         # Run sync Supabase/httpx calls in a thread to avoid "client closed" errors
         # that occur when sync httpx clients are used directly on the asyncio event loop.
         video_path = f"videos/{slug}/original/{slug}{ext}"
-        video_url = await asyncio.to_thread(_upload_bytes, bucket, video_path, raw, "video/mp4")
+        video_url, audio_path = await asyncio.gather(
+            asyncio.to_thread(_upload_bytes, bucket, video_path, raw, "video/mp4"),
+            asyncio.to_thread(_prepare_audio, tmp_path, content_hash),
+        )
+        del raw
+        if audio_path != tmp_path:
+            # Only the (much smaller) audio track is needed from here on.
+            os.remove(tmp_path)
+            tmp_path = None
 
         # 2) whisper (CPU-bound — also runs in thread so it doesn't block the loop)
-        segments = await asyncio.to_thread(_transcribe_to_segments, tmp_path, model, language)
+        streamed = await asyncio.to_thread(_use_chunked_mode, audio_path, chunked)
+        if streamed:
+            segments, chunk_count = await asyncio.to_thread(
+                _transcribe_chunked_and_index, audio_path, slug, model, language, bucket, video_url, backend_name,
+            )
+        else:
+            segments = await asyncio.to_thread(_transcribe_to_segments, audio_path, model, language, backend_name)
 
         # 3) render formats
         txt_string = _render_txt(segments)
@@ -190,17 +316,18 @@ async def upload_and_transcribe(
         vtt_url = await asyncio.to_thread(_upload_bytes, bucket, f"videos/{slug}/transcripts/{slug}.vtt", vtt_string.encode("utf-8"), "text/vtt")
         sum_url = await asyncio.to_thread(_upload_bytes, bucket, f"videos/{slug}/summary/{slug}.md", summary_md.encode("utf-8"), "text/markdown")
 
-        chunk_count = await asyncio.to_thread(
-            _index_transcript_chunks,
-            slug,
-            segments,
-            video_url,
-            txt_url,
-            srt_url,
-            vtt_url,
-        )
-
-
+        if not streamed:
+            chunk_count = await asyncio.to_thread(
+                _index_transcript_chunks,
+                slug,
+                segments,
+                video_url,
+                txt_url,
+                srt_url,
+                vtt_url,
+            )
+
+        INGESTION_DURATION.labels("video").observe(time.perf_counter() - started)
         return JSONResponse(
             {
                 "ok": True,
@@ -216,6 +343,10 @@ async def upload_and_transcribe(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload/transcription failed: {e}")
     finally:
+        QUEUE_DEPTH.labels("video_uploads").dec()
+        if track is not None:
+            release_audio_track(track)
+            await asyncio.to_thread(_prune_audio_cache, track)
         if tmp_path and os.path.exists(tmp_path):
             try:
                 os.remove(tmp_path)
@@ -290,6 +421,7 @@ _st_model: SentenceTransformer | None = None
 def _embedder() -> SentenceTransformer:
     global _st_model
     if _st_model is None:
+        from sentence_transformers import SentenceTransformer  # deferred: pulls in PyTorch
         # local_files_only=True skips the HuggingFace Hub network check entirely.
         # Without it, huggingface_hub makes a HEAD request to verify the cached
         # model; on macOS the SSL cert store is incomplete, the request fails,
@@ -302,17 +434,11 @@ def _embedder() -> SentenceTransformer:
             _st_model = SentenceTransformer(settings.EMBED_MODEL_NAME)
     return _st_model
 
-def _pinecone():
-    """Bootstrap the Pinecone client."""
-    api_key = os.getenv("PINECONE_API_KEY")
-    if not api_key:
-        raise RuntimeError("Missing PINECONE_API_KEY in .env")
-    return Pinecone(api_key=api_key)
-
 def _pinecone_index():
-    """Return the configured Pinecone index handle."""
-    pc = _pinecone()
-    return pc.Index(settings.PINECONE_INDEX_NAME)
+    """Return the shared handle of the configured Pinecone (or in-memory) index."""
+    if settings.VECTOR_STORE_BACKEND != "memory" and not settings.PINECONE_API_KEY:
+        raise RuntimeError("Missing PINECONE_API_KEY in .env")
+    return get_vector_store(settings.PINECONE_INDEX_NAME).index
 
 def _pinecone_namespace():
     """Return Pinecone namespace from settings or env; None for default namespace."""
@@ -331,13 +457,27 @@ def _index_transcript_chunks(
     vtt_url: str,
 ) -> int:
     """Chunk transcript, embed, and upsert to Pinecone. Returns # vectors upserted."""
+    return len(_write_transcript_chunks(slug, segments, original_video_url, txt_url, srt_url, vtt_url))
+
+def _write_transcript_chunks(
+    slug: str,
+    segments: List[Dict[str, Any]],
+    original_video_url: str,
+    txt_url: str,
+    srt_url: str,
+    vtt_url: str,
+) -> List[str]:
+    """``_index_transcript_chunks`` returning the IDs of the chunks written."""
     chunks = _build_chunks_from_segments(slug, segments)
     if not chunks:
-        return 0
+        return []
 
-    model = _embedder()
     texts = [c["text"] for c in chunks]
-    vectors = model.encode(texts, normalize_embeddings=True).tolist()
+    if settings.EMBEDDING_BACKEND == "remote":
+        # The shared embedding server holds the model; don't load a copy here.
+        vectors = create_embedding_model().encode(texts)
+    else:
+        vectors = _embedder().encode(texts, normalize_embeddings=True).tolist()
 
     index = _pinecone_index()
     namespace = _pinecone_namespace()
@@ -375,10 +515,9 @@ def _index_transcript_chunks(
 
     # upsert in batches (sane default)
     B = 100
-    # Create a fresh Supabase client here — reusing a module-level singleton from an
-    # async context can leave the underlying httpx.Client in a closed state.
+    # get_client rebuilds the shared client if its httpx pool was ever closed.
     try:
-        sb = create_client(
+        sb = get_client(
             os.getenv("SUPABASE_URL", ""),
             os.getenv("SUPABASE_SERVICE_ROLE_KEY", ""),
         )
@@ -394,6 +533,23 @@ def _index_transcript_chunks(
         else:
             index.upsert(vectors=batch)
 
-    return len(items)
+    return [item["id"] for item in items]
+
+def _delete_transcript_chunks(chunk_ids: List[str]) -> None:
+    """Remove chunks written by ``_write_transcript_chunks`` from Pinecone and Supabase."""
+    index = _pinecone_index()
+    namespace = _pinecone_namespace()
+    B = 1000  # Pinecone's per-request delete limit
+    for i in range(0, len(chunk_ids), B):
+        batch = chunk_ids[i:i+B]
+        if namespace:
+            index.delete(ids=batch, namespace=namespace)
+        else:
+            index.delete(ids=batch)
+        sb = get_client(
+            os.getenv("SUPABASE_URL", ""),
+            os.getenv("SUPABASE_SERVICE_ROLE_KEY", ""),
+        )
+        sb.table("document_chunks").delete().in_("chunk_id", batch).execute()
 
 
@@ -1,13 +1,13 @@
 import logging
 from fastapi import APIRouter, HTTPException
 from app.api.models.responses import VectorStoreStatsResponse, NamespaceStats
-from app.core.vector_store import VectorStore
+from app.core.vector_store import get_vector_store, vector_store_stats
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/visibility", tags=["visibility"])
 
 # Initialize vector store once per process
-vector_store = VectorStore()
+vector_store = get_vector_store()
 
 
 @router.get("/vector-store", response_model=VectorStoreStatsResponse)
@@ -45,3 +45,9 @@ async def get_vector_store_stats():
     except Exception as exc:
         logger.error(f"Failed to fetch vector store stats: {exc}")
         raise HTTPException(status_code=500, detail="Failed to fetch vector store stats")
+
+
+@router.get("/vector-store/connections")
+async def get_vector_store_connections():
+    """Shared Pinecone client / index handles and per-store call counts of this worker."""
+    return vector_store_stats()
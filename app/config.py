@@ -22,6 +22,12 @@ class Settings:
     # Model Settings
     EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
     EMBED_DIMENSION = 384
+    # WARMUP_ENABLED: at startup, load the embedding model (and run a dummy
+    #   batch of WARMUP_BATCH_SIZE texts), connect the vector stores and import
+    #   the LLM SDK in a background thread. /api/health/ready answers 503 until
+    #   this has finished. false = load everything on first use, ready at once.
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() in ("true", "1", "yes")
+    WARMUP_BATCH_SIZE: int = int(os.getenv("WARMUP_BATCH_SIZE", "8"))
     
     # Chunking Settings
     CHUNK_SIZE = 600
@@ -40,6 +46,9 @@ class Settings:
         or PINECONE_INDEX_NAME
     )
     PINECONE_NAMESPACE: Optional[str] = os.getenv("PINECONE_NAMESPACE")
+    # PINECONE_POOL_THREADS: size of the connection pool of the shared index
+    #   handles (one per index, reused by every request). 0 = SDK default.
+    PINECONE_POOL_THREADS: int = int(os.getenv("PINECONE_POOL_THREADS", "0"))
     
     # Supabase / Content Storage Settings
     # IMPORTANT: Two different keys for different purposes!
@@ -56,6 +65,28 @@ class Settings:
     # - Bypasses Row Level Security (RLS)
     # - Used for: Admin endpoints, server-side operations, bypassing RLS
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    # JWT SECRET - Legacy HS256 secret that signs user access tokens
+    # - NEVER expose to frontend/client
+    # - Used for: verifying access tokens locally instead of calling Supabase
+    #   Auth on every request. Projects on asymmetric signing keys (RS256/ES256)
+    #   are verified against the project's JWKS endpoint and need no secret.
+    SUPABASE_JWT_SECRET: Optional[str] = os.getenv("SUPABASE_JWT_SECRET")
+    # SUPABASE_POOL_MAX_CONNECTIONS / _MAX_KEEPALIVE / _KEEPALIVE_SECONDS: limits
+    #   of the one HTTP connection pool shared by every Supabase client in a
+    #   worker (requests wait for a free connection beyond the maximum).
+    SUPABASE_POOL_MAX_CONNECTIONS: int = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "50"))
+    SUPABASE_POOL_MAX_KEEPALIVE: int = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "20"))
+    SUPABASE_POOL_KEEPALIVE_SECONDS: float = float(os.getenv("SUPABASE_POOL_KEEPALIVE_SECONDS", "30"))
+    # SUPABASE_HTTP_TIMEOUT: read/write timeout in seconds for Supabase requests
+    #   (long enough for storage uploads of large videos).
+    SUPABASE_HTTP_TIMEOUT: float = float(os.getenv("SUPABASE_HTTP_TIMEOUT", "120"))
+    # AUTH_LOCAL_JWT_VERIFY: set "false" to always verify tokens with Supabase Auth.
+    AUTH_LOCAL_JWT_VERIFY: bool = os.getenv("AUTH_LOCAL_JWT_VERIFY", "true").lower() in ("true", "1", "yes")
+    # AUTH_CACHE_TTL_SECONDS: how long each worker caches a user's profile
+    #   status and role. The admin user endpoints clear the entry they change;
+    #   other workers pick the change up when it expires. 0 disables the cache.
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
     
     SUPABASE_BUCKET: Optional[str] = os.getenv("SUPABASE_BUCKET")
     SUPABASE_BUCKET_VIDEOS: Optional[str] = os.getenv("SUPABASE_BUCKET_VIDEOS", SUPABASE_BUCKET)
@@ -85,9 +116,109 @@ class Settings:
     # Set to False to create invitations without sending emails (useful when Resend domain is not verified)
     ENABLE_EMAIL_INVITES: bool = os.getenv("ENABLE_EMAIL_INVITES", "true").lower() in ("true", "1", "yes")
     
+    # ── Video Transcription Settings ──────────────────────────────────────────
+    # WHISPER_PRELOAD_MODELS: comma-separated model names loaded in the
+    #   background at startup (e.g. "small"), so the first upload after a
+    #   deploy does not pay the weight-loading cost.  Empty = load on demand.
+    WHISPER_PRELOAD_MODELS: list = [
+        m.strip() for m in os.getenv("WHISPER_PRELOAD_MODELS", "").split(",") if m.strip()
+    ]
+    # WHISPER_MAX_RESIDENT_MODELS: how many distinct models may stay loaded at
+    #   once; the least-recently-used one is evicted beyond this.
+    WHISPER_MAX_RESIDENT_MODELS: int = int(os.getenv("WHISPER_MAX_RESIDENT_MODELS", "2"))
+    # WHISPER_DEVICE: torch device for Whisper ("cpu", "cuda"); unset = auto.
+    WHISPER_DEVICE: Optional[str] = os.getenv("WHISPER_DEVICE") or None
+    # TRANSCRIPTION_BACKEND: "whisper" (PyTorch) or "faster-whisper"
+    #   (CTranslate2, needs the faster-whisper package). Uploads may override it.
+    TRANSCRIPTION_BACKEND: str = os.getenv("TRANSCRIPTION_BACKEND", "whisper")
+    # FASTER_WHISPER_COMPUTE_TYPE: weight precision for faster-whisper ("int8",
+    #   "int8_float32", "float32"); int8 is the fast choice on CPU.
+    FASTER_WHISPER_COMPUTE_TYPE: str = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+    # FASTER_WHISPER_CPU_THREADS: threads per model. 0 = library default.
+    FASTER_WHISPER_CPU_THREADS: int = int(os.getenv("FASTER_WHISPER_CPU_THREADS", "0"))
+    # Uploads are reduced to a 16 kHz mono WAV once, cached by content hash so
+    #   re-transcribing the same file (e.g. with another model) skips decoding.
+    #   AUDIO_CACHE_MAX_MB caps the cache; least-recently-used tracks go first.
+    AUDIO_CACHE_DIR = PROCESSED_DIR / "audio_cache"
+    AUDIO_CACHE_MAX_MB: int = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+    # Chunked transcription: media at least TRANSCRIBE_CHUNKED_MIN_SECONDS long
+    #   is split on silence into ~TRANSCRIBE_WINDOW_SECONDS windows that are
+    #   transcribed in parallel and indexed as each finishes.  0 disables the
+    #   automatic switch (uploads can still request it explicitly).
+    TRANSCRIBE_CHUNKED_MIN_SECONDS: float = float(os.getenv("TRANSCRIBE_CHUNKED_MIN_SECONDS", "600"))
+    TRANSCRIBE_WINDOW_SECONDS: float = float(os.getenv("TRANSCRIBE_WINDOW_SECONDS", "300"))
+    # Extra audio decoded on each side of a window so words at the cut are not lost.
+    TRANSCRIBE_WINDOW_OVERLAP_SECONDS: float = float(os.getenv("TRANSCRIBE_WINDOW_OVERLAP_SECONDS", "2"))
+    # TRANSCRIBE_WORKERS: pool processes (each holds its own model). 0 = half the cores.
+    TRANSCRIBE_WORKERS: int = int(os.getenv("TRANSCRIBE_WORKERS", "0"))
+    # TRANSCRIBE_MEMORY_BUDGET_MB: memory the pool's models may use in total.
+    #   Each worker keeps one copy of the job's model, so the pool is capped at
+    #   budget / model size (e.g. 8000 MB -> 5 "small" or 1 "medium" worker).
+    #   0 = half the physical memory.
+    TRANSCRIBE_MEMORY_BUDGET_MB: float = float(os.getenv("TRANSCRIBE_MEMORY_BUDGET_MB", "0"))
+
+    # ── Local Backends (offline tests / benchmarks) ───────────────────────────
+    # SUPABASE_BACKEND: "supabase" (default) or "memory" — an in-process fake
+    #   of tables, RPCs, storage and auth (app/core/memory_supabase.py).
+    SUPABASE_BACKEND: str = os.getenv("SUPABASE_BACKEND", "supabase").lower()
+    # VECTOR_STORE_BACKEND: "pinecone" (default) or "memory" (exact numpy search).
+    VECTOR_STORE_BACKEND: str = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+    # EMBEDDING_BACKEND: "sentence-transformers" (default), "hashing" — a
+    #   deterministic bag-of-words embedder that needs no model download — or
+    #   "remote": use the shared embedding server below instead of loading the
+    #   model in every API worker.
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "sentence-transformers").lower()
+
+    # ── Embedding Server (shared model for several API workers) ───────────────
+    # Run `python -m app.core.embedding_server` once and set
+    #   EMBEDDING_BACKEND=remote in the workers: the model is loaded once and
+    #   concurrent requests from all workers are encoded in shared batches.
+    # EMBEDDING_SERVER_ADDRESS: "unix:/path/to.sock" or "tcp://127.0.0.1:8765"
+    #   (Windows has no Unix sockets in asyncio, so TCP loopback is the default there).
+    EMBEDDING_SERVER_ADDRESS: str = os.getenv(
+        "EMBEDDING_SERVER_ADDRESS",
+        "tcp://127.0.0.1:8765" if os.name == "nt" else "unix:/tmp/cfc-embeddings.sock",
+    )
+    # EMBEDDING_SERVER_MAX_BATCH: texts encoded together at most.
+    EMBEDDING_SERVER_MAX_BATCH: int = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", "64"))
+    # EMBEDDING_SERVER_BATCH_WAIT_MS: how long a batch waits for more requests.
+    EMBEDDING_SERVER_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_SERVER_BATCH_WAIT_MS", "2"))
+    # EMBEDDING_SERVER_TIMEOUT: client socket timeout in seconds.
+    EMBEDDING_SERVER_TIMEOUT: float = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+
+    # ── Observability ─────────────────────────────────────────────────────────
+    # TRACING_ENABLED: time each chat/RAG stage per request and report it in a
+    #   Server-Timing response header and one "request_trace" JSON log line.
+    #   Off by default; when off, span() is a no-op.
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() in ("true", "1", "yes")
+    # METRICS_ENABLED: expose Prometheus metrics at GET /metrics (needs the
+    #   prometheus-client package; without it metrics are silently disabled).
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("true", "1", "yes")
+    # PROFILER_INTERVAL_MS: sampling period of the in-process stack sampler
+    #   used by POST /api/admin/profile and slow-request captures.
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+    # PROFILER_MAX_SECONDS: upper bound for one on-demand or automatic capture.
+    PROFILER_MAX_SECONDS: float = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    # PROFILE_SLOW_REQUESTS_MS: when > 0, any request still running after this
+    #   many ms is sampled until it finishes and its collapsed stacks are saved
+    #   under PROFILES_DIR. 0 disables automatic captures.
+    PROFILE_SLOW_REQUESTS_MS: float = float(os.getenv("PROFILE_SLOW_REQUESTS_MS", "0"))
+    PROFILES_DIR = DATA_DIR / "profiles"
+    # PROFILES_KEEP: number of saved captures kept before the oldest are pruned.
+    PROFILES_KEEP: int = int(os.getenv("PROFILES_KEEP", "50"))
+
     # Search Settings
     DEFAULT_TOP_K = 5
     MAX_CONTEXT_LENGTH = 4000
+    # CHUNK_CACHE_SIZE / CHUNK_CACHE_TTL_SECONDS: per-worker LRU of
+    #   document_chunks rows used to hydrate retrieval results and stored
+    #   citations. Re-ingesting a document clears its rows in this worker;
+    #   other workers see the new text when the entry expires. 0 disables it.
+    CHUNK_CACHE_SIZE: int = int(os.getenv("CHUNK_CACHE_SIZE", "5000"))
+    CHUNK_CACHE_TTL_SECONDS: float = float(os.getenv("CHUNK_CACHE_TTL_SECONDS", "600"))
+    # CHAT_HISTORY_CACHE_SESSIONS: sessions whose recent messages each worker
+    #   keeps for the next turn's conversation history. 0 disables the cache.
+    CHAT_HISTORY_CACHE_SESSIONS: int = int(os.getenv("CHAT_HISTORY_CACHE_SESSIONS", "1000"))
 
     # ── Feedback Re-Ranking Settings ──────────────────────────────────────────
     # FEEDBACK_ENABLED: set "false" to disable all feedback re-ranking.
@@ -117,6 +248,28 @@ class Settings:
     #   query embedding and the current query for an event to be counted.
     #   0.75 means only very similar questions trigger the boost.
     FEEDBACK_SIM_THRESHOLD: float = float(os.getenv("FEEDBACK_SIM_THRESHOLD", "0.75"))
+    # RERANK_CANDIDATES: matches fetched from Pinecone and re-ranked by
+    #   feedback before the best top_k are kept (e.g. 100). Values up to top_k
+    #   re-rank only the top_k matches themselves.
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "0"))
+    # FEEDBACK_SCORES_REFRESH_SECONDS: how often each worker reloads its
+    #   in-memory copy of chunk_feedback_scores. Votes on the same worker apply
+    #   immediately; votes on other workers within this interval. 0 = query the
+    #   table on every retrieval.
+    FEEDBACK_SCORES_REFRESH_SECONDS: float = float(os.getenv("FEEDBACK_SCORES_REFRESH_SECONDS", "30"))
+    # FEEDBACK_LOCAL_INDEX: compute the Phase 2 scores in-process from a NumPy
+    #   index of chunk_feedback_events instead of the pgvector RPC.
+    FEEDBACK_LOCAL_INDEX: bool = os.getenv("FEEDBACK_LOCAL_INDEX", "true").lower() in ("true", "1", "yes")
+    # FEEDBACK_EVENTS_RESYNC_SECONDS: how often each worker reloads that index
+    #   to pick up votes from other workers (its own apply immediately).
+    FEEDBACK_EVENTS_RESYNC_SECONDS: float = float(os.getenv("FEEDBACK_EVENTS_RESYNC_SECONDS", "300"))
+    # FEEDBACK_QUEUE_FLUSH_SECONDS: votes are written to chunk_feedback_events
+    #   in batches at this interval (repeated votes on a message coalesce).
+    #   0 = sync after each vote's response, as a background task.
+    FEEDBACK_QUEUE_FLUSH_SECONDS: float = float(os.getenv("FEEDBACK_QUEUE_FLUSH_SECONDS", "2"))
+    # FEEDBACK_QUEUE_MAX_BATCH: messages per batch; a full batch is flushed
+    #   without waiting for the interval.
+    FEEDBACK_QUEUE_MAX_BATCH: int = int(os.getenv("FEEDBACK_QUEUE_MAX_BATCH", "100"))
 
 settings = Settings()
 settings._validate()
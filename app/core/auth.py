@@ -1,11 +1,26 @@
 import os
 import logging
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 from fastapi import HTTPException, Header
-from supabase import Client, create_client
+from supabase import Client
 from dotenv import load_dotenv
 from pathlib import Path
 
+from app.config import settings
+from app.core.supabase_clients import create_client, create_user_client, use_memory_supabase
+from app.core.metrics import record_cache, track_call
+from app.core.tracing import span
+
+try:
+    import jwt  # PyJWT, installed with supabase
+    _HAS_PYJWT = True
+except ImportError:
+    jwt = None
+    _HAS_PYJWT = False
+
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file
@@ -16,7 +31,7 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 # Auth service uses SERVICE_ROLE_KEY to verify admin roles and bypass RLS
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+if not use_memory_supabase() and (not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY):
     raise RuntimeError(
         "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required for authentication. "
         "SERVICE_ROLE_KEY is needed to verify admin roles and bypass RLS."
@@ -39,30 +54,169 @@ def get_current_user_token(credentials: HTTPAuthorizationCredentials = Security(
     """
     return credentials.credentials
 
+@dataclass
+class TokenUser:
+    """The user described by a locally verified access token (mirrors the fields of Supabase's ``User`` we use)."""
+
+    id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    aud: Optional[str] = None
+    app_metadata: Dict[str, Any] = field(default_factory=dict)
+    user_metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+def _signing_key(token: str, algorithm: str):
+    """Key that should have signed ``token``, or None when it can't be checked locally."""
+    global _jwks_client
+    if algorithm == "HS256":
+        return settings.SUPABASE_JWT_SECRET or None
+    if algorithm in ("RS256", "ES256") and SUPABASE_URL:
+        with _jwks_lock:
+            if _jwks_client is None:
+                # Keys are cached by the client and refetched when an unknown kid shows up.
+                _jwks_client = jwt.PyJWKClient(f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json")
+        return _jwks_client.get_signing_key_from_jwt(token).key
+    return None
+
+
+def verify_token_locally(token: str) -> Optional[TokenUser]:
+    """
+    Verify a Supabase access token's signature and expiry without a network call.
+
+    Returns None when local verification is off or no key is available (the
+    caller then asks Supabase Auth); raises ``jwt.InvalidTokenError`` for a
+    token that is forged, expired or not a user token.
+    """
+    if not settings.AUTH_LOCAL_JWT_VERIFY or not _HAS_PYJWT or use_memory_supabase():
+        return None
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    try:
+        key = _signing_key(token, algorithm)
+    except jwt.PyJWKClientError as e:
+        logger.warning(f"Could not load Supabase signing keys, verifying remotely: {e}")
+        return None
+    if key is None:
+        return None
+    # aud="authenticated" rejects the anon and service-role keys, which are signed with the same secret.
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience="authenticated",
+        options={"require": ["exp", "sub"]},
+    )
+    return TokenUser(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role"),
+        aud=claims.get("aud"),
+        app_metadata=claims.get("app_metadata") or {},
+        user_metadata=claims.get("user_metadata") or {},
+    )
+
+
+class UserAccessCache:
+    """
+    Short-lived per-worker cache of each user's profile ``status`` and ``role``.
+
+    The admin endpoints that change either call ``invalidate_user_access`` so
+    this worker sees the change at once; other workers see it within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[1]
+
+    def put(self, user_id: str, access: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, access)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(user_id), None)
+
+
+access_cache = UserAccessCache(settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def get_user_access(user_id: str) -> Optional[Dict[str, Any]]:
+    """Profile ``status`` and ``role`` of a user (cached), or None without a profile."""
+    access = access_cache.get(user_id)
+    record_cache("user_access", hit=access is not None)
+    if access is not None:
+        return access
+    with track_call("supabase", "select_profile_access"):
+        response = supabase.table("profiles")\
+            .select("status, role")\
+            .eq("id", user_id)\
+            .single()\
+            .execute()
+    if not response.data:
+        return None
+    access = {"status": response.data.get("status"), "role": response.data.get("role")}
+    access_cache.put(user_id, access)
+    return access
+
+
+def invalidate_user_access(user_id: Optional[str] = None) -> None:
+    """Drop the cached status/role of one user (or everyone) after an admin change."""
+    access_cache.invalidate(user_id)
+
+
 async def get_current_user(token: str = Security(get_current_user_token)):
     """
-    Verify JWT token with Supabase Auth and return user object.
-    Also checks profile status to ensure user is active.
+    Verify the JWT and return the user object.
+
+    Tokens are verified locally (signature and expiry) when a signing key is
+    available and with Supabase Auth otherwise. Also checks profile status to
+    ensure user is active.
     """
     if not supabase:
         raise HTTPException(status_code=503, detail="Supabase not configured")
 
     try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
+        with span("auth"):
+            try:
+                user = verify_token_locally(token)
+            except jwt.InvalidTokenError as e:
+                logger.info(f"Rejected access token: {e}")
+                raise HTTPException(status_code=401, detail="Invalid token")
+            if user is None:
+                with track_call("supabase", "auth_get_user"):
+                    user_response = supabase.auth.get_user(token)
+                if not user_response.user:
+                    raise HTTPException(status_code=401, detail="Invalid token")
+                user = user_response.user
         
         # Check user profile status
-        profile_response = supabase.table("profiles")\
-            .select("status, deleted_at")\
-            .eq("id", user_response.user.id)\
-            .single()\
-            .execute()
+        with span("profile_status"):
+            access = get_user_access(user.id)
         
-        if not profile_response.data:
+        if not access:
             raise HTTPException(status_code=403, detail="User profile not found")
         
-        status = profile_response.data.get("status")
+        status = access.get("status")
         if status != "active":
             # Show "inactive" message to match database status
             if status == "inactive":
@@ -72,7 +226,7 @@ async def get_current_user(token: str = Security(get_current_user_token)):
             else:
                 raise HTTPException(status_code=403, detail="Account is not active")
         
-        return user_response.user
+        return user
     except HTTPException:
         raise
     except Exception as e:
@@ -92,19 +246,10 @@ def get_user_scoped_client(token: str):
     Returns:
         Supabase client configured with user's token (respects RLS)
     """
-    from supabase import create_client
-    
-    # Create client with ANON_KEY (respects RLS)
-    user_client = create_client(SUPABASE_URL, os.getenv("SUPABASE_ANON_KEY"))
-    
-    # Set the user's session using their JWT token
-    # This makes all queries execute with the user's permissions
-    user_client.auth.set_session(
-        access_token=token,
-        refresh_token=""  # Not needed for backend operations
-    )
-    
-    return user_client
+    # Client with ANON_KEY (respects RLS) that sends the user's JWT on every
+    # request, so all queries execute with the user's permissions. It shares
+    # the worker's HTTP connection pool; only the auth headers are per user.
+    return create_user_client(SUPABASE_URL, os.getenv("SUPABASE_ANON_KEY"), token)
 
 async def get_user_client(token: str = Security(get_current_user_token)):
     """
@@ -128,13 +273,13 @@ async def get_current_admin(user=Security(get_current_user)):
         raise HTTPException(status_code=503, detail="Supabase not configured")
 
     try:
-        # Query profiles table to check role
-        response = supabase.table("profiles").select("role").eq("id", user.id).single().execute()
+        # Role comes from the same (usually cached) profile lookup as the status check
+        access = get_user_access(user.id)
         
-        if not response.data:
+        if not access:
              raise HTTPException(status_code=403, detail="Profile not found")
              
-        role = response.data.get("role")
+        role = access.get("role")
         if role != "admin":
             raise HTTPException(status_code=403, detail="Insufficient permissions")
             
@@ -0,0 +1,184 @@
+"""
+Per-worker cache of ``document_chunks`` rows and the compact citation format.
+
+Retrieval turns Pinecone matches into context chunks by loading their rows
+from ``document_chunks``; the same few hundred chunks answer most questions,
+so ``fetch_chunks`` keeps recently used rows (LRU, bounded by
+``CHUNK_CACHE_SIZE``, expiring after ``CHUNK_CACHE_TTL_SECONDS``) and only
+asks Supabase for the misses.
+
+Assistant messages store their citations compactly – chunk ID, score and
+rank only (see ``compact_citations``).  ``hydrate_citations`` rebuilds the
+full context chunks from the cache when text or URLs are needed again; rows
+written before the compact format keep their full citations and are
+returned unchanged.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.core.metrics import record_cache, track_call
+
+logger = logging.getLogger(__name__)
+
+# Keys kept in chat_messages.metadata.citations.
+COMPACT_CITATION_KEYS = ("chunk_id", "score", "rank")
+
+
+def _to_float(value: Any) -> float | None:
+    """Best-effort float conversion that tolerates None/strings."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChunkCache:
+    """LRU of ``document_chunks`` rows keyed by ``chunk_id``, with a TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get_many(self, chunk_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        now = time.monotonic()
+        with self._lock:
+            for chunk_id in chunk_ids:
+                entry = self._entries.get(chunk_id)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[chunk_id]
+                    continue
+                self._entries.move_to_end(chunk_id)
+                found[chunk_id] = entry[1]
+        return found
+
+    def put_many(self, rows: Iterable[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for row in rows:
+                chunk_id = row.get("chunk_id")
+                if not chunk_id:
+                    continue
+                self._entries[chunk_id] = (expires, row)
+                self._entries.move_to_end(chunk_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, chunk_ids: Optional[Iterable[str]] = None, doc_id: Optional[str] = None) -> None:
+        """Drop the given chunks, every chunk of ``doc_id``, or (no arguments) everything."""
+        with self._lock:
+            if chunk_ids is None and doc_id is None:
+                self._entries.clear()
+                return
+            for chunk_id in chunk_ids or ():
+                self._entries.pop(chunk_id, None)
+            if doc_id is not None:
+                for chunk_id in [k for k, (_, row) in self._entries.items() if row.get("doc_id") == doc_id]:
+                    del self._entries[chunk_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+chunk_cache = ChunkCache(settings.CHUNK_CACHE_SIZE, settings.CHUNK_CACHE_TTL_SECONDS)
+
+
+def fetch_chunks(client: Any, chunk_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """``document_chunks`` rows for ``chunk_ids`` (cached), keyed by chunk ID.
+
+    Missing chunks are simply absent from the result; a failed query is
+    logged and treated as a miss so retrieval still works from the vector
+    store metadata.
+    """
+    wanted = list(dict.fromkeys(cid for cid in chunk_ids if cid))
+    rows = chunk_cache.get_many(wanted)
+    for chunk_id in wanted:
+        record_cache("document_chunks", hit=chunk_id in rows)
+    missing = [cid for cid in wanted if cid not in rows]
+    if not missing:
+        return rows
+    try:
+        with track_call("supabase", "select_document_chunks"):
+            resp = client.table("document_chunks").select("*").in_("chunk_id", missing).execute()
+    except Exception as exc:
+        logger.warning("Failed to load %d document chunks: %s", len(missing), exc)
+        return rows
+    fetched = [row for row in (getattr(resp, "data", None) or []) if row.get("chunk_id")]
+    chunk_cache.put_many(fetched)
+    rows.update((row["chunk_id"], row) for row in fetched)
+    return rows
+
+
+def build_context_chunk(
+    rank: int,
+    score: Any,
+    chunk_id: Optional[str],
+    db_row: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """One retrieval result, preferring the Supabase row over vector metadata."""
+    db_row = db_row or {}
+    metadata = metadata or {}
+    return {
+        "rank": rank,
+        "score": score,
+        "text": db_row.get("content") or metadata.get("content") or metadata.get("text", ""),
+        "source": db_row.get("source") or metadata.get("source", ""),
+        "source_type": db_row.get("source_type") or metadata.get("source_type", "document"),
+        "chunk_id": chunk_id,
+        "doc_id": db_row.get("doc_id") or metadata.get("doc_id"),
+        "section_id": db_row.get("section_id") or metadata.get("section_id"),
+        "section_title": db_row.get("section_title") or metadata.get("section_title"),
+        "section_path": db_row.get("section_path") or metadata.get("section_path"),
+        "image_paths": db_row.get("image_paths") or metadata.get("image_paths", []),
+        "block_ids": metadata.get("block_ids", []),
+        "start_seconds": _to_float(db_row.get("start_seconds") or metadata.get("start_seconds")),
+        "end_seconds": _to_float(db_row.get("end_seconds") or metadata.get("end_seconds")),
+        "video_url": db_row.get("video_url") or metadata.get("video_url"),
+        "txt_url": db_row.get("txt_url") or metadata.get("txt_url"),
+        "srt_url": db_row.get("srt_url") or metadata.get("srt_url"),
+        "vtt_url": db_row.get("vtt_url") or metadata.get("vtt_url"),
+    }
+
+
+def compact_citations(context_chunks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The stored form of a reply's citations: chunk ID, score and rank."""
+    return [
+        {key: chunk.get(key) for key in COMPACT_CITATION_KEYS}
+        for chunk in context_chunks
+        if isinstance(chunk, dict) and chunk.get("chunk_id")
+    ]
+
+
+def hydrate_citations(client: Any, citations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Full context chunks for stored citations (compact or legacy)."""
+    citations = [c for c in citations if isinstance(c, dict)]
+    compact_ids = [c.get("chunk_id") for c in citations if "text" not in c]
+    rows = fetch_chunks(client, compact_ids) if any(compact_ids) else {}
+    hydrated = []
+    for index, citation in enumerate(citations, start=1):
+        if "text" in citation:
+            hydrated.append(citation)
+            continue
+        chunk_id = citation.get("chunk_id")
+        hydrated.append(build_context_chunk(citation.get("rank") or index, citation.get("score"), chunk_id, rows.get(chunk_id)))
+    return hydrated
@@ -0,0 +1,356 @@
+"""
+Shared embedding model for several API worker processes.
+
+Every uvicorn / gunicorn worker normally loads its own copy of the
+sentence-transformer, so model memory grows with the number of workers.  This
+module runs the model once in a sidecar process that the workers call over a
+local socket:
+
+    python -m app.core.embedding_server            # sidecar, loads the model
+    EMBEDDING_BACKEND=remote uvicorn main:app ...  # workers, no model loaded
+
+``EmbeddingServer`` queues incoming requests from all connections and encodes
+them together: a batch is started as soon as the model is free and takes every
+request that is already waiting, plus any that arrive within
+``EMBEDDING_SERVER_BATCH_WAIT_MS``, up to ``EMBEDDING_SERVER_MAX_BATCH`` texts.
+Concurrent chat queries from different workers therefore share one forward
+pass instead of queueing behind each other.
+
+``RemoteEmbeddingModel`` is the client with the same interface as
+``EmbeddingModel`` (``load_model`` / ``encode`` / ``encode_query``).  It keeps
+one connection per thread.
+
+Wire format: each message is ``!II`` (header length, body length), a JSON
+header and a raw body.  Requests carry ``{"op": "encode", "texts": [...]}``
+and an empty body.  Responses carry ``{"ok": true, "shape": [n, dim]}`` and
+the float32 vectors as bytes, or ``{"ok": false, "error": "..."}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_LATENCY, track_call
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = struct.Struct("!II")
+_MAX_FRAME = 256 * 1024 * 1024
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """``("unix", path)`` or ``("tcp", (host, port))`` from an ``EMBEDDING_SERVER_ADDRESS`` value."""
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        return "tcp", (host or "127.0.0.1", int(port))
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    raise ValueError(f"Unsupported embedding server address {address!r}; use unix:/path or tcp://host:port")
+
+
+def _pack(header: Dict[str, Any], body: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode("utf-8")
+    return _PREFIX.pack(len(encoded), len(body)) + encoded + body
+
+
+def _check_sizes(header_len: int, body_len: int) -> None:
+    if header_len > _MAX_FRAME or body_len > _MAX_FRAME:
+        raise ConnectionError("Embedding server frame too large")
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class EmbeddingServer:
+    """Serves one embedding model to many clients, batching concurrent requests."""
+
+    def __init__(
+        self,
+        model: Any,
+        address: Optional[str] = None,
+        max_batch: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+    ) -> None:
+        self.model = model
+        self.address = address or settings.EMBEDDING_SERVER_ADDRESS
+        self.max_batch = max_batch or settings.EMBEDDING_SERVER_MAX_BATCH
+        self.batch_wait = (settings.EMBEDDING_SERVER_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms) / 1000.0
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "errors": 0, "encode_seconds": 0.0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+        # One encode at a time: the model is the shared resource being batched for.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-server")
+
+    async def start(self) -> str:
+        """Bind the socket and start batching; returns the bound address (resolves tcp port 0)."""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = await asyncio.start_unix_server(self._handle, path=target)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+            host, port = self._server.sockets[0].getsockname()[:2]
+            self.address = f"tcp://{host}:{port}"
+        logger.info(f"Embedding server listening on {self.address}")
+        return self.address
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+        kind, target = parse_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    prefix = await reader.readexactly(_PREFIX.size)
+                except asyncio.IncompleteReadError:
+                    break
+                header_len, body_len = _PREFIX.unpack(prefix)
+                _check_sizes(header_len, body_len)
+                header = json.loads(await reader.readexactly(header_len))
+                if body_len:
+                    await reader.readexactly(body_len)
+                writer.write(await self._respond(header))
+                await writer.drain()
+        except Exception as exc:
+            logger.warning(f"Embedding server connection failed: {exc}")
+        finally:
+            writer.close()
+
+    async def _respond(self, header: Dict[str, Any]) -> bytes:
+        op = header.get("op")
+        if op == "ping":
+            return _pack({"ok": True, "model": getattr(self.model, "model_name", None)})
+        if op == "stats":
+            return _pack({"ok": True, **self.stats})
+        if op != "encode":
+            return _pack({"ok": False, "error": f"unknown op {op!r}"})
+        texts = [str(text) for text in header.get("texts") or []]
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        try:
+            vectors = await future
+        except Exception as exc:
+            return _pack({"ok": False, "error": str(exc)})
+        return _pack({"ok": True, "shape": list(vectors.shape)}, vectors.tobytes())
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0][0])
+            deadline = loop.time() + self.batch_wait
+            while count < self.max_batch:
+                try:
+                    if self._queue.empty():
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                count += len(item[0])
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._encode, texts)
+            except Exception as exc:
+                logger.exception("Embedding batch failed")
+                self.stats["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.stats["encode_seconds"] += time.perf_counter() - started
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+            self.stats["texts"] += len(texts)
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, settings.EMBED_DIMENSION), dtype=np.float32)
+        return np.asarray(self.model.encode(texts), dtype=np.float32)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class RemoteEmbeddingModel:
+    """``EmbeddingModel`` look-alike that encodes on the shared embedding server."""
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        self.address = address or settings.EMBEDDING_SERVER_ADDRESS
+        self.timeout = timeout or settings.EMBEDDING_SERVER_TIMEOUT
+        self.model = None
+        self.model_name = f"remote:{self.address}"
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        kind, target = parse_address(self.address)
+        family = socket.AF_UNIX if kind == "unix" else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        if kind == "tcp":
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        payload = _pack(header)
+        # One retry on a fresh connection covers a server restart between calls:
+        # only for connection errors before any response byte arrived.  A
+        # timeout is raised at once, since resending would make an overloaded
+        # server encode the same texts twice.
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None)
+            response_started = False
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                sock.sendall(payload)
+                first = sock.recv(_PREFIX.size)
+                if not first:
+                    raise ConnectionError("Embedding server closed the connection")
+                response_started = True
+                prefix = first + self._recv(sock, _PREFIX.size - len(first))
+                header_len, body_len = _PREFIX.unpack(prefix)
+                _check_sizes(header_len, body_len)
+                response = json.loads(self._recv(sock, header_len))
+                body = self._recv(sock, body_len) if body_len else b""
+                break
+            except OSError as exc:
+                self._close()
+                retry = isinstance(exc, (ConnectionError, FileNotFoundError)) and not response_started
+                if attempt == 2 or not retry:
+                    raise RuntimeError(f"Embedding server at {self.address} unavailable: {exc}") from exc
+        if not response.get("ok"):
+            raise RuntimeError(f"Embedding server error: {response.get('error')}")
+        return response, body
+
+    @staticmethod
+    def _recv(sock: socket.socket, size: int) -> bytes:
+        chunks = bytearray()
+        while len(chunks) < size:
+            chunk = sock.recv(size - len(chunks))
+            if not chunk:
+                raise ConnectionError("Embedding server closed the connection")
+            chunks.extend(chunk)
+        return bytes(chunks)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with track_call("embedding_server", "encode"):
+            response, body = self._request({"op": "encode", "texts": list(texts)})
+        return np.frombuffer(body, dtype=np.float32).reshape(response["shape"])
+
+    def load_model(self):
+        """Check that the server is reachable (the model itself lives in the server)."""
+        self._request({"op": "ping"})
+
+    def server_stats(self) -> Dict[str, Any]:
+        response, _ = self._request({"op": "stats"})
+        response.pop("ok", None)
+        return response
+
+    def encode(self, texts: List[str], show_progress: bool = False) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = self._encode(texts)
+        EMBEDDING_LATENCY.labels("batch").observe(time.perf_counter() - started)
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        return vectors.tolist()
+
+    def encode_query(self, query: str) -> List[float]:
+        started = time.perf_counter()
+        vector = self._encode([query])[0]
+        EMBEDDING_LATENCY.labels("query").observe(time.perf_counter() - started)
+        return vector.tolist()
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve the embedding model to API workers over a local socket.")
+    parser.add_argument("--address", default=settings.EMBEDDING_SERVER_ADDRESS, help="unix:/path or tcp://host:port")
+    parser.add_argument("--max-batch", type=int, default=settings.EMBEDDING_SERVER_MAX_BATCH)
+    parser.add_argument("--batch-wait-ms", type=float, default=settings.EMBEDDING_SERVER_BATCH_WAIT_MS)
+    parser.add_argument(
+        "--backend",
+        choices=["sentence-transformers", "hashing"],
+        default="hashing" if settings.EMBEDDING_BACKEND == "hashing" else "sentence-transformers",
+        help="Model to serve (hashing is for offline tests).",
+    )
+    return parser
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    from app.core.embeddings import EmbeddingModel, HashingEmbeddingModel
+
+    model = HashingEmbeddingModel() if args.backend == "hashing" else EmbeddingModel()
+    model.load_model()
+    server = EmbeddingServer(model, args.address, args.max_batch, args.batch_wait_ms)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    try:
+        asyncio.run(_serve(_build_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,56 @@
-from typing import List, Optional
-from sentence_transformers import SentenceTransformer
+import hashlib
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
 import logging
+import numpy as np
 from app.config import settings
+from app.core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_LATENCY
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+# Loaded weights shared by every EmbeddingModel in the process (the chat,
+# ingest and RAG modules each hold their own instance).
+_loaded_models: Dict[str, "SentenceTransformer"] = {}
+_load_lock = threading.Lock()
+
+
 class EmbeddingModel:
     """Sentence transformer embedding model management."""
     
     def __init__(self):
-        self.model: Optional[SentenceTransformer] = None
+        self.model: Optional["SentenceTransformer"] = None
         self.model_name = settings.EMBED_MODEL_NAME
     
     def load_model(self):
-        """Load the embedding model."""
-        if self.model is None:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            # local_files_only=True skips the HuggingFace Hub network check.
-            # Without it, huggingface_hub makes a HEAD request that fails with
-            # an SSL certificate error on macOS, closes its httpx client during
-            # error handling, then tries to reuse that closed client on retry →
-            # "Cannot send a request, as the client has been closed."
-            try:
-                self.model = SentenceTransformer(self.model_name, local_files_only=True)
-            except Exception:
-                # First-time use: model not yet in local cache, allow the download.
-                self.model = SentenceTransformer(self.model_name)
-            logger.info("Embedding model loaded successfully")
+        """Load the embedding model (once per process, shared across instances)."""
+        if self.model is not None:
+            return
+        with _load_lock:
+            model = _loaded_models.get(self.model_name)
+            if model is None:
+                logger.info(f"Loading embedding model: {self.model_name}")
+                # Imported here rather than at module load: sentence_transformers
+                # pulls in PyTorch, transformers and scikit-learn (several seconds).
+                from sentence_transformers import SentenceTransformer
+
+                # local_files_only=True skips the HuggingFace Hub network check.
+                # Without it, huggingface_hub makes a HEAD request that fails with
+                # an SSL certificate error on macOS, closes its httpx client during
+                # error handling, then tries to reuse that closed client on retry →
+                # "Cannot send a request, as the client has been closed."
+                try:
+                    model = SentenceTransformer(self.model_name, local_files_only=True)
+                except Exception:
+                    # First-time use: model not yet in local cache, allow the download.
+                    model = SentenceTransformer(self.model_name)
+                _loaded_models[self.model_name] = model
+                logger.info("Embedding model loaded successfully")
+            self.model = model
     
     def encode(self, texts: List[str], show_progress: bool = False) -> List[List[float]]:
         """Encode texts into embeddings."""
@@ -34,7 +58,10 @@ class EmbeddingModel:
             self.load_model()
         
         try:
+            started = time.perf_counter()
             embeddings = self.model.encode(texts, show_progress_bar=show_progress)
+            EMBEDDING_LATENCY.labels("batch").observe(time.perf_counter() - started)
+            EMBEDDING_BATCH_SIZE.observe(len(texts))
             return embeddings.tolist()
         except Exception as e:
             logger.error(f"Failed to encode texts: {e}")
@@ -46,8 +73,59 @@ class EmbeddingModel:
             self.load_model()
         
         try:
+            started = time.perf_counter()
             embedding = self.model.encode([query])[0]
+            EMBEDDING_LATENCY.labels("query").observe(time.perf_counter() - started)
             return embedding.tolist()
         except Exception as e:
             logger.error(f"Failed to encode query: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+class HashingEmbeddingModel:
+    """
+    Deterministic bag-of-words embedder with the same interface as EmbeddingModel.
+
+    Tokens are hashed into ``EMBED_DIMENSION`` signed buckets and the result is
+    L2-normalised, so texts sharing words get high cosine similarity.  Used with
+    ``EMBEDDING_BACKEND=hashing`` for offline tests and benchmarks; it is not a
+    substitute for the sentence-transformer model in production.
+    """
+
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dimension: Optional[int] = None):
+        self.model = None
+        self.model_name = "hashing"
+        self.dimension = dimension or settings.EMBED_DIMENSION
+
+    def load_model(self):
+        return None
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in self._TOKEN_RE.findall((text or "").lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def encode(self, texts: List[str], show_progress: bool = False) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def encode_query(self, query: str) -> List[float]:
+        return self._embed(query)
+
+
+def create_embedding_model():
+    """Build the configured embedder (sentence-transformers, the shared server, or hashing for offline runs)."""
+    if settings.EMBEDDING_BACKEND == "hashing":
+        return HashingEmbeddingModel()
+    if settings.EMBEDDING_BACKEND == "remote":
+        from app.core.embedding_server import RemoteEmbeddingModel
+
+        return RemoteEmbeddingModel()
+    return EmbeddingModel()
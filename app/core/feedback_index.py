@@ -0,0 +1,220 @@
+"""
+In-process index of the Phase 2 feedback events (``chunk_feedback_events``).
+
+The query-aware signal of a chunk is Σ rating × cosine similarity over the
+past events on that chunk whose stored query embedding is at least
+``FEEDBACK_SIM_THRESHOLD`` similar to the current question.  The
+``get_query_aware_chunk_scores`` Postgres function computes it by scanning
+the events table with pgvector; ``FeedbackEventIndex`` keeps the same events
+as a NumPy matrix of normalized embeddings with row positions grouped by
+``chunk_id``, so the sum for the retrieved chunks is one gather and one dot
+product per question, and no vector is sent over the wire.
+
+``FeedbackService`` applies events recorded or deleted on this worker at
+once; the whole table is reloaded every ``FEEDBACK_EVENTS_RESYNC_SECONDS``
+(in a background thread, serving the previous copy meanwhile) to pick up
+votes handled by other workers.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import record_cache, track_call
+from app.core.supabase_service import supabase
+
+logger = logging.getLogger(__name__)
+
+# Rows per request when loading chunk_feedback_events (PostgREST's default cap).
+_PAGE_SIZE = 1000
+
+# message_id -> [(chunk_id, rating, normalized embedding)]
+Events = Dict[str, List[Tuple[str, int, np.ndarray]]]
+
+
+def _normalized(embedding: Any) -> Optional[np.ndarray]:
+    if isinstance(embedding, str):
+        # pgvector columns come back from PostgREST as "[0.1,0.2,...]".
+        embedding = json.loads(embedding)
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+def _load_all_events() -> List[Dict[str, Any]]:
+    """Every row of ``chunk_feedback_events`` the index needs."""
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        with track_call("supabase", "select_chunk_feedback_events"):
+            res = (
+                supabase.table("chunk_feedback_events")
+                .select("id, message_id, chunk_id, rating, query_embedding")
+                .order("id")
+                .range(start, start + _PAGE_SIZE - 1)
+                .execute()
+            )
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        start += _PAGE_SIZE
+
+
+def _group(rows: Iterable[Dict[str, Any]]) -> Events:
+    events: Events = {}
+    for row in rows:
+        vector = _normalized(row.get("query_embedding"))
+        if vector is None or not row.get("chunk_id"):
+            continue
+        events.setdefault(str(row.get("message_id")), []).append((row["chunk_id"], int(row.get("rating") or 0), vector))
+    return events
+
+
+class FeedbackEventIndex:
+    """Feedback event embeddings grouped by chunk, for local query-aware scoring."""
+
+    def __init__(self, resync_seconds: float, loader: Callable[[], List[Dict[str, Any]]] = _load_all_events) -> None:
+        self.resync_seconds = resync_seconds
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._events: Optional[Events] = None
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._loading = False
+        # Changes made on this worker while a load runs, replayed onto its result.
+        self._pending: List[Tuple[str, Optional[list]]] = []
+
+    # ── Scoring ──────────────────────────────────────────────────────────────
+
+    def scores(self, query_embedding: Any, chunk_ids: Iterable[str], sim_threshold: float) -> Optional[Dict[str, float]]:
+        """
+        {chunk_id: Σ rating × similarity} over events at or above
+        ``sim_threshold``, for chunks with at least one such event — the same
+        result as ``get_query_aware_chunk_scores``.  None if the events could
+        not be loaded (the caller then uses the RPC).
+        """
+        if self._events is None:
+            if not self._load_now():
+                return None
+        elif time.monotonic() - self._loaded_at >= self.resync_seconds:
+            self._resync_in_background()
+        record_cache("feedback_events", hit=True)
+
+        query = _normalized(query_embedding)
+        matrix, ratings, rows_by_chunk = self._matrix()
+        wanted = [cid for cid in dict.fromkeys(chunk_ids) if cid in rows_by_chunk]
+        if query is None or not wanted:
+            return {}
+
+        segments = [rows_by_chunk[cid] for cid in wanted]
+        rows = np.concatenate(segments)
+        similarity = matrix[rows] @ query
+        qualifies = similarity >= sim_threshold
+        weighted = np.where(qualifies, ratings[rows] * similarity, 0.0)
+        starts = np.cumsum([0] + [len(s) for s in segments[:-1]])
+        totals = np.add.reduceat(weighted, starts)
+        counts = np.add.reduceat(qualifies.astype(np.int32), starts)
+        return {cid: float(total) for cid, total, count in zip(wanted, totals, counts) if count}
+
+    def _matrix(self) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        with self._lock:
+            if self._arrays is None:
+                self._arrays = self._build(self._events or {})
+            return self._arrays
+
+    @staticmethod
+    def _build(events: Events) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        flat = [event for message_events in events.values() for event in message_events]
+        if not flat:
+            return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.float32), {}
+        matrix = np.stack([vector for _, _, vector in flat])
+        ratings = np.asarray([rating for _, rating, _ in flat], dtype=np.float32)
+        positions: Dict[str, List[int]] = {}
+        for row, (chunk_id, _, _) in enumerate(flat):
+            positions.setdefault(chunk_id, []).append(row)
+        return matrix, ratings, {cid: np.asarray(rows, dtype=np.int64) for cid, rows in positions.items()}
+
+    # ── Updates from this worker ─────────────────────────────────────────────
+
+    def set_message_events(self, message_id: str, chunk_ids: List[str], rating: int, query_embedding: Any) -> None:
+        """Replace the events of one rated message (as ``record_feedback_events`` does)."""
+        vector = _normalized(query_embedding)
+        events = [(cid, int(rating), vector) for cid in chunk_ids if cid] if vector is not None else []
+        self._apply(str(message_id), events)
+
+    def remove_message(self, message_id: str) -> None:
+        self._apply(str(message_id), None)
+
+    def _apply(self, message_id: str, events: Optional[list]) -> None:
+        with self._lock:
+            if self._loading:
+                self._pending.append((message_id, events))
+            if self._events is None:
+                return
+            self._events = dict(self._events)
+            if events:
+                self._events[message_id] = events
+            else:
+                self._events.pop(message_id, None)
+            self._arrays = None
+
+    def invalidate(self) -> None:
+        """Forget the index; the next lookup reloads every event."""
+        with self._lock:
+            self._events, self._arrays = None, None
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def _load_now(self) -> bool:
+        with self._load_lock:
+            if self._events is not None:
+                return True
+            record_cache("feedback_events", hit=False)
+            return self._reload()
+
+    def _reload(self) -> bool:
+        with self._lock:
+            self._loading, self._pending = True, []
+        try:
+            events = _group(self._loader())
+        except Exception as exc:
+            logger.warning("Failed to load feedback events index: %s", exc)
+            with self._lock:
+                self._loading, self._pending = False, []
+            return False
+        with self._lock:
+            for message_id, pending in self._pending:
+                if pending:
+                    events[message_id] = pending
+                else:
+                    events.pop(message_id, None)
+            self._loading, self._pending = False, []
+            self._events, self._arrays, self._loaded_at = events, None, time.monotonic()
+        return True
+
+    def _resync_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self._reload()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="feedback-events-resync", daemon=True).start()
+
+    def __len__(self) -> int:
+        return sum(len(events) for events in (self._events or {}).values())
@@ -0,0 +1,204 @@
+"""
+Write-behind queue for the Phase 2 feedback events (``chunk_feedback_events``).
+
+Every vote used to sync the events of its message in its own background
+task: delete the old events, load the assistant message, load the question
+before it, encode the question and insert the new rows – four round trips
+and one model call per click.  ``submit_feedback`` now only records which
+message was rated; a worker thread flushes the queue every
+``FEEDBACK_QUEUE_FLUSH_SECONDS`` (sooner once ``FEEDBACK_QUEUE_MAX_BATCH``
+messages are waiting), and each flush handles the whole batch with
+
+* one ``feedback`` query for the current rating of every queued message,
+* one delete of their old events,
+* one ``get_feedback_event_sources`` RPC for the citations and questions of
+  the rated ones (per-message queries if the RPC is not deployed yet),
+* one ``encode`` call for the distinct questions, and
+* one insert of the new rows.
+
+The rating is read when the batch is written, not taken from the request:
+every worker has its own queue, and two workers flushing votes on the same
+message in the wrong order must still leave the events of the rating that
+``submit_message_feedback`` stored last.  Votes on the same message between
+two flushes coalesce, so toggling a thumb several times costs a single
+sync.  The queue is flushed on
+shutdown; votes still queued when a worker is killed only lose their
+query-aware events (the Phase 1 scores are written synchronously).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.embeddings import create_embedding_model
+from app.core.feedback_service import FeedbackService
+from app.core.metrics import track_call
+from app.core.supabase_service import supabase
+
+logger = logging.getLogger(__name__)
+
+
+def _citation_chunk_ids(citations: Any) -> List[str]:
+    # Compact and legacy citations both carry chunk_id; no text is needed here.
+    return [c["chunk_id"] for c in citations or [] if isinstance(c, dict) and c.get("chunk_id")]
+
+
+def _load_sources(message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """{message_id: {"chunk_ids", "query"}} for the rated assistant messages."""
+    try:
+        with track_call("supabase", "rpc_get_feedback_event_sources"):
+            res = supabase.rpc("get_feedback_event_sources", {"p_message_ids": message_ids}).execute()
+        rows = res.data or []
+    except Exception as exc:
+        logger.warning("get_feedback_event_sources RPC failed, querying per message: %s", exc)
+        rows = [row for row in map(_load_source, message_ids) if row]
+    return {
+        str(row["message_id"]): {"chunk_ids": _citation_chunk_ids(row.get("citations")), "query": row.get("query")}
+        for row in rows
+    }
+
+
+def _load_ratings(message_ids: List[str]) -> Dict[str, int]:
+    """Current rating of each message (messages whose vote was cleared are absent)."""
+    with track_call("supabase", "select_feedback_ratings"):
+        res = supabase.table("feedback").select("message_id, score").in_("message_id", message_ids).execute()
+    return {str(row["message_id"]): row["score"] for row in res.data or [] if row.get("score") is not None}
+
+
+def _load_source(message_id: str) -> Optional[Dict[str, Any]]:
+    """One row of ``get_feedback_event_sources`` with plain table queries."""
+    asst_res = (
+        supabase.table("chat_messages")
+        .select("session_id, created_at, metadata")
+        .eq("id", message_id)
+        .eq("role", "assistant")
+        .execute()
+    )
+    if not asst_res.data:
+        return None
+    asst_row = asst_res.data[0]
+
+    # The most recent user message sent *before* this reply
+    user_msg_res = (
+        supabase.table("chat_messages")
+        .select("content")
+        .eq("session_id", asst_row["session_id"])
+        .eq("role", "user")
+        .lt("created_at", asst_row["created_at"])
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    user_rows = user_msg_res.data or []
+    return {
+        "message_id": message_id,
+        "citations": (asst_row.get("metadata") or {}).get("citations"),
+        "query": user_rows[0]["content"] if user_rows else None,
+    }
+
+
+class FeedbackEventQueue:
+    """Rated messages whose ``chunk_feedback_events`` are re-synced in batches."""
+
+    def __init__(
+        self,
+        flush_seconds: float,
+        max_batch: int,
+        feedback_service: Optional[FeedbackService] = None,
+        embedding_model_factory: Callable[[], Any] = create_embedding_model,
+    ) -> None:
+        self.flush_seconds = flush_seconds
+        self.max_batch = max(1, max_batch)
+        self.feedback_service = feedback_service or FeedbackService()
+        self._embedding_model_factory = embedding_model_factory
+        self._embedding_model = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        # Insertion-ordered set of message IDs.
+        self._pending: Dict[str, None] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def submit(self, message_id: str) -> None:
+        """Queue a message whose rating changed; the flush reads its current rating."""
+        with self._lock:
+            self._pending[message_id] = None
+            full = len(self._pending) >= self.max_batch
+            if self.flush_seconds > 0 and self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="feedback-events-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Sync every queued message now; returns how many were processed."""
+        with self._flush_lock:
+            processed = 0
+            while True:
+                with self._lock:
+                    batch = list(self._pending)[: self.max_batch]
+                    for message_id in batch:
+                        del self._pending[message_id]
+                if not batch:
+                    return processed
+                try:
+                    self._sync(batch)
+                except Exception as exc:
+                    logger.warning("Phase 2 feedback event flush failed (non-fatal): %s", exc)
+                processed += len(batch)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the writer thread and flush what is still queued."""
+        with self._lock:
+            self._stopping = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _sync(self, batch: List[str]) -> None:
+        ratings = _load_ratings(batch)
+        # Stale events go first, for changed and cleared votes alike; if the
+        # delete fails, nothing is inserted on top (no duplicate events).
+        self.feedback_service.delete_feedback_events(batch)
+
+        rated = [message_id for message_id in batch if message_id in ratings]
+        if not rated:
+            return
+        sources = _load_sources(rated)
+        ready = [mid for mid in rated if mid in sources and sources[mid]["chunk_ids"] and sources[mid]["query"]]
+        if not ready:
+            return
+
+        # The slow CPU step: one batched call for the distinct questions.
+        queries = list(dict.fromkeys(sources[mid]["query"] for mid in ready))
+        if self._embedding_model is None:
+            self._embedding_model = self._embedding_model_factory()
+        embeddings = dict(zip(queries, self._embedding_model.encode(queries)))
+
+        self.feedback_service.record_feedback_events_batch([
+            {
+                "message_id": mid,
+                "chunk_ids": sources[mid]["chunk_ids"],
+                "rating": ratings[mid],
+                "query_embedding": embeddings[sources[mid]["query"]],
+            }
+            for mid in ready
+        ])
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+feedback_queue = FeedbackEventQueue(settings.FEEDBACK_QUEUE_FLUSH_SECONDS, settings.FEEDBACK_QUEUE_MAX_BATCH)
@@ -31,19 +31,149 @@ Combined adjusted score:
 
 The total ceiling remains tight:
     (1 − α_global − α_query, 1 + α_global + α_query) = (0.55, 1.45) by default.
+
+Phase 1 scores are read from a per-process snapshot of
+``chunk_feedback_scores`` (see ``ChunkScoreSnapshot``) and Phase 2 scores are
+computed from an in-process index of the feedback events
+(``app/core/feedback_index.py``), so re-ranking a retrieval needs no
+Supabase round trip.
 """
 
 from __future__ import annotations
 
 import logging
 import math
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from app.core.supabase_service import supabase
 from app.config import settings
+from app.core.feedback_index import FeedbackEventIndex
+from app.core.metrics import record_cache, track_call
 
 logger = logging.getLogger(__name__)
 
+# Rows per request when loading the full chunk_feedback_scores table
+# (PostgREST caps a response at 1000 rows by default).
+_SNAPSHOT_PAGE_SIZE = 1000
+
+
+def _load_all_chunk_scores() -> Dict[str, int]:
+    """Every row of ``chunk_feedback_scores`` as {chunk_id: net_score}."""
+    scores: Dict[str, int] = {}
+    start = 0
+    while True:
+        with track_call("supabase", "select_chunk_feedback_scores_snapshot"):
+            res = (
+                supabase.table("chunk_feedback_scores")
+                .select("chunk_id, net_score")
+                .order("chunk_id")
+                .range(start, start + _SNAPSHOT_PAGE_SIZE - 1)
+                .execute()
+            )
+        rows = res.data or []
+        scores.update((row["chunk_id"], row["net_score"]) for row in rows)
+        if len(rows) < _SNAPSHOT_PAGE_SIZE:
+            return scores
+        start += _SNAPSHOT_PAGE_SIZE
+
+
+class ChunkScoreSnapshot:
+    """
+    Per-process copy of the Phase 1 net scores of every voted chunk.
+
+    Votes are rare next to retrievals and the table only holds chunks that
+    were ever rated, so the whole table is kept in memory.  The first lookup
+    loads it; after ``refresh_seconds`` a background thread reloads it while
+    lookups keep using the previous copy.  Feedback submitted on this worker
+    is applied at once through ``update``; votes from other workers show up
+    with the next refresh.
+    """
+
+    def __init__(self, refresh_seconds: float, loader: Callable[[], Dict[str, int]] = _load_all_chunk_scores) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._scores: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._loading = False
+        # Scores applied on this worker while a load runs, replayed onto its result.
+        self._pending: Dict[str, int] = {}
+
+    def lookup(self, chunk_ids: Iterable[str]) -> Optional[Dict[str, int]]:
+        """{chunk_id: net_score} for voted chunks, or None if the table could not be loaded."""
+        scores = self._scores
+        if scores is None:
+            scores = self._load_now()
+            if scores is None:
+                return None
+        elif time.monotonic() - self._loaded_at >= self.refresh_seconds:
+            self._refresh_in_background()
+        record_cache("feedback_scores", hit=True)
+        return {cid: scores[cid] for cid in chunk_ids if cid in scores}
+
+    def update(self, scores: Dict[str, int]) -> None:
+        """Apply fresh net scores for some chunks (e.g. right after a vote)."""
+        with self._lock:
+            if self._loading:
+                self._pending.update(scores)
+            if self._scores is not None:
+                self._scores = {**self._scores, **scores}
+
+    def invalidate(self) -> None:
+        """Forget the snapshot; the next lookup reloads the table."""
+        with self._lock:
+            self._scores = None
+
+    def _load_now(self) -> Optional[Dict[str, int]]:
+        # One thread loads; the others wait for its result instead of loading too.
+        with self._load_lock:
+            if self._scores is not None:
+                return self._scores
+            record_cache("feedback_scores", hit=False)
+            return self._reload()
+
+    def _reload(self) -> Optional[Dict[str, int]]:
+        with self._lock:
+            self._loading, self._pending = True, {}
+        try:
+            scores = self._loader()
+        except Exception as exc:
+            logger.warning("Failed to load chunk feedback scores snapshot: %s", exc)
+            with self._lock:
+                self._loading, self._pending = False, {}
+            return None
+        with self._lock:
+            # The query may predate votes applied meanwhile; keep those.
+            scores = {**scores, **self._pending}
+            self._loading, self._pending = False, {}
+            self._scores, self._loaded_at = scores, time.monotonic()
+        return scores
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self._reload()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="feedback-scores-refresh", daemon=True).start()
+
+
+score_snapshot = ChunkScoreSnapshot(settings.FEEDBACK_SCORES_REFRESH_SECONDS)
+event_index = FeedbackEventIndex(settings.FEEDBACK_EVENTS_RESYNC_SECONDS)
+
 
 class FeedbackService:
     """Manages chunk feedback scores and applies them to RAG re-ranking."""
@@ -101,25 +231,50 @@ class FeedbackService:
         """
         Return {chunk_id: net_score} for a batch of chunks.
         Chunks with no feedback record are absent from the result (treated
-        as net_score=0 by the caller).  Fails open — RAG continues even if
-        this query errors.
+        as net_score=0 by the caller).  Served from ``score_snapshot`` unless
+        ``FEEDBACK_SCORES_REFRESH_SECONDS`` is 0 or the snapshot can't load.
+        Fails open — RAG continues even if this query errors.
         """
         if not chunk_ids:
             return {}
+        if settings.FEEDBACK_SCORES_REFRESH_SECONDS > 0:
+            scores = score_snapshot.lookup(chunk_ids)
+            if scores is not None:
+                return scores
         try:
+            return self._fetch_chunk_scores(chunk_ids)
+        except Exception as exc:
+            logger.error("Failed to fetch chunk feedback scores: %s", exc)
+            return {}  # fail-open
+
+    def refresh_chunk_scores(self, chunk_ids: List[str]) -> None:
+        """
+        Re-read the net scores of ``chunk_ids`` into the snapshot, so a vote
+        submitted on this worker affects the next retrieval immediately.
+        """
+        if not chunk_ids:
+            return
+        try:
+            scores = self._fetch_chunk_scores(chunk_ids)
+        except Exception as exc:
+            # The periodic refresh picks the vote up instead.
+            logger.warning("Failed to refresh chunk feedback scores: %s", exc)
+            return
+        score_snapshot.update({cid: scores.get(cid, 0) for cid in chunk_ids})
+
+    @staticmethod
+    def _fetch_chunk_scores(chunk_ids: List[str]) -> Dict[str, int]:
+        with track_call("supabase", "select_chunk_feedback_scores"):
             res = (
                 supabase.table("chunk_feedback_scores")
                 .select("chunk_id, net_score")
                 .in_("chunk_id", chunk_ids)
                 .execute()
             )
-            return {
-                row["chunk_id"]: row["net_score"]
-                for row in (res.data or [])
-            }
-        except Exception as exc:
-            logger.error("Failed to fetch chunk feedback scores: %s", exc)
-            return {}  # fail-open
+        return {
+            row["chunk_id"]: row["net_score"]
+            for row in (res.data or [])
+        }
 
     # ──────────────────────────────────────────────────────────────────────────
     # Phase 2 – Query-aware event recording  (called from chat.py on feedback)
@@ -149,34 +304,67 @@ class FeedbackService:
         """
         if not chunk_ids or not query_embedding:
             return
+        self.record_feedback_events_batch([
+            {"message_id": message_id, "chunk_ids": chunk_ids, "rating": rating, "query_embedding": query_embedding}
+        ])
 
+    def record_feedback_events_batch(self, events: List[dict]) -> None:
+        """
+        ``record_feedback_events`` for several messages with one insert.
+
+        Each entry has ``message_id``, ``chunk_ids``, ``rating`` and
+        ``query_embedding``; entries without chunks or embedding are skipped.
+        """
+        events = [e for e in events if e.get("chunk_ids") and e.get("query_embedding")]
         rows = [
             {
                 "chunk_id":        cid,
-                "message_id":      message_id,
-                "rating":          rating,
+                "message_id":      event["message_id"],
+                "rating":          event["rating"],
                 # Supabase-py accepts a plain list for VECTOR columns
-                "query_embedding": query_embedding,
+                "query_embedding": event["query_embedding"],
             }
-            for cid in chunk_ids
+            for event in events
+            for cid in event["chunk_ids"]
         ]
+        if not rows:
+            return
 
         try:
-            supabase.table("chunk_feedback_events").insert(rows).execute()
+            with track_call("supabase", "insert_chunk_feedback_events"):
+                supabase.table("chunk_feedback_events").insert(rows).execute()
+            for event in events:
+                event_index.set_message_events(
+                    event["message_id"], event["chunk_ids"], event["rating"], event["query_embedding"]
+                )
             logger.info(
-                "Recorded %d query-aware feedback event(s) for message %s",
+                "Recorded %d query-aware feedback event(s) for %d message(s)",
                 len(rows),
-                message_id,
+                len(events),
             )
         except Exception as exc:
             # Fail-open: Phase 2 events are best-effort; don't block the
             # feedback response if the events table isn't ready yet.
             logger.error(
-                "Failed to record feedback events for message %s: %s",
-                message_id,
+                "Failed to record feedback events for %d message(s): %s",
+                len(events),
                 exc,
             )
 
+    def delete_feedback_events(self, message_ids: List[str]) -> None:
+        """
+        Delete every ``chunk_feedback_events`` row of the given messages
+        (before their events are re-recorded, or when their rating is
+        cleared).  Raises on failure so the caller does not record duplicates
+        on top.
+        """
+        if not message_ids:
+            return
+        with track_call("supabase", "delete_chunk_feedback_events"):
+            supabase.table("chunk_feedback_events").delete().in_("message_id", list(message_ids)).execute()
+        for message_id in message_ids:
+            event_index.remove_message(message_id)
+
     # ──────────────────────────────────────────────────────────────────────────
     # Phase 2 – Query-aware score retrieval  (called from RAGPipeline)
     # ──────────────────────────────────────────────────────────────────────────
@@ -188,8 +376,10 @@ class FeedbackService:
         sim_threshold: Optional[float] = None,
     ) -> Dict[str, float]:
         """
-        Call the ``get_query_aware_chunk_scores`` Postgres RPC and return
-        {chunk_id: weighted_score} for chunks that have qualifying past events.
+        Return {chunk_id: weighted_score} for chunks that have qualifying
+        past events, from the local ``event_index`` when
+        ``FEEDBACK_LOCAL_INDEX`` is on (and it loaded), otherwise from the
+        ``get_query_aware_chunk_scores`` Postgres RPC.
 
         The weighted_score is the sum of (rating × cosine_similarity) for all
         past feedback events whose stored query is at least ``sim_threshold``
@@ -203,15 +393,25 @@ class FeedbackService:
         if sim_threshold is None:
             sim_threshold = settings.FEEDBACK_SIM_THRESHOLD
 
+        if settings.FEEDBACK_LOCAL_INDEX:
+            try:
+                scores = event_index.scores(query_embedding, chunk_ids, sim_threshold)
+            except Exception as exc:
+                logger.warning("Local feedback event index failed, using the RPC: %s", exc)
+                scores = None
+            if scores is not None:
+                return scores
+
         try:
-            res = supabase.rpc(
-                "get_query_aware_chunk_scores",
-                {
-                    "p_query_emb":     query_embedding,
-                    "p_chunk_ids":     chunk_ids,
-                    "p_sim_threshold": sim_threshold,
-                },
-            ).execute()
+            with track_call("supabase", "rpc_get_query_aware_chunk_scores"):
+                res = supabase.rpc(
+                    "get_query_aware_chunk_scores",
+                    {
+                        "p_query_emb":     query_embedding,
+                        "p_chunk_ids":     chunk_ids,
+                        "p_sim_threshold": sim_threshold,
+                    },
+                ).execute()
 
             return {
                 row["chunk_id"]: float(row["weighted_score"])
@@ -231,7 +431,59 @@ class FeedbackService:
     # ──────────────────────────────────────────────────────────────────────────
 
     @staticmethod
+    def rerank_order(
+        scores: Sequence[Optional[float]],
+        chunk_ids: Sequence[Optional[str]],
+        feedback_scores: Dict[str, int],
+        query_aware_scores: Optional[Dict[str, float]] = None,
+        alpha: Optional[float] = None,
+        scale: Optional[float] = None,
+        alpha_query: Optional[float] = None,
+        scale_query: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized core of ``rerank`` for candidates given as parallel
+        sequences of Pinecone scores and chunk IDs.
+
+        Returns ``(order, adjusted)``: ``adjusted[i]`` is candidate i's
+        adjusted score and ``order`` lists candidate indices by adjusted score,
+        descending, with ties kept in input order (as ``sorted`` does).
+        """
+        if alpha is None:
+            alpha = settings.FEEDBACK_ALPHA
+        if scale is None:
+            scale = settings.FEEDBACK_SCALE
+        if alpha_query is None:
+            alpha_query = settings.FEEDBACK_ALPHA_QUERY
+        if scale_query is None:
+            scale_query = settings.FEEDBACK_SCALE_QUERY
+
+        qa_scores: Dict[str, float] = query_aware_scores or {}
+        base = np.array([score or 0.0 for score in scores], dtype=np.float64)
+
+        # tanh per candidate with math.tanh, not np.tanh: the boosts are then
+        # bit-identical to the scalar formula and never reorder ties.
+        # Phase 1: global vote signal
+        global_boost = np.zeros_like(base)
+        if scale:
+            global_boost[:] = [
+                alpha * math.tanh(feedback_scores.get(cid, 0) / scale) if cid else 0.0 for cid in chunk_ids
+            ]
+
+        # Phase 2: query-aware signal (0 if Phase 2 not deployed)
+        query_boost = np.zeros_like(base)
+        if scale_query and qa_scores:
+            for i, cid in enumerate(chunk_ids):
+                query_weighted = qa_scores.get(cid, 0.0) if cid else 0.0
+                if query_weighted != 0.0:
+                    query_boost[i] = alpha_query * math.tanh(query_weighted / scale_query)
+
+        adjusted = base * (1.0 + global_boost + query_boost)
+        return np.argsort(-adjusted, kind="stable"), adjusted
+
+    @classmethod
     def rerank(
+        cls,
         context_chunks: List[dict],
         feedback_scores: Dict[str, int],
         query_aware_scores: Optional[Dict[str, float]] = None,
@@ -269,42 +521,22 @@ class FeedbackService:
         -------
         A new list sorted by adjusted_score descending with updated integer ranks.
         """
-        if alpha is None:
-            alpha = settings.FEEDBACK_ALPHA
-        if scale is None:
-            scale = settings.FEEDBACK_SCALE
-        if alpha_query is None:
-            alpha_query = settings.FEEDBACK_ALPHA_QUERY
-        if scale_query is None:
-            scale_query = settings.FEEDBACK_SCALE_QUERY
-
-        qa_scores: Dict[str, float] = query_aware_scores or {}
-
-        for chunk in context_chunks:
-            cid  = chunk.get("chunk_id")
-            base = chunk.get("score") or 0.0
-
-            # Phase 1: global vote signal
-            global_net = feedback_scores.get(cid, 0) if cid else 0
-            global_boost = alpha * math.tanh(global_net / scale) if scale else 0.0
-
-            # Phase 2: query-aware signal (0 if Phase 2 not deployed)
-            query_weighted = qa_scores.get(cid, 0.0) if cid else 0.0
-            query_boost = (
-                alpha_query * math.tanh(query_weighted / scale_query)
-                if scale_query and query_weighted != 0.0
-                else 0.0
-            )
-
-            chunk["adjusted_score"] = base * (1.0 + global_boost + query_boost)
-
-        reranked = sorted(
-            context_chunks,
-            key=lambda c: c.get("adjusted_score", 0.0),
-            reverse=True,
+        order, adjusted = cls.rerank_order(
+            [chunk.get("score") for chunk in context_chunks],
+            [chunk.get("chunk_id") for chunk in context_chunks],
+            feedback_scores,
+            query_aware_scores,
+            alpha=alpha,
+            scale=scale,
+            alpha_query=alpha_query,
+            scale_query=scale_query,
         )
+        for chunk, value in zip(context_chunks, adjusted.tolist()):
+            chunk["adjusted_score"] = value
 
+        reranked = [context_chunks[i] for i in order.tolist()]
         for i, chunk in enumerate(reranked, start=1):
             chunk["rank"] = i
 
         return reranked
+
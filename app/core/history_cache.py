@@ -0,0 +1,79 @@
+"""
+Per-worker cache of each chat session's recent messages.
+
+``send_message`` passes the last few messages of a session to the LLM.  The
+worker that handled the previous turn already knows them, so it keeps them
+here together with the session's ``history_version`` – a counter that a
+trigger on ``chat_messages`` bumps on every insert, update and delete.  The
+``begin_chat_turn`` RPC compares the version the worker knows with the one
+in the database and only returns the history when they differ, so a turn
+handled by another worker (or any other change to the session) can never be
+answered from stale history.
+
+Entries are replaced on every turn, extended when the assistant reply is
+saved, and dropped when a session is renamed or deleted.  The least recently
+used sessions are evicted beyond ``CHAT_HISTORY_CACHE_SESSIONS``.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+History = List[Dict[str, Any]]
+
+
+class SessionHistoryCache:
+    """LRU of ``session_id -> (history_version, messages)``."""
+
+    def __init__(self, max_sessions: int) -> None:
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, History]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Tuple[int, History]]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                self._entries.move_to_end(session_id)
+            return entry
+
+    def put(self, session_id: str, version: int, history: History) -> None:
+        if self.max_sessions <= 0:
+            return
+        with self._lock:
+            self._entries[session_id] = (version, list(history))
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+
+    def append(self, session_id: str, expected_version: int, message: Dict[str, Any], limit: int) -> None:
+        """Add a message this worker just saved, if the entry is still at ``expected_version``.
+
+        The insert bumped the version by one; an entry at any other version
+        was replaced by a newer turn meanwhile and is dropped instead.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            if entry[0] != expected_version:
+                del self._entries[session_id]
+                return
+            self._entries[session_id] = (expected_version + 1, (entry[1] + [message])[-limit:])
+
+    def invalidate(self, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+history_cache = SessionHistoryCache(settings.CHAT_HISTORY_CACHE_SESSIONS)
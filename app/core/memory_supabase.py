@@ -0,0 +1,747 @@
+"""
+In-memory stand-in for the Supabase client (``SUPABASE_BACKEND=memory``).
+
+Implements the subset of supabase-py the backend uses — PostgREST-style table
+queries, the feedback RPCs, Storage buckets and the auth calls made by
+``app/core/auth.py`` and the admin endpoints — on top of plain Python dicts,
+so the whole FastAPI app can run in tests and benchmarks without network
+access.  Every client returned by ``create_client`` in memory mode shares one
+``MemoryDatabase``, the same way every real client talks to one project.
+
+Not emulated: Row Level Security (all clients see every row), column types
+and constraints other than upsert conflict keys, and PostgREST error shapes.
+Postgres functions the app calls are re-implemented in Python and registered
+with ``MemoryDatabase.register_rpc``; the triggers it relies on are Python
+functions in ``ROW_TRIGGERS``.
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+import re
+import secrets
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Embedded selects like ``chat_messages(count)`` need to know how two tables
+# join: (parent table, child table) -> foreign-key column on the child.
+RELATIONSHIPS: Dict[Tuple[str, str], str] = {
+    ("chat_sessions", "chat_messages"): "session_id",
+    ("documents", "document_chunks"): "doc_id",
+    ("profiles", "chat_sessions"): "user_id",
+}
+
+# Generated columns maintained on every write.
+COMPUTED_COLUMNS: Dict[str, Dict[str, Callable[[Dict[str, Any]], Any]]] = {
+    "chunk_feedback_scores": {
+        "net_score": lambda row: int(row.get("positive_count") or 0) - int(row.get("negative_count") or 0),
+    },
+}
+
+# Primary keys that are not ``id`` (also the default upsert conflict target).
+PRIMARY_KEYS: Dict[str, str] = {
+    "document_chunks": "chunk_id",
+    "chunk_feedback_scores": "chunk_id",
+}
+
+# Column defaults beyond ``id`` / ``created_at``.
+COLUMN_DEFAULTS: Dict[str, Dict[str, Callable[[], Any]]] = {
+    "chunk_feedback_scores": {"positive_count": lambda: 0, "negative_count": lambda: 0},
+    "profiles": {"role": lambda: "user", "status": lambda: "active"},
+    "chat_sessions": {"history_version": lambda: 0},
+}
+
+_SELECT_EMBED_RE = re.compile(r"^(\w+)\((.*)\)$")
+# ``alias:column->key`` / ``column->>key`` — one key of a JSON column.
+_SELECT_JSON_RE = re.compile(r"^(?:(\w+):)?(\w+)->>?(\w+)$")
+
+
+class MemoryAPIError(Exception):
+    """Raised where PostgREST would return an error response."""
+
+
+@dataclass
+class MemoryResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def _split_columns(spec: str) -> List[str]:
+    """Split a select spec on top-level commas (not those inside ``rel(...)``)."""
+    parts, depth, current = [], 0, []
+    for ch in spec:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    # NULLs sort last ascending (Postgres default); mixed types compare as strings.
+    if value is None:
+        return (1, "")
+    if isinstance(value, (int, float, str)):
+        return (0, value)
+    return (0, str(value))
+
+
+# ── Query builder ────────────────────────────────────────────────────────────
+
+class MemoryQuery:
+    """Chainable query mirroring supabase-py's request builders."""
+
+    def __init__(self, db: "MemoryDatabase", table: str) -> None:
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._on_conflict: Optional[str] = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._order: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+        self._maybe_single = False
+        self._total: Optional[int] = None
+
+    # -- operations --
+    def select(self, columns: str = "*", count: Optional[str] = None, **_: Any) -> "MemoryQuery":
+        self._columns = columns or "*"
+        self._count = count
+        return self
+
+    def insert(self, rows: Any, **_: Any) -> "MemoryQuery":
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Any, on_conflict: Optional[str] = None, **_: Any) -> "MemoryQuery":
+        self._op, self._payload, self._on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, values: Dict[str, Any], **_: Any) -> "MemoryQuery":
+        self._op, self._payload = "update", values
+        return self
+
+    def delete(self, **_: Any) -> "MemoryQuery":
+        self._op = "delete"
+        return self
+
+    # -- filters --
+    def _add(self, predicate: Callable[[Dict[str, Any]], bool]) -> "MemoryQuery":
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: _loose_equal(row.get(column), value))
+
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: not _loose_equal(row.get(column), value))
+
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: row.get(column) is not None and row.get(column) >= value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: row.get(column) is not None and row.get(column) < value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._add(lambda row: row.get(column) is not None and row.get(column) <= value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQuery":
+        allowed = list(values)
+        return self._add(lambda row: any(_loose_equal(row.get(column), v) for v in allowed))
+
+    def is_(self, column: str, value: Any) -> "MemoryQuery":
+        if value in (None, "null"):
+            return self._add(lambda row: row.get(column) is None)
+        target = value in (True, "true")
+        return self._add(lambda row: row.get(column) is target)
+
+    def like(self, column: str, pattern: str) -> "MemoryQuery":
+        regex = _like_regex(pattern, re.DOTALL)
+        return self._add(lambda row: isinstance(row.get(column), str) and bool(regex.fullmatch(row[column])))
+
+    def ilike(self, column: str, pattern: str) -> "MemoryQuery":
+        regex = _like_regex(pattern, re.DOTALL | re.IGNORECASE)
+        return self._add(lambda row: isinstance(row.get(column), str) and bool(regex.fullmatch(row[column])))
+
+    def or_(self, filters: str, **_: Any) -> "MemoryQuery":
+        """PostgREST logic tree, e.g. ``created_at.lt.X,and(created_at.eq.X,id.lt.Y)``."""
+        return self._add(_logic_predicate("or", _split_columns(filters)))
+
+    # -- modifiers --
+    def order(self, column: str, desc: bool = False, **_: Any) -> "MemoryQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_: Any) -> "MemoryQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, **_: Any) -> "MemoryQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "MemoryQuery":
+        self._single = True
+        return self
+
+    def maybe_single(self) -> "MemoryQuery":
+        self._maybe_single = True
+        return self
+
+    # -- execution --
+    def execute(self) -> MemoryResponse:
+        with self._db.lock:
+            rows = getattr(self, f"_execute_{self._op}")()
+            rows = [self._db._project(self._table, row, self._columns) for row in rows]
+        count = (self._total if self._total is not None else len(rows)) if self._count else None
+        if self._single or self._maybe_single:
+            if len(rows) == 1:
+                return MemoryResponse(data=rows[0], count=count)
+            if self._maybe_single and not rows:
+                return MemoryResponse(data=None, count=count)
+            raise MemoryAPIError(f"JSON object requested, multiple (or no) rows returned ({len(rows)})")
+        return MemoryResponse(data=rows, count=count)
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        return [row for row in self._db._rows(self._table) if all(f(row) for f in self._filters)]
+
+    def _execute_select(self) -> List[Dict[str, Any]]:
+        rows = self._matching()
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=desc)
+        self._total = len(rows)  # exact count ignores limit/range, as in PostgREST
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        return rows
+
+    def _execute_insert(self) -> List[Dict[str, Any]]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        return [self._db._insert_row(self._table, row) for row in payload]
+
+    def _execute_upsert(self) -> List[Dict[str, Any]]:
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        keys = [k.strip() for k in (self._on_conflict or PRIMARY_KEYS.get(self._table, "id")).split(",")]
+        written = []
+        for row in payload:
+            existing = None
+            if all(row.get(k) is not None for k in keys):
+                existing = next(
+                    (r for r in self._db._rows(self._table) if all(_loose_equal(r.get(k), row[k]) for k in keys)),
+                    None,
+                )
+            if existing is None:
+                written.append(self._db._insert_row(self._table, row))
+            else:
+                existing.update(copy.deepcopy(row))
+                self._db._apply_computed(self._table, existing)
+                self._db._fire_triggers(self._table, existing)
+                written.append(existing)
+        return written
+
+    def _execute_update(self) -> List[Dict[str, Any]]:
+        rows = self._matching()
+        for row in rows:
+            row.update(copy.deepcopy(self._payload))
+            self._db._apply_computed(self._table, row)
+            self._db._fire_triggers(self._table, row)
+        return rows
+
+    def _execute_delete(self) -> List[Dict[str, Any]]:
+        rows = self._matching()
+        doomed = {id(row) for row in rows}
+        table = self._db._rows(self._table)
+        table[:] = [row for row in table if id(row) not in doomed]
+        for row in rows:
+            self._db._fire_triggers(self._table, row)
+        return rows
+
+
+def _loose_equal(left: Any, right: Any) -> bool:
+    # PostgREST compares over the wire as text, so UUID objects / ints match their strings.
+    if left == right:
+        return True
+    if left is None or right is None:
+        return False
+    return str(left) == str(right)
+
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": _loose_equal,
+    "neq": lambda left, right: not _loose_equal(left, right),
+    "gt": lambda left, right: left is not None and left > right,
+    "gte": lambda left, right: left is not None and left >= right,
+    "lt": lambda left, right: left is not None and left < right,
+    "lte": lambda left, right: left is not None and left <= right,
+}
+
+
+def _logic_predicate(op: str, conditions: List[str]) -> Callable[[Dict[str, Any]], bool]:
+    """Predicate for the ``or=(...)`` / ``and(...)`` filters of ``MemoryQuery.or_``."""
+    predicates = []
+    for condition in conditions:
+        nested = _SELECT_EMBED_RE.match(condition)
+        if nested and nested.group(1) in ("and", "or"):
+            predicates.append(_logic_predicate(nested.group(1), _split_columns(nested.group(2))))
+            continue
+        column, operator, value = condition.split(".", 2)
+        if operator not in _COMPARISONS:
+            raise MemoryAPIError(f"Unsupported operator in logic filter: {operator}")
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1]
+        predicates.append(lambda row, c=column, cmp=_COMPARISONS[operator], v=value: cmp(row.get(c), v))
+    combine = any if op == "or" else all
+    return lambda row: combine(p(row) for p in predicates)
+
+
+def _like_regex(pattern: str, flags: int) -> "re.Pattern[str]":
+    escaped = re.escape(pattern).replace("%", ".*").replace("_", ".")
+    return re.compile(escaped, flags)
+
+
+class MemoryRpc:
+    def __init__(self, db: "MemoryDatabase", name: str, params: Optional[Dict[str, Any]]) -> None:
+        self._db, self._name, self._params = db, name, params or {}
+
+    def execute(self) -> MemoryResponse:
+        fn = self._db.rpcs.get(self._name)
+        if fn is None:
+            raise MemoryAPIError(f"Could not find the function public.{self._name}")
+        with self._db.lock:
+            return MemoryResponse(data=copy.deepcopy(fn(self._db, **self._params)))
+
+
+# ── Storage ──────────────────────────────────────────────────────────────────
+
+class MemoryBucket:
+    def __init__(self, storage: "MemoryStorage", bucket: str) -> None:
+        self._storage = storage
+        self._bucket = bucket
+        self._files = storage.files.setdefault(bucket, {})
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, Any]] = None) -> SimpleNamespace:
+        options = file_options or {}
+        if path in self._files and str(options.get("upsert", "false")).lower() != "true":
+            raise MemoryAPIError("The resource already exists")
+        data = file.read() if hasattr(file, "read") else file
+        self._files[path] = bytes(data)
+        return SimpleNamespace(path=path, full_path=f"{self._bucket}/{path}")
+
+    def download(self, path: str, *_: Any, **__: Any) -> bytes:
+        try:
+            return self._files[path]
+        except KeyError:
+            raise MemoryAPIError(f"Object not found: {self._bucket}/{path}")
+
+    def get_public_url(self, path: str, *_: Any, **__: Any) -> str:
+        return f"{self._storage.base_url}/storage/v1/object/public/{self._bucket}/{path}"
+
+    def create_signed_url(self, path: str, expires_in: int, *_: Any, **__: Any) -> Dict[str, str]:
+        if path not in self._files:
+            raise MemoryAPIError(f"Object not found: {self._bucket}/{path}")
+        url = f"{self._storage.base_url}/storage/v1/object/sign/{self._bucket}/{path}?token={secrets.token_hex(8)}"
+        return {"signedURL": url, "signedUrl": url}
+
+    def list(self, path: Optional[str] = None, *_: Any, **__: Any) -> List[Dict[str, Any]]:
+        prefix = (path or "").strip("/")
+        prefix = f"{prefix}/" if prefix else ""
+        names = set()
+        for key in self._files:
+            if key.startswith(prefix):
+                names.add(key[len(prefix):].split("/", 1)[0])
+        return [{"name": name} for name in sorted(names)]
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        removed = []
+        for path in paths:
+            if self._files.pop(path, None) is not None:
+                removed.append({"name": path})
+        return removed
+
+
+class MemoryStorage:
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self.files: Dict[str, Dict[str, bytes]] = {}
+
+    def from_(self, bucket: str) -> MemoryBucket:
+        return MemoryBucket(self, bucket)
+
+
+# ── Auth ─────────────────────────────────────────────────────────────────────
+
+class MemoryAuthAdmin:
+    def __init__(self, db: "MemoryDatabase") -> None:
+        self._db = db
+
+    def get_user_by_id(self, user_id: str) -> SimpleNamespace:
+        user = self._db.auth_users.get(str(user_id))
+        if user is None:
+            raise MemoryAPIError("User not found")
+        return SimpleNamespace(user=user)
+
+    def update_user_by_id(self, user_id: str, attributes: Dict[str, Any]) -> SimpleNamespace:
+        user = self.get_user_by_id(user_id).user
+        for key, value in (attributes or {}).items():
+            if key in ("user_metadata", "app_metadata") and isinstance(value, dict):
+                getattr(user, key).update(value)
+            else:
+                setattr(user, key, value)
+        return SimpleNamespace(user=user)
+
+    def create_user(self, attributes: Dict[str, Any]) -> SimpleNamespace:
+        user, _ = self._db.create_user(
+            email=attributes.get("email"),
+            user_metadata=attributes.get("user_metadata"),
+        )
+        return SimpleNamespace(user=user)
+
+    def sign_out(self, user_id: str, scope: str = "global") -> None:
+        self._db.revoke_tokens(str(user_id))
+
+    def delete_user(self, user_id: str, *_: Any, **__: Any) -> None:
+        self._db.auth_users.pop(str(user_id), None)
+        self._db.revoke_tokens(str(user_id))
+
+
+class MemoryAuth:
+    def __init__(self, db: "MemoryDatabase") -> None:
+        self._db = db
+        self.admin = MemoryAuthAdmin(db)
+        self.session_token: Optional[str] = None
+
+    def get_user(self, jwt: Optional[str] = None) -> SimpleNamespace:
+        user_id = self._db.tokens.get(jwt or self.session_token or "")
+        user = self._db.auth_users.get(user_id) if user_id else None
+        if user is None:
+            raise MemoryAPIError("Invalid JWT")
+        return SimpleNamespace(user=user)
+
+    def set_session(self, access_token: str, refresh_token: str = "") -> SimpleNamespace:
+        self.session_token = access_token
+        return SimpleNamespace(session=SimpleNamespace(access_token=access_token))
+
+
+# ── Database / client ────────────────────────────────────────────────────────
+
+class MemoryDatabase:
+    """Process-wide state behind every in-memory client."""
+
+    def __init__(self, base_url: str = "http://supabase.local") -> None:
+        self.lock = threading.RLock()
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.rpcs: Dict[str, Callable[..., Any]] = dict(DEFAULT_RPCS)
+        self.storage = MemoryStorage(base_url)
+        self.auth_users: Dict[str, SimpleNamespace] = {}
+        self.tokens: Dict[str, str] = {}
+        self._last_timestamp: Optional[datetime] = None
+
+    # -- tables --
+    def _rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def now(self) -> str:
+        """Strictly increasing ISO timestamp, so inserts in one microsecond still order."""
+        with self.lock:
+            now = datetime.now(timezone.utc)
+            if self._last_timestamp is not None and now <= self._last_timestamp:
+                now = self._last_timestamp + timedelta(microseconds=1)
+            self._last_timestamp = now
+            return now.isoformat()
+
+    def _insert_row(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        stored = copy.deepcopy(row)
+        if PRIMARY_KEYS.get(table, "id") == "id":
+            stored.setdefault("id", str(uuid.uuid4()))
+        stored.setdefault("created_at", self.now())
+        for column, default in COLUMN_DEFAULTS.get(table, {}).items():
+            stored.setdefault(column, default())
+        self._apply_computed(table, stored)
+        self._rows(table).append(stored)
+        self._fire_triggers(table, stored)
+        return stored
+
+    def _fire_triggers(self, table: str, row: Dict[str, Any]) -> None:
+        for trigger in ROW_TRIGGERS.get(table, ()):
+            trigger(self, row)
+
+    @staticmethod
+    def _apply_computed(table: str, row: Dict[str, Any]) -> None:
+        for column, compute in COMPUTED_COLUMNS.get(table, {}).items():
+            row[column] = compute(row)
+
+    def _project(self, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for column in _split_columns(columns or "*"):
+            embed = _SELECT_EMBED_RE.match(column)
+            json_path = _SELECT_JSON_RE.match(column)
+            if column == "*":
+                result.update(copy.deepcopy(row))
+            elif embed:
+                child, inner = embed.groups()
+                fk = RELATIONSHIPS.get((table, child))
+                related = [r for r in self._rows(child) if fk and _loose_equal(r.get(fk), row.get("id"))]
+                if inner.strip() == "count":
+                    result[child] = [{"count": len(related)}]
+                else:
+                    result[child] = [self._project(child, r, inner) for r in related]
+            elif json_path:
+                alias, source, key = json_path.groups()
+                value = row.get(source)
+                result[alias or key] = copy.deepcopy(value.get(key)) if isinstance(value, dict) else None
+            else:
+                result[column] = copy.deepcopy(row.get(column))
+        return result
+
+    def insert(self, table: str, rows: Any) -> List[Dict[str, Any]]:
+        """Seed helper: insert rows directly and return copies."""
+        return MemoryQuery(self, table).insert(rows).execute().data
+
+    def register_rpc(self, name: str, fn: Callable[..., Any]) -> None:
+        """Register a Python implementation of a Postgres function: ``fn(db, **params)``."""
+        self.rpcs[name] = fn
+
+    # -- auth --
+    def create_user(
+        self,
+        email: Optional[str] = None,
+        role: str = "user",
+        status: str = "active",
+        user_id: Optional[str] = None,
+        user_metadata: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[SimpleNamespace, str]:
+        """Create an auth user with a matching profile row; returns ``(user, access_token)``."""
+        with self.lock:
+            user_id = user_id or str(uuid.uuid4())
+            email = email or f"{user_id[:8]}@example.com"
+            user = SimpleNamespace(
+                id=user_id,
+                email=email,
+                user_metadata=dict(user_metadata or {}),
+                app_metadata={},
+                banned_until=None,
+                created_at=self.now(),
+            )
+            self.auth_users[user_id] = user
+            self._insert_row("profiles", {"id": user_id, "email": email, "role": role, "status": status})
+            return user, self.issue_token(user_id)
+
+    def issue_token(self, user_id: str) -> str:
+        token = secrets.token_urlsafe(24)
+        self.tokens[token] = user_id
+        return token
+
+    def revoke_tokens(self, user_id: str) -> None:
+        for token in [t for t, uid in self.tokens.items() if uid == user_id]:
+            del self.tokens[token]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.tables.clear()
+            self.storage.files.clear()
+            self.auth_users.clear()
+            self.tokens.clear()
+
+
+class MemorySupabaseClient:
+    """Drop-in for ``supabase.Client`` backed by a shared ``MemoryDatabase``."""
+
+    def __init__(self, db: MemoryDatabase) -> None:
+        self.db = db
+        self.storage = db.storage
+        self.auth = MemoryAuth(db)
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self.db, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None, **_: Any) -> MemoryRpc:
+        return MemoryRpc(self.db, name, params)
+
+
+# ── Python versions of the Postgres functions the app calls ─────────────────
+
+def _rpc_update_chunk_feedback_score(db: MemoryDatabase, p_chunk_id: str, p_old_rating: Optional[int], p_new_rating: Optional[int]) -> None:
+    rows = db._rows("chunk_feedback_scores")
+    row = next((r for r in rows if r.get("chunk_id") == p_chunk_id), None)
+    if row is None:
+        row = db._insert_row("chunk_feedback_scores", {"chunk_id": p_chunk_id})
+    for rating, delta in ((p_old_rating, -1), (p_new_rating, 1)):
+        if rating == 1:
+            row["positive_count"] = max(0, row["positive_count"] + delta)
+        elif rating == -1:
+            row["negative_count"] = max(0, row["negative_count"] + delta)
+    db._apply_computed("chunk_feedback_scores", row)
+
+
+def _rpc_submit_message_feedback(db: MemoryDatabase, p_message_id: str, p_user_id: str, p_new_rating: Optional[int]) -> Dict[str, Any]:
+    feedback = db._rows("feedback")
+    existing = next(
+        (r for r in feedback if _loose_equal(r.get("message_id"), p_message_id) and _loose_equal(r.get("user_id"), p_user_id)),
+        None,
+    )
+    old_rating = existing.get("score") if existing else None
+    if p_new_rating is None:
+        if existing is not None:
+            feedback.remove(existing)
+    elif existing is None:
+        db._insert_row("feedback", {"message_id": p_message_id, "user_id": p_user_id, "score": p_new_rating})
+    else:
+        existing["score"] = p_new_rating
+
+    if old_rating != p_new_rating:
+        message = next((m for m in db._rows("chat_messages") if _loose_equal(m.get("id"), p_message_id)), None)
+        citations = ((message or {}).get("metadata") or {}).get("citations") or []
+        for citation in citations:
+            if isinstance(citation, dict) and citation.get("chunk_id"):
+                _rpc_update_chunk_feedback_score(db, citation["chunk_id"], old_rating, p_new_rating)
+    return {"old_rating": old_rating, "new_rating": p_new_rating}
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _rpc_get_query_aware_chunk_scores(db: MemoryDatabase, p_query_emb: List[float], p_chunk_ids: List[str], p_sim_threshold: float) -> List[Dict[str, Any]]:
+    wanted = set(p_chunk_ids or [])
+    totals: Dict[str, float] = {}
+    for event in db._rows("chunk_feedback_events"):
+        cid = event.get("chunk_id")
+        if cid not in wanted or not event.get("query_embedding"):
+            continue
+        similarity = _cosine(p_query_emb, event["query_embedding"])
+        if similarity >= p_sim_threshold:
+            totals[cid] = totals.get(cid, 0.0) + event.get("rating", 0) * similarity
+    return [{"chunk_id": cid, "weighted_score": score} for cid, score in totals.items()]
+
+
+def _rpc_get_session_summaries(
+    db: MemoryDatabase,
+    p_user_id: str,
+    p_limit: Optional[int] = None,
+    p_before_created_at: Optional[str] = None,
+    p_before_id: Optional[str] = None,
+    p_search: Optional[str] = None,
+    p_since: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    sessions = [s for s in db._rows("chat_sessions") if _loose_equal(s.get("user_id"), p_user_id)]
+    if p_before_created_at is not None:
+        before = (p_before_created_at, str(p_before_id or "\uffff"))
+        sessions = [s for s in sessions if (s["created_at"], str(s["id"])) < before]
+    if p_since is not None:
+        sessions = [s for s in sessions if s["created_at"] >= p_since]
+    sessions.sort(key=lambda s: (s["created_at"], str(s["id"])), reverse=True)
+
+    summaries = []
+    for session in sessions:
+        messages = [m for m in db._rows("chat_messages") if _loose_equal(m.get("session_id"), session["id"])]
+        user_messages = sorted((m for m in messages if m.get("role") == "user"), key=lambda m: m["created_at"])
+        summaries.append({
+            "id": session["id"],
+            "user_id": session["user_id"],
+            "title": session.get("title"),
+            "created_at": session["created_at"],
+            "message_count": len(messages),
+            "last_message": (user_messages[-1].get("content") or "")[:100] if user_messages else None,
+        })
+    if p_search:
+        needle = p_search.lower()
+        summaries = [
+            s for s in summaries if needle in (s["title"] or "").lower() or needle in (s["last_message"] or "").lower()
+        ]
+    return summaries if p_limit is None else summaries[:p_limit]
+
+
+def _rpc_begin_chat_turn(
+    db: MemoryDatabase,
+    p_session_id: str,
+    p_user_id: str,
+    p_content: str,
+    p_history_limit: int = 10,
+    p_known_version: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    session = next(
+        (s for s in db._rows("chat_sessions")
+         if _loose_equal(s.get("id"), p_session_id) and _loose_equal(s.get("user_id"), p_user_id)),
+        None,
+    )
+    if session is None:
+        return None
+    known_current = p_known_version is not None and p_known_version == session.get("history_version", 0)
+    message = db._insert_row("chat_messages", {"session_id": p_session_id, "role": "user", "content": p_content})
+    history = None
+    if not known_current:
+        messages = sorted(
+            (m for m in db._rows("chat_messages") if _loose_equal(m.get("session_id"), p_session_id)),
+            key=lambda m: (m["created_at"], str(m["id"])),
+        )
+        history = [{"role": m.get("role"), "content": m.get("content")} for m in messages[-p_history_limit:]]
+    return {"user_message": message, "history": history, "history_version": session.get("history_version", 0)}
+
+
+def _rpc_get_feedback_event_sources(db: MemoryDatabase, p_message_ids: List[str]) -> List[Dict[str, Any]]:
+    wanted = {str(mid) for mid in p_message_ids or []}
+    messages = db._rows("chat_messages")
+    sources = []
+    for reply in messages:
+        if str(reply.get("id")) not in wanted or reply.get("role") != "assistant":
+            continue
+        earlier = [
+            m for m in messages
+            if _loose_equal(m.get("session_id"), reply.get("session_id"))
+            and m.get("role") == "user"
+            and m["created_at"] < reply["created_at"]
+        ]
+        question = max(earlier, key=lambda m: m["created_at"]) if earlier else None
+        sources.append({
+            "message_id": reply["id"],
+            "citations": (reply.get("metadata") or {}).get("citations") or [],
+            "query": question.get("content") if question else None,
+        })
+    return sources
+
+
+def _bump_chat_history_version(db: MemoryDatabase, message: Dict[str, Any]) -> None:
+    for session in db._rows("chat_sessions"):
+        if _loose_equal(session.get("id"), message.get("session_id")):
+            session["history_version"] = session.get("history_version", 0) + 1
+
+
+DEFAULT_RPCS: Dict[str, Callable[..., Any]] = {
+    "update_chunk_feedback_score": _rpc_update_chunk_feedback_score,
+    "submit_message_feedback": _rpc_submit_message_feedback,
+    "get_query_aware_chunk_scores": _rpc_get_query_aware_chunk_scores,
+    "get_session_summaries": _rpc_get_session_summaries,
+    "begin_chat_turn": _rpc_begin_chat_turn,
+    "get_feedback_event_sources": _rpc_get_feedback_event_sources,
+}
+
+# Python versions of the row triggers (run after each insert, update and delete).
+ROW_TRIGGERS: Dict[str, List[Callable[[MemoryDatabase, Dict[str, Any]], None]]] = {
+    "chat_messages": [_bump_chat_history_version],
+}
+
+# Shared by every client created in memory mode.
+memory_database = MemoryDatabase()
@@ -0,0 +1,234 @@
+"""
+In-memory stand-in for a Pinecone index (``VECTOR_STORE_BACKEND=memory``).
+
+``MemoryIndex`` answers the same ``upsert`` / ``query`` / ``delete`` /
+``describe_index_stats`` calls as ``pinecone.Index`` (exact cosine search with
+numpy, Pinecone-style metadata filters), and ``InMemoryVectorStore`` is a
+``VectorStore`` whose index is one of these.  Indexes are kept per name for
+the life of the process, so the chat service, ingest endpoint and video
+indexer all see the same vectors, just as they would against one Pinecone
+project.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.vector_store import VectorStore
+
+_DEFAULT_NAMESPACE = ""
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition or (isinstance(value, list) and condition in value)
+    for op, operand in condition.items():
+        values = value if isinstance(value, list) else [value]
+        if op == "$eq" and operand not in values:
+            return False
+        if op == "$ne" and operand in values:
+            return False
+        if op == "$in" and not any(v in operand for v in values):
+            return False
+        if op == "$nin" and any(v in operand for v in values):
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None or isinstance(value, list):
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+        if op == "$exists" and (value is not None) != bool(operand):
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], metadata_filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone metadata filter against one vector's metadata."""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+class _Namespace:
+    def __init__(self) -> None:
+        self.vectors: Dict[str, Tuple[np.ndarray, Dict[str, Any]]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+
+    def invalidate(self) -> None:
+        self._matrix = None
+
+    def matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Row-normalised matrix of all vectors, rebuilt lazily after writes."""
+        if self._matrix is None:
+            self._ids = list(self.vectors)
+            if self._ids:
+                stacked = np.stack([self.vectors[i][0] for i in self._ids])
+                norms = np.linalg.norm(stacked, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                self._matrix = stacked / norms
+            else:
+                self._matrix = np.zeros((0, settings.EMBED_DIMENSION), dtype=np.float32)
+        return self._ids, self._matrix
+
+
+class MemoryIndex:
+    """Exact-search replacement for ``pinecone.Index``."""
+
+    def __init__(self, name: str, dimension: int = settings.EMBED_DIMENSION) -> None:
+        self.name = name
+        self.dimension = dimension
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+    def _ns(self, namespace: Optional[str]) -> _Namespace:
+        return self._namespaces.setdefault(namespace or _DEFAULT_NAMESPACE, _Namespace())
+
+    def upsert(self, vectors: List[Any], namespace: Optional[str] = None, **_: Any) -> Dict[str, int]:
+        with self._lock:
+            ns = self._ns(namespace)
+            for item in vectors:
+                if isinstance(item, dict):
+                    vid, values, metadata = item["id"], item["values"], item.get("metadata")
+                else:
+                    vid, values = item[0], item[1]
+                    metadata = item[2] if len(item) > 2 else None
+                ns.vectors[str(vid)] = (np.asarray(values, dtype=np.float32), copy.deepcopy(metadata or {}))
+            ns.invalidate()
+        return {"upserted_count": len(vectors)}
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            ns = self._ns(namespace)
+            ids, matrix = ns.matrix()
+            if not ids:
+                return {"matches": [], "namespace": namespace or _DEFAULT_NAMESPACE}
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            scores = matrix @ (query / norm if norm else query)
+            order = np.argsort(-scores, kind="stable")
+            matches = []
+            for idx in order:
+                vid = ids[idx]
+                values, metadata = ns.vectors[vid]
+                if not matches_filter(metadata, filter):
+                    continue
+                match: Dict[str, Any] = {"id": vid, "score": float(scores[idx])}
+                if include_metadata:
+                    match["metadata"] = copy.deepcopy(metadata)
+                if include_values:
+                    match["values"] = values.tolist()
+                matches.append(match)
+                if len(matches) >= top_k:
+                    break
+        return {"matches": matches, "namespace": namespace or _DEFAULT_NAMESPACE}
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None, **_: Any) -> Dict[str, Any]:
+        with self._lock:
+            ns = self._ns(namespace)
+            vectors = {
+                vid: {"id": vid, "values": ns.vectors[vid][0].tolist(), "metadata": copy.deepcopy(ns.vectors[vid][1])}
+                for vid in ids
+                if vid in ns.vectors
+            }
+        return {"vectors": vectors, "namespace": namespace or _DEFAULT_NAMESPACE}
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            ns = self._ns(namespace)
+            if delete_all:
+                ns.vectors.clear()
+            else:
+                for vid in ids or []:
+                    ns.vectors.pop(str(vid), None)
+                if filter:
+                    for vid in [v for v, (_, meta) in ns.vectors.items() if matches_filter(meta, filter)]:
+                        del ns.vectors[vid]
+            ns.invalidate()
+        return {}
+
+    def describe_index_stats(self, **_: Any) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(ns.vectors)} for name, ns in self._namespaces.items() if ns.vectors}
+            return {
+                "dimension": self.dimension,
+                "index_fullness": 0.0,
+                "namespaces": namespaces,
+                "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+            }
+
+
+_indexes: Dict[str, MemoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_memory_index(name: str) -> MemoryIndex:
+    """Return the process-wide in-memory index called ``name``, creating it on first use."""
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None:
+            index = _indexes[name] = MemoryIndex(name)
+        return index
+
+
+def reset_memory_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+
+class InMemoryVectorStore(VectorStore):
+    """``VectorStore`` backed by a ``MemoryIndex`` instead of Pinecone."""
+
+    metrics_service = "memory"
+
+    def __init__(self, index_name: Optional[str] = None, namespace: Optional[str] = None):
+        self.pc = None
+        self.index_name = index_name or settings.PINECONE_INDEX_NAME
+        self.namespace = namespace if namespace is not None else getattr(settings, "PINECONE_NAMESPACE", None)
+        self.calls = Counter()
+        self.errors = Counter()
+
+    @property
+    def index(self) -> MemoryIndex:
+        # Looked up on every call so shared stores see reset_memory_indexes().
+        return get_memory_index(self.index_name)
+
+    def is_connected(self) -> bool:
+        return True
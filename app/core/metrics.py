@@ -0,0 +1,200 @@
+"""
+Prometheus metrics for the API, served at ``GET /metrics``.
+
+Metric families (all prefixed ``cfc_``):
+
+* ``http_request_duration_seconds{method,route,status}`` – per route template.
+* ``embedding_duration_seconds{kind}`` / ``embedding_batch_size`` – query vs.
+  batch encodes and how many texts each batch carried.
+* ``external_call_duration_seconds{service,operation}`` and
+  ``external_call_errors_total{service,operation}`` – Pinecone, Supabase and
+  Azure OpenAI round trips.
+* ``llm_tokens_total{kind}`` – prompt / completion tokens reported by Azure.
+* ``cache_requests_total{cache,result}`` – hits and misses; the hit ratio is
+  ``rate(...{result="hit"}) / rate(...)`` in PromQL.
+* ``ingestion_duration_seconds{kind}`` – whole document / video ingest jobs.
+* ``queue_depth{queue}`` – work waiting or in flight (e.g. transcription windows).
+* ``http_pool_connections{pool,state}`` / ``http_pool_requests_in_flight{pool}``
+  – open and idle connections of shared HTTP pools (Supabase) and requests
+  currently using them.
+
+``prometheus_client`` is imported defensively: without it every metric is a
+no-op and ``/metrics`` answers 503, so instrumentation never breaks a request.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from app.config import settings
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    _HAS_PROMETHEUS = True
+except ImportError:
+    _HAS_PROMETHEUS = False
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_JOB_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class _NoopMetric:
+    """Stands in for every metric type when prometheus_client is missing or metrics are off."""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def inc(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def dec(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def set(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+ENABLED = _HAS_PROMETHEUS and settings.METRICS_ENABLED
+registry = CollectorRegistry() if ENABLED else None
+
+
+def _histogram(name: str, doc: str, labels: tuple = (), buckets: tuple = _LATENCY_BUCKETS):
+    if not ENABLED:
+        return _NoopMetric()
+    return Histogram(name, doc, labels, buckets=buckets, registry=registry)
+
+
+def _counter(name: str, doc: str, labels: tuple = ()):
+    return Counter(name, doc, labels, registry=registry) if ENABLED else _NoopMetric()
+
+
+def _gauge(name: str, doc: str, labels: tuple = ()):
+    return Gauge(name, doc, labels, registry=registry) if ENABLED else _NoopMetric()
+
+
+REQUEST_LATENCY = _histogram(
+    "cfc_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")
+)
+EMBEDDING_LATENCY = _histogram("cfc_embedding_duration_seconds", "Embedding model encode latency.", ("kind",))
+EMBEDDING_BATCH_SIZE = _histogram(
+    "cfc_embedding_batch_size", "Number of texts per embedding batch.", buckets=_BATCH_BUCKETS
+)
+EXTERNAL_CALL_LATENCY = _histogram(
+    "cfc_external_call_duration_seconds", "Latency of calls to external services.", ("service", "operation")
+)
+EXTERNAL_CALL_ERRORS = _counter(
+    "cfc_external_call_errors_total", "Failed calls to external services.", ("service", "operation")
+)
+LLM_TOKENS = _counter("cfc_llm_tokens_total", "LLM tokens used, by kind (prompt/completion).", ("kind",))
+CACHE_REQUESTS = _counter("cfc_cache_requests_total", "Cache lookups by result (hit/miss).", ("cache", "result"))
+INGESTION_DURATION = _histogram(
+    "cfc_ingestion_duration_seconds", "Duration of whole ingestion jobs.", ("kind",), buckets=_JOB_BUCKETS
+)
+QUEUE_DEPTH = _gauge("cfc_queue_depth", "Items waiting or in flight per work queue.", ("queue",))
+HTTP_POOL_CONNECTIONS = _gauge(
+    "cfc_http_pool_connections", "Connections held by a shared HTTP pool, by state (open/idle).", ("pool", "state")
+)
+HTTP_POOL_IN_FLIGHT = _gauge(
+    "cfc_http_pool_requests_in_flight", "Requests currently sent through a shared HTTP pool.", ("pool",)
+)
+
+
+@contextlib.contextmanager
+def track_call(service: str, operation: str) -> Iterator[None]:
+    """Time one call to ``service`` and count it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        EXTERNAL_CALL_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(service, operation).observe(time.perf_counter() - started)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_llm_usage(usage: Any) -> None:
+    """Count tokens from an OpenAI ``usage`` object (missing or non-numeric fields are ignored)."""
+    try:
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None) if usage is not None else None
+            if isinstance(tokens, (int, float)) and not isinstance(tokens, bool) and tokens > 0:
+                LLM_TOKENS.labels(kind).inc(tokens)
+    except Exception as exc:
+        logger.warning("Failed to record LLM token usage: %s", exc)
+
+
+@contextlib.contextmanager
+def in_queue(queue: str, count: int = 1) -> Iterator[None]:
+    """Count ``count`` items as queued / in flight on ``queue`` while the block runs."""
+    QUEUE_DEPTH.labels(queue).inc(count)
+    try:
+        yield
+    finally:
+        QUEUE_DEPTH.labels(queue).dec(count)
+
+
+def render_latest() -> Optional[tuple]:
+    """``(body, content_type)`` in the Prometheus text format, or None when disabled."""
+    if not ENABLED:
+        return None
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    """Route template of the matched endpoint, e.g. ``/api/chat/sessions/{session_id}``."""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        # Unmatched paths share one label so scanners cannot blow up label cardinality.
+        return "unmatched"
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return template
+    # Routes of a router included with a prefix report only their own path;
+    # put back the (literal) prefix the request path starts with.
+    for i, char in enumerate(path):
+        if char == "/" and i and regex.match(path[i:]):
+            return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording ``cfc_http_request_duration_seconds`` per route template."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(scope.get("method", ""), _route_template(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,395 @@
+"""
+In-process sampling profiler.
+
+A background thread walks ``sys._current_frames()`` every
+``PROFILER_INTERVAL_MS`` and counts each thread's stack, which is enough to
+find hot spots on the production box without attaching py-spy by hand.
+
+Two modes:
+
+* ``wall`` – every thread is sampled on every tick, so time spent waiting on
+  Pinecone, Supabase or Azure shows up next to CPU work.
+* ``cpu``  – a thread is only counted when its CPU time (from
+  ``/proc/self/task/<tid>/stat``) advanced since its previous sample, which
+  drops idle pool workers and threads blocked on I/O.  Linux only.
+
+Results are exported in the collapsed-stack format (``frame;frame;frame N``),
+which ``flamegraph.pl``, speedscope and most flamegraph viewers read directly.
+
+``SlowRequestProfilerMiddleware`` starts a wall-clock capture for any request
+still running after ``PROFILE_SLOW_REQUESTS_MS`` and saves it under
+``PROFILES_DIR`` when the request finishes, so slow ``ask_question`` calls leave
+evidence behind.  One watchdog thread tracks the deadlines of all requests,
+and stopping and saving a capture runs off the event loop.  Only one capture
+(on-demand or automatic) runs at a time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("wall", "cpu")
+_MAX_DEPTH = 128
+_PROJECT_ROOT = str(settings.PROJECT_ROOT)
+
+# Held by whichever capture is running; on-demand and slow-request profiles
+# would otherwise sample each other's sampler threads.
+capture_lock = threading.Lock()
+
+
+@dataclass
+class Profile:
+    """Aggregated stacks from one capture."""
+
+    mode: str
+    interval_ms: float
+    duration_s: float
+    ticks: int
+    stacks: Counter = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text, root frame (thread name) first, one stack per line."""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions by self samples (innermost frame) with their inclusive samples."""
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                inclusive[frame] += count
+        return [
+            {"function": name, "self": count, "total": inclusive[name]}
+            for name, count in own.most_common(limit)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "interval_ms": self.interval_ms,
+            "duration_s": round(self.duration_s, 3),
+            "ticks": self.ticks,
+            "samples": self.samples,
+            "top_functions": self.top_functions(),
+        }
+
+
+def _thread_cpu_ticks(native_id: int) -> Optional[int]:
+    try:
+        with open(f"/proc/self/task/{native_id}/stat", "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    # Fields after the ")" closing the thread name start at field 3 (state);
+    # utime and stime are fields 14 and 15.
+    fields = data.rsplit(b")", 1)[-1].split()
+    return int(fields[11]) + int(fields[12])
+
+
+class SamplingProfiler:
+    """Samples all Python thread stacks from a daemon thread between start() and stop()."""
+
+    def __init__(
+        self,
+        mode: str = "wall",
+        interval_ms: Optional[float] = None,
+        max_seconds: Optional[float] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {', '.join(MODES)}")
+        if mode == "cpu" and _thread_cpu_ticks(threading.get_native_id()) is None:
+            raise ValueError("cpu mode needs per-thread CPU times from /proc (Linux only); use wall mode")
+        self.mode = mode
+        self.interval_ms = interval_ms or settings.PROFILER_INTERVAL_MS
+        self.max_seconds = max_seconds or settings.PROFILER_MAX_SECONDS
+        self._stacks: Counter = Counter()
+        self._labels: Dict[Any, str] = {}
+        self._cpu_ticks: Dict[int, int] = {}
+        self._ticks = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._duration = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return Profile(
+            mode=self.mode,
+            interval_ms=self.interval_ms,
+            duration_s=self._duration,
+            ticks=self._ticks,
+            stacks=self._stacks,
+        )
+
+    def _run(self) -> None:
+        interval = self.interval_ms / 1000.0
+        deadline = self._started + self.max_seconds
+        own_ident = threading.get_ident()
+        try:
+            while not self._stop.is_set():
+                self._sample(own_ident)
+                if time.perf_counter() >= deadline:
+                    logger.info("Profiler stopped at the %.0fs limit", self.max_seconds)
+                    break
+                self._stop.wait(interval)
+        except Exception:
+            logger.exception("Sampling profiler failed")
+        finally:
+            self._duration = time.perf_counter() - self._started
+
+    def _sample(self, own_ident: int) -> None:
+        threads = {t.ident: t for t in threading.enumerate()}
+        self._ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            thread = threads.get(ident)
+            if self.mode == "cpu" and not self._advanced(thread):
+                continue
+            name = thread.name if thread is not None else f"thread-{ident}"
+            self._stacks[(name,) + self._stack(frame)] += 1
+
+    def _advanced(self, thread: Optional[threading.Thread]) -> bool:
+        native_id = getattr(thread, "native_id", None)
+        if native_id is None:
+            return False
+        ticks = _thread_cpu_ticks(native_id)
+        if ticks is None:
+            return False
+        previous = self._cpu_ticks.get(native_id)
+        self._cpu_ticks[native_id] = ticks
+        # The first sight of a thread only establishes its baseline.
+        return previous is not None and ticks > previous
+
+    def _stack(self, frame: Any) -> Tuple[str, ...]:
+        frames: List[str] = []
+        while frame is not None and len(frames) < _MAX_DEPTH:
+            frames.append(self._label(frame.f_code))
+            frame = frame.f_back
+        frames.reverse()
+        return tuple(frames)
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(_PROJECT_ROOT):
+                filename = os.path.relpath(filename, _PROJECT_ROOT)
+            else:
+                filename = "/".join(Path(filename).parts[-2:])
+            # ";" separates frames in the collapsed format.
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+
+# ---------------------------------------------------------------------------
+# Saved captures
+# ---------------------------------------------------------------------------
+
+_CAPTURE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def save_capture(profile: Profile, metadata: Dict[str, Any], directory: Optional[Path] = None) -> str:
+    """Write ``<name>.collapsed`` and ``<name>.json`` and prune old captures; returns the name."""
+    directory = Path(directory or settings.PROFILES_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", str(metadata.get("path", "capture"))).strip("_")[:60] or "root"
+    name = f"{stamp}_{slug}"
+    (directory / f"{name}.collapsed").write_text(profile.collapsed())
+    (directory / f"{name}.json").write_text(json.dumps({
+        "name": name,
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        **metadata,
+        **profile.summary(),
+    }, indent=2))
+    _prune(directory, settings.PROFILES_KEEP)
+    return name
+
+
+def _prune(directory: Path, keep: int) -> None:
+    captures = sorted(directory.glob("*.json"))
+    for meta in captures[:max(0, len(captures) - keep)]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def list_captures(directory: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Metadata of saved captures, newest first."""
+    directory = Path(directory or settings.PROFILES_DIR)
+    if not directory.exists():
+        return []
+    captures = []
+    for meta in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            captures.append(json.loads(meta.read_text()))
+        except Exception:
+            logger.warning("Skipping unreadable profile metadata %s", meta.name)
+    return captures
+
+
+def read_capture(name: str, directory: Optional[Path] = None) -> Optional[str]:
+    """Collapsed stacks of a saved capture, or None if ``name`` is not one."""
+    if not _CAPTURE_NAME.match(name):
+        return None
+    path = Path(directory or settings.PROFILES_DIR) / f"{name}.collapsed"
+    return path.read_text() if path.is_file() else None
+
+
+# ---------------------------------------------------------------------------
+# Automatic capture of slow requests
+# ---------------------------------------------------------------------------
+
+class _Watchdog:
+    """
+    One daemon thread that calls ``_SlowRequestWatch.begin`` for each request
+    still unfinished at its deadline.  Deadlines sit in a heap; finished
+    requests are skipped when their deadline comes up instead of being
+    removed, so registering and finishing a request never spawns a thread.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, "_SlowRequestWatch"]] = []
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, deadline: float, watch: "_SlowRequestWatch") -> None:
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, watch))
+            if self._thread is None:
+                # A thread still fires when the request blocks the event loop,
+                # which is exactly the case worth capturing.
+                self._thread = threading.Thread(target=self._run, name="slow-request-watchdog", daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is watch:
+                self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.perf_counter():
+                    timeout = self._heap[0][0] - time.perf_counter() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, watch = heapq.heappop(self._heap)
+            try:
+                watch.begin()
+            except Exception:
+                logger.exception("Slow-request watchdog failed")
+
+
+_watchdog = _Watchdog()
+
+
+class _SlowRequestWatch:
+    """Starts a profiler if the request outlives the threshold; saves it when the request ends."""
+
+    def __init__(self, threshold_ms: float, metadata: Dict[str, Any]) -> None:
+        self.metadata = metadata
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._finished = False
+        self._profiler: Optional[SamplingProfiler] = None
+        _watchdog.schedule(self.started + threshold_ms / 1000.0, self)
+
+    def begin(self) -> None:
+        with self._lock:
+            if self._finished or not capture_lock.acquire(blocking=False):
+                return
+            try:
+                self._profiler = SamplingProfiler(mode="wall").start()
+            except Exception:
+                capture_lock.release()
+                logger.exception("Could not start slow-request profiler")
+
+    def finish(self) -> Optional[SamplingProfiler]:
+        """Mark the request done; returns the running profiler, if any, for ``save``."""
+        with self._lock:
+            self._finished = True
+            profiler, self._profiler = self._profiler, None
+        return profiler
+
+    def save(self, profiler: SamplingProfiler, status_code: int) -> None:
+        """Stop ``profiler`` and write its capture (blocking: run it off the event loop)."""
+        try:
+            profile = profiler.stop()
+        finally:
+            capture_lock.release()
+        elapsed_ms = (time.perf_counter() - self.started) * 1000.0
+        try:
+            name = save_capture(profile, {**self.metadata, "status": status_code, "elapsed_ms": round(elapsed_ms, 1)})
+            logger.warning(
+                "Slow request %s %s took %.0f ms; profile saved as %s",
+                self.metadata.get("method"), self.metadata.get("path"), elapsed_ms, name,
+            )
+        except Exception:
+            logger.exception("Failed to save slow-request profile")
+
+
+class SlowRequestProfilerMiddleware:
+    """ASGI middleware that profiles requests running longer than ``threshold_ms``."""
+
+    def __init__(
+        self,
+        app: Callable,
+        threshold_ms: Optional[float] = None,
+        exclude_paths: Tuple[str, ...] = ("/api/admin/profile", "/metrics"),
+    ) -> None:
+        self.app = app
+        self.threshold_ms = threshold_ms or settings.PROFILE_SLOW_REQUESTS_MS
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        watch = _SlowRequestWatch(self.threshold_ms, {"method": scope.get("method"), "path": path})
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler = watch.finish()
+            if profiler is not None:
+                await asyncio.to_thread(watch.save, profiler, status_code)
@@ -2,24 +2,16 @@ from typing import List, Dict, Any, Optional
 import logging
 
 from app.config import settings
-from app.core.embeddings import EmbeddingModel
-from app.core.vector_store import VectorStore
+from app.core.embeddings import EmbeddingModel, create_embedding_model
+from app.core.vector_store import VectorStore, get_vector_store
 from app.core.supabase_service import supabase
 from app.core.feedback_service import FeedbackService
+from app.core.chunk_cache import build_context_chunk, fetch_chunks
+from app.core.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
-def _to_float(value: Any) -> float | None:
-    """Best-effort float conversion that tolerates None/strings."""
-    if value is None:
-        return None
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return None
-
-
 class RAGPipeline:
     """Retrieval-Augmented Generation pipeline."""
 
@@ -28,8 +20,8 @@ class RAGPipeline:
         vector_store: Optional[VectorStore] = None,
         embedding_model: Optional[EmbeddingModel] = None,
     ) -> None:
-        self.vector_store = vector_store or VectorStore()
-        self.embedding_model = embedding_model or EmbeddingModel()
+        self.vector_store = vector_store or get_vector_store()
+        self.embedding_model = embedding_model or create_embedding_model()
         self.feedback_service = FeedbackService()
 
     def retrieve_context(
@@ -42,79 +34,71 @@ class RAGPipeline:
         if top_k is None:
             top_k = settings.DEFAULT_TOP_K
 
+        # With feedback re-ranking on, fetch a larger candidate set, re-rank
+        # it and keep the best top_k (RERANK_CANDIDATES <= top_k: no over-fetch).
+        candidates = top_k
+        if settings.FEEDBACK_ENABLED:
+            candidates = max(top_k, settings.RERANK_CANDIDATES)
+
         try:
-            query_embedding = self.embedding_model.encode_query(query)
-            results = self.vector_store.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_metadata=True,
-                metadata_filter=metadata_filter,
-            )
+            with span("embed"):
+                query_embedding = self.embedding_model.encode_query(query)
+            with span("vector_query"):
+                results = self.vector_store.query(
+                    vector=query_embedding,
+                    top_k=candidates,
+                    include_metadata=True,
+                    metadata_filter=metadata_filter,
+                )
 
             matches = results.get("matches", [])
-
-            # Collect chunk IDs from Pinecone results and fetch the actual text rows from Supabase
-            chunk_ids = [m.get("id") for m in matches if m.get("id")]
-            db_rows = {}
-            try:
-                if chunk_ids:
-                    resp = supabase.table("document_chunks").select("*").in_("chunk_id", chunk_ids).execute()
-                    rows = getattr(resp, "data", []) or []
-                    db_rows = {r.get("chunk_id"): r for r in rows}
-            except Exception:
-                db_rows = {}
-
-            context_chunks: List[Dict[str, Any]] = []
-            for index, match in enumerate(matches, start=1):
-                metadata = match.get("metadata", {}) or {}
-                cid = match.get("id")
-                db_row = db_rows.get(cid, {}) if cid else {}
-
-                # Prefer text from Supabase row; fall back to Pinecone metadata if missing
-                text = db_row.get("content") or metadata.get("content") or metadata.get("text", "")
-
-                context_chunks.append({
-                    "rank": index,
-                    "score": match.get("score"),
-                    "text": text,
-                    "source": db_row.get("source") or metadata.get("source", ""),
-                    "source_type": db_row.get("source_type") or metadata.get("source_type", "document"),
-                    "chunk_id": cid,
-                    "doc_id": db_row.get("doc_id") or metadata.get("doc_id"),
-                    "section_id": db_row.get("section_id") or metadata.get("section_id"),
-                    "section_title": db_row.get("section_title") or metadata.get("section_title"),
-                    "section_path": db_row.get("section_path") or metadata.get("section_path"),
-                    "image_paths": db_row.get("image_paths") or metadata.get("image_paths", []),
-                    "block_ids": metadata.get("block_ids", []),
-                    "start_seconds": _to_float(db_row.get("start_seconds") or metadata.get("start_seconds")),
-                    "end_seconds": _to_float(db_row.get("end_seconds") or metadata.get("end_seconds")),
-                    "video_url": db_row.get("video_url") or metadata.get("video_url"),
-                    "txt_url": db_row.get("txt_url") or metadata.get("txt_url"),
-                    "srt_url": db_row.get("srt_url") or metadata.get("srt_url"),
-                    "vtt_url": db_row.get("vtt_url") or metadata.get("vtt_url"),
-                })
+            adjusted_scores: List[float] | None = None
 
             # ── Feedback-driven re-ranking (Phase 1 + Phase 2) ──────────────
+            # Runs on the bare matches (IDs and scores), so only the chunks
+            # that are kept need their text loaded.
             if settings.FEEDBACK_ENABLED:
-                ranked_chunk_ids = [c["chunk_id"] for c in context_chunks if c.get("chunk_id")]
+                ranked_chunk_ids = [m.get("id") for m in matches if m.get("id")]
                 if ranked_chunk_ids:
                     # Phase 1: global accumulated vote scores
-                    global_scores = self.feedback_service.get_chunk_scores(ranked_chunk_ids)
+                    with span("feedback_scores"):
+                        global_scores = self.feedback_service.get_chunk_scores(ranked_chunk_ids)
 
                     # Phase 2: query-aware weighted scores.
                     # Uses the query_embedding already computed above for Pinecone.
                     # get_query_aware_scores fails-open → returns {} if the
                     # migration/table isn't deployed yet, degrading to Phase 1 only.
-                    query_aware_scores = self.feedback_service.get_query_aware_scores(
-                        query_embedding, ranked_chunk_ids,
-                    )
+                    with span("feedback_query_scores"):
+                        query_aware_scores = self.feedback_service.get_query_aware_scores(
+                            query_embedding, ranked_chunk_ids,
+                        )
 
                     if global_scores or query_aware_scores:
-                        context_chunks = self.feedback_service.rerank(
-                            context_chunks,
-                            feedback_scores=global_scores,
-                            query_aware_scores=query_aware_scores,
-                        )
+                        with span("rerank"):
+                            order, adjusted = self.feedback_service.rerank_order(
+                                [m.get("score") for m in matches],
+                                [m.get("id") for m in matches],
+                                feedback_scores=global_scores,
+                                query_aware_scores=query_aware_scores,
+                            )
+                        order = order[:top_k].tolist()
+                        matches = [matches[i] for i in order]
+                        adjusted_scores = adjusted[order].tolist()
+            matches = matches[:top_k]
+
+            # Collect chunk IDs of the kept matches and fetch the actual text rows
+            # from Supabase (recently used rows come from the per-worker chunk cache)
+            chunk_ids = [m.get("id") for m in matches if m.get("id")]
+            with span("chunk_hydrate"):
+                db_rows = fetch_chunks(supabase, chunk_ids) if chunk_ids else {}
+
+            context_chunks: List[Dict[str, Any]] = [
+                build_context_chunk(index, match.get("score"), match.get("id"), db_rows.get(match.get("id")), match.get("metadata"))
+                for index, match in enumerate(matches, start=1)
+            ]
+            if adjusted_scores is not None:
+                for chunk, adjusted_score in zip(context_chunks, adjusted_scores):
+                    chunk["adjusted_score"] = adjusted_score
 
             return context_chunks
 
@@ -0,0 +1,139 @@
+"""
+Single place where backend code obtains Supabase clients.
+
+``create_client`` mirrors ``supabase.create_client`` but returns a client on
+the shared in-memory database when ``SUPABASE_BACKEND=memory``, so modules can
+swap ``from supabase import create_client`` for this import without other
+changes.
+
+Every real client is built on one process-wide ``httpx.Client`` whose
+connection pool is bounded by ``SUPABASE_POOL_MAX_CONNECTIONS``, so creating
+a client is cheap and requests reuse warm TLS connections instead of opening
+new ones:
+
+* ``get_client(url, key)`` – a cached client per key (service-role callers).
+* ``create_user_client(url, anon_key, access_token)`` – a client that sends
+  the user's token, so Row Level Security applies; only its headers are new.
+"""
+
+import threading
+from importlib.util import find_spec
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from supabase import create_client as _create_supabase_client
+from supabase.lib.client_options import SyncClientOptions
+
+from app.config import settings
+from app.core.metrics import HTTP_POOL_CONNECTIONS, HTTP_POOL_IN_FLIGHT
+
+_HAS_H2 = find_spec("h2") is not None
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_clients: Dict[Tuple[str, str], Any] = {}
+
+
+def use_memory_supabase() -> bool:
+    return settings.SUPABASE_BACKEND == "memory"
+
+
+# PostgREST (schema cache) and Postgres codes for "no such function / signature".
+_MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+
+def is_missing_function(exc: Exception) -> bool:
+    """Whether an RPC failed because the function is not deployed (not for any other reason)."""
+    if getattr(exc, "code", None) in _MISSING_FUNCTION_CODES:
+        return True
+    message = str(exc)
+    return "Could not find the function" in message or ("function" in message and "does not exist" in message)
+
+
+class _PooledTransport(httpx.HTTPTransport):
+    """HTTP transport that reports in-flight requests and pool size to ``/metrics``."""
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        HTTP_POOL_IN_FLIGHT.labels("supabase").inc()
+        try:
+            return super().handle_request(request)
+        finally:
+            HTTP_POOL_IN_FLIGHT.labels("supabase").dec()
+            stats = self.pool_stats()
+            HTTP_POOL_CONNECTIONS.labels("supabase", "open").set(stats["open"])
+            HTTP_POOL_CONNECTIONS.labels("supabase", "idle").set(stats["idle"])
+
+    def pool_stats(self) -> Dict[str, int]:
+        connections = list(getattr(self._pool, "connections", []))
+        return {"open": len(connections), "idle": sum(1 for c in connections if c.is_idle())}
+
+
+def shared_http_client() -> httpx.Client:
+    """The process-wide pooled HTTP client behind every Supabase client."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            limits = httpx.Limits(
+                max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_SECONDS,
+            )
+            _http_client = httpx.Client(
+                transport=_PooledTransport(limits=limits, http2=_HAS_H2),
+                timeout=httpx.Timeout(settings.SUPABASE_HTTP_TIMEOUT, connect=10.0),
+                follow_redirects=True,
+            )
+        return _http_client
+
+
+def pool_stats() -> Dict[str, int]:
+    """Open and idle connections of the shared pool (zeros before first use)."""
+    client = _http_client
+    if client is None or client.is_closed:
+        return {"open": 0, "idle": 0}
+    return client._transport.pool_stats()
+
+
+def _pooled_options(headers: Optional[Dict[str, str]] = None) -> SyncClientOptions:
+    # No token refresh timers or session storage: the backend never signs in.
+    return SyncClientOptions(
+        headers=dict(headers or {}),
+        auto_refresh_token=False,
+        persist_session=False,
+        httpx_client=shared_http_client(),
+    )
+
+
+def create_client(supabase_url: Optional[str], supabase_key: Optional[str], options: Any = None):
+    if use_memory_supabase():
+        from app.core.memory_supabase import MemorySupabaseClient, memory_database
+
+        return MemorySupabaseClient(memory_database)
+    return _create_supabase_client(supabase_url, supabase_key, options or _pooled_options())
+
+
+def get_client(supabase_url: Optional[str], supabase_key: Optional[str]):
+    """Shared client for ``(url, key)``; built once per process (and again if its pool was closed)."""
+    cache_key = (supabase_url or "", supabase_key or "")
+    client = _clients.get(cache_key)
+    if client is not None and not _is_closed(client):
+        return client
+    client = create_client(supabase_url, supabase_key)
+    with _lock:
+        _clients[cache_key] = client
+    return client
+
+
+def create_user_client(supabase_url: Optional[str], supabase_key: Optional[str], access_token: str):
+    """Client that acts as the user behind ``access_token`` (RLS applies) on the shared pool."""
+    if use_memory_supabase():
+        client = create_client(supabase_url, supabase_key)
+        client.auth.set_session(access_token=access_token, refresh_token="")
+        return client
+    return create_client(supabase_url, supabase_key, _pooled_options({"Authorization": f"Bearer {access_token}"}))
+
+
+def _is_closed(client: Any) -> bool:
+    options = getattr(client, "options", None)
+    http_client = getattr(options, "httpx_client", None)
+    return http_client is not None and http_client.is_closed
@@ -1,9 +1,10 @@
 import os
 from pathlib import Path
-from supabase import create_client
 from dotenv import load_dotenv
 import certifi
 
+from app.core.supabase_clients import create_client, use_memory_supabase
+
 # Load environment variables
 BASE_DIR = Path(__file__).resolve().parents[2]
 load_dotenv(BASE_DIR / ".env")
@@ -18,7 +19,7 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 # This key bypasses Row Level Security (RLS) for backend operations
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+if not use_memory_supabase() and (not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY):
     raise RuntimeError(
         "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are required for backend operations. "
         "SERVICE_ROLE_KEY is needed to bypass RLS for admin operations."
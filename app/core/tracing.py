@@ -0,0 +1,149 @@
+"""
+Lightweight per-request stage timing.
+
+``span("name")`` times a block and adds it to the trace of the request being
+handled.  The trace lives in a ``ContextVar`` set by ``ServerTimingMiddleware``
+(installed only when ``TRACING_ENABLED`` is on), so outside a traced request a
+span is a single ``ContextVar.get()`` and a shared no-op context manager.
+
+At the end of a traced request the spans are written as one JSON log line and
+as a ``Server-Timing`` response header, which browser dev tools show next to
+the request:
+
+    Server-Timing: auth;dur=12.1, embed;dur=3.4, vector_query;dur=41.0, llm;dur=903.2, total;dur=980.5
+
+Spans with the same name are summed (and their count reported), so repeated
+steps such as the two ``chat_messages`` inserts show up as one entry.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_NOOP = contextlib.nullcontext()
+
+
+class RequestTrace:
+    """Stage durations collected while handling one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                self._stages[name] = [duration_ms, 1]
+            else:
+                stage[0] += duration_ms
+                stage[1] += 1
+
+    @property
+    def stages(self) -> Dict[str, Tuple[float, int]]:
+        """``{name: (total_ms, count)}`` in the order stages first finished."""
+        with self._lock:
+            return {name: (total, int(count)) for name, (total, count) in self._stages.items()}
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        parts = []
+        for name, (duration, count) in self.stages.items():
+            entry = f"{name};dur={duration:.1f}"
+            if count > 1:
+                entry += f';desc="x{count}"'
+            parts.append(entry)
+        parts.append(f"total;dur={(self.total_ms() if total_ms is None else total_ms):.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_started")
+
+    def __init__(self, trace: RequestTrace, name: str) -> None:
+        self._trace = trace
+        self._name = name
+
+    def __enter__(self) -> "_Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._trace.add(self._name, (time.perf_counter() - self._started) * 1000.0)
+
+
+def span(name: str):
+    """Time the enclosed block as stage ``name`` of the current request (no-op when untraced)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def start_trace() -> Iterator[RequestTrace]:
+    """Collect spans outside an HTTP request (scripts, benchmarks)."""
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that traces each HTTP request and reports its stages."""
+
+    def __init__(self, app: Callable, log_level: int = logging.INFO) -> None:
+        self.app = app
+        self.log_level = log_level
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status_code = 500
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            stages = trace.stages
+            if stages:
+                logger.log(self.log_level, "request_trace %s", json.dumps({
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "total_ms": round(trace.total_ms(), 2),
+                    "stages": {name: {"ms": round(ms, 2), "count": count} for name, (ms, count) in stages.items()},
+                }))
@@ -1,42 +1,141 @@
-from typing import List, Dict, Any, Optional
-from pinecone import Pinecone, ServerlessSpec
+from typing import List, Dict, Any, Optional, Tuple
+from collections import Counter
+import contextlib
 import logging
+import threading
+import time
 from app.config import settings
+from app.core.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
+# ---------------------------------------------------------------------------
+# Process-wide Pinecone client and index handles
+# ---------------------------------------------------------------------------
+# One control-plane client and one data-plane ``Index`` per index name are
+# shared by every store, so the HTTP connection pools are reused and
+# list_indexes() / create_index() run once per process instead of once per
+# module that needs a store.
+
+_registry_lock = threading.RLock()
+_client = None
+_index_handles: Dict[str, Any] = {}
+_index_info: Dict[str, Dict[str, Any]] = {}
+_stores: Dict[Tuple[str, Optional[str]], "VectorStore"] = {}
+
+
+def pinecone_client():
+    """The shared Pinecone client (created on first call)."""
+    global _client
+    if _client is None:
+        with _registry_lock:
+            if _client is None:
+                from pinecone import Pinecone
+
+                _client = Pinecone(api_key=settings.PINECONE_API_KEY)
+    return _client
+
+
+def _index_handle(index_name: str):
+    """Shared data-plane handle for ``index_name``, creating the index if it does not exist."""
+    handle = _index_handles.get(index_name)
+    if handle is not None:
+        return handle
+    with _registry_lock:
+        handle = _index_handles.get(index_name)
+        if handle is not None:
+            return handle
+        from pinecone import ServerlessSpec
+
+        pc = pinecone_client()
+        started = time.perf_counter()
+        created = False
+        with track_call("pinecone", "list_indexes"):
+            existing = pc.list_indexes().names()
+        if index_name not in existing:
+            pc.create_index(
+                name=index_name,
+                dimension=settings.EMBED_DIMENSION,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud=settings.PINECONE_CLOUD,
+                    region=settings.PINECONE_REGION
+                )
+            )
+            created = True
+            logger.info(f"Created new Pinecone index: {index_name}")
+        if settings.PINECONE_POOL_THREADS > 0:
+            handle = pc.Index(index_name, pool_threads=settings.PINECONE_POOL_THREADS)
+        else:
+            handle = pc.Index(index_name)
+        _index_handles[index_name] = handle
+        _index_info[index_name] = {
+            "connected_at": time.time(),
+            "connect_ms": round((time.perf_counter() - started) * 1000.0, 1),
+            "created": created,
+        }
+        logger.info(f"Connected to Pinecone index: {index_name}")
+        return handle
+
+
 class VectorStore:
     """Pinecone vector store management."""
+
+    # ``service`` label for external-call metrics.
+    metrics_service = "pinecone"
     
     def __init__(self, index_name: Optional[str] = None, namespace: Optional[str] = None):
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        self.pc = None
         self.index_name = index_name or settings.PINECONE_INDEX_NAME
         self.namespace = namespace if namespace is not None else getattr(settings, "PINECONE_NAMESPACE", None)
-        self.index = None
-        self._initialize_index()
-    
+        # Connected on first use rather than here, so importing the routers
+        # that build stores at module level makes no Pinecone round trips.
+        self._index = None
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._initialize_index()
+        return self._index
+
+    @index.setter
+    def index(self, value) -> None:
+        self._index = value
+
     def _initialize_index(self):
         """Initialize Pinecone index."""
         try:
-            # Create index if it doesn't exist
-            if self.index_name not in self.pc.list_indexes().names():
-                self.pc.create_index(
-                    name=self.index_name,
-                    dimension=settings.EMBED_DIMENSION,
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud=settings.PINECONE_CLOUD,
-                        region=settings.PINECONE_REGION
-                    )
-                )
-                logger.info(f"Created new Pinecone index: {self.index_name}")
-            
-            self.index = self.pc.Index(self.index_name)
-            logger.info(f"Connected to Pinecone index: {self.index_name}")
-            
+            self.pc = pinecone_client()
+            self.index = _index_handle(self.index_name)
         except Exception as e:
             logger.error(f"Failed to initialize Pinecone index: {e}")
             raise
+
+    @contextlib.contextmanager
+    def _track(self, operation: str):
+        """Count a call on this store and record it in the external-call metrics."""
+        self.calls[operation] += 1
+        try:
+            with track_call(self.metrics_service, operation):
+                yield
+        except Exception:
+            self.errors[operation] += 1
+            raise
+
+    def is_connected(self) -> bool:
+        return self._index is not None
+
+    def connection_stats(self) -> Dict[str, Any]:
+        return {
+            "index_name": self.index_name,
+            "namespace": self.namespace,
+            "backend": self.metrics_service,
+            "connected": self.is_connected(),
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+        }
     
     def upsert_vectors(self, vectors: List[tuple]) -> Dict[str, Any]:
         """Upsert vectors to Pinecone index."""
@@ -44,7 +143,8 @@ class VectorStore:
             kwargs = {}
             if self.namespace:
                 kwargs["namespace"] = self.namespace
-            response = self.index.upsert(vectors=vectors, **kwargs)
+            with self._track("upsert"):
+                response = self.index.upsert(vectors=vectors, **kwargs)
             logger.info(f"Upserted {len(vectors)} vectors to index")
             return response
         except Exception as e:
@@ -70,7 +170,8 @@ class VectorStore:
             if self.namespace:
                 kwargs["namespace"] = self.namespace
 
-            response = self.index.query(**kwargs)
+            with self._track("query"):
+                response = self.index.query(**kwargs)
             return response
         except Exception as e:
             logger.error(f"Failed to query vectors: {e}")
@@ -84,7 +185,8 @@ class VectorStore:
             kwargs = {}
             if self.namespace:
                 kwargs["namespace"] = self.namespace
-            self.index.delete(ids=chunk_ids, **kwargs)
+            with self._track("delete"):
+                self.index.delete(ids=chunk_ids, **kwargs)
             logger.info(f"Deleted {len(chunk_ids)} vectors from index")
         except Exception as e:
             logger.error(f"Failed to delete vectors: {e}")
@@ -101,8 +203,60 @@ class VectorStore:
     def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics."""
         try:
-            stats = self.index.describe_index_stats()
+            with self._track("describe_index_stats"):
+                stats = self.index.describe_index_stats()
             return stats
         except Exception as e:
             logger.error(f"Failed to get index stats: {e}")
             raise
+
+
+def create_vector_store(index_name: Optional[str] = None, namespace: Optional[str] = None) -> VectorStore:
+    """Build a new store for the configured backend (Pinecone, or in-memory when ``VECTOR_STORE_BACKEND=memory``).
+
+    Application code should use ``get_vector_store`` so stores are shared.
+    """
+    if settings.VECTOR_STORE_BACKEND == "memory":
+        from app.core.memory_vector_store import InMemoryVectorStore
+
+        return InMemoryVectorStore(index_name=index_name, namespace=namespace)
+    return VectorStore(index_name=index_name, namespace=namespace)
+
+
+def get_vector_store(index_name: Optional[str] = None, namespace: Optional[str] = None) -> VectorStore:
+    """The process-wide store for ``(index_name, namespace)``; connects lazily on first use."""
+    index_name = index_name or settings.PINECONE_INDEX_NAME
+    if namespace is None:
+        namespace = getattr(settings, "PINECONE_NAMESPACE", None)
+    key = (index_name, namespace)
+    store = _stores.get(key)
+    if store is None:
+        with _registry_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = create_vector_store(index_name=index_name, namespace=namespace)
+    return store
+
+
+def vector_store_stats() -> Dict[str, Any]:
+    """Connection stats for the shared client, index handles and stores."""
+    with _registry_lock:
+        stores = list(_stores.values())
+        indexes = {name: dict(info) for name, info in _index_info.items()}
+    return {
+        "backend": settings.VECTOR_STORE_BACKEND,
+        "client_created": _client is not None,
+        "pool_threads": settings.PINECONE_POOL_THREADS or None,
+        "indexes": indexes,
+        "stores": [store.connection_stats() for store in stores],
+    }
+
+
+def reset_vector_stores() -> None:
+    """Forget shared stores, handles and the client (tests / benchmarks)."""
+    global _client
+    with _registry_lock:
+        _stores.clear()
+        _index_handles.clear()
+        _index_info.clear()
+        _client = None
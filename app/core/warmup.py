@@ -0,0 +1,143 @@
+"""
+Startup warmup and readiness.
+
+The first chat request after a deploy used to pay for loading the embedding
+model, the first-call overheads of PyTorch, the Pinecone TLS handshake and the
+OpenAI SDK import, which regularly exceeded the proxy timeout.  ``run_warmup``
+does that work in a background thread started by the lifespan hook:
+
+* ``embedding_model`` – load the model and encode a dummy batch and query.
+* ``vector_store``    – connect the shared stores and make one stats call.
+* ``llm_sdk``         – import the OpenAI SDK (when Azure OpenAI is configured).
+
+``GET /api/health/ready`` answers 503 until these steps have finished and 200
+afterwards, so the load balancer only routes traffic to warm workers.  A step
+that fails is reported but does not keep the worker out of rotation: the work
+is retried lazily on first use, as it was before warmup existed.
+
+Optional steps (the Whisper preload) are recorded with ``required=False`` and
+never gate readiness.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Progress of the warmup steps in this worker."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._finished = threading.Event()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def start(self) -> None:
+        self.started_at = time.time()
+
+    def record(self, name: str, status: str, required: bool = True, **details: Any) -> None:
+        with self._lock:
+            self._steps[name] = {"status": status, "required": required, **details}
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+        self._finished.set()
+
+    def skip(self) -> None:
+        """Mark the worker ready without warming up (``WARMUP_ENABLED=false``)."""
+        self.record("warmup", "skipped")
+        self.finish()
+
+    @property
+    def ready(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(step) for name, step in self._steps.items()}
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {"ready": self.ready, "elapsed_s": elapsed, "steps": steps}
+
+
+state = WarmupState()
+
+
+def run_step(name: str, fn: Callable[..., Any], *args: Any, required: bool = True, state: WarmupState = state) -> bool:
+    """Run one warmup step, recording its duration and outcome; never raises."""
+    state.record(name, "running", required=required)
+    started = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as exc:
+        duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        logger.warning(f"Warmup step {name} failed after {duration_ms} ms: {exc}")
+        state.record(name, "failed", required=required, duration_ms=duration_ms, detail=str(exc))
+        return False
+    duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+    logger.info(f"Warmup step {name} finished in {duration_ms} ms")
+    state.record(name, "ok", required=required, duration_ms=duration_ms)
+    return True
+
+
+def warm_embedding_model() -> None:
+    from app.core.embeddings import create_embedding_model
+
+    model = create_embedding_model()
+    model.load_model()
+    # The first encode calls pay one-off allocation / kernel selection costs.
+    model.encode(["warmup"] * max(1, settings.WARMUP_BATCH_SIZE))
+    model.encode_query("warmup query")
+
+
+def warm_vector_stores() -> None:
+    from app.core.vector_store import get_vector_store
+
+    names = {settings.PINECONE_INDEX_NAME, settings.PINECONE_VIDEO_INDEX_NAME or settings.PINECONE_INDEX_NAME}
+    for index_name in sorted(names):
+        get_vector_store(index_name).get_index_stats()
+
+
+def warm_llm_sdk() -> None:
+    if settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_ENDPOINT:
+        import openai  # noqa: F401
+
+
+DEFAULT_STEPS: Tuple[Tuple[str, Callable[[], Any]], ...] = (
+    ("embedding_model", warm_embedding_model),
+    ("vector_store", warm_vector_stores),
+    ("llm_sdk", warm_llm_sdk),
+)
+
+
+def run_warmup(
+    steps: Sequence[Tuple[str, Callable[[], Any]]] = DEFAULT_STEPS,
+    state: WarmupState = state,
+) -> Dict[str, Any]:
+    """Run the required warmup steps in order, then mark the worker ready."""
+    state.start()
+    try:
+        for name, fn in steps:
+            run_step(name, fn, state=state)
+    finally:
+        state.finish()
+    snapshot = state.snapshot()
+    failed: List[str] = [name for name, step in snapshot["steps"].items() if step["status"] == "failed"]
+    if failed:
+        logger.warning(f"Warmup finished in {snapshot['elapsed_s']}s with failed steps: {', '.join(failed)}")
+    else:
+        logger.info(f"Warmup finished in {snapshot['elapsed_s']}s; worker is ready")
+    return snapshot
@@ -2,9 +2,11 @@ from typing import List, Dict, Any, Optional, Tuple
 import re
 import logging
 from app.core.rag import RAGPipeline
-from app.core.vector_store import VectorStore
-from app.core.embeddings import EmbeddingModel
+from app.core.vector_store import VectorStore, get_vector_store
+from app.core.embeddings import create_embedding_model
 from app.services.document_processor import DocumentProcessor
+from app.core.metrics import record_llm_usage, track_call
+from app.core.tracing import span
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -13,8 +15,8 @@ class ChatService:
     """Main service for chatbot interactions."""
     
     def __init__(self):
-        self.embedding_model = EmbeddingModel()
-        self.vector_store = VectorStore()
+        self.embedding_model = create_embedding_model()
+        self.vector_store = get_vector_store()
         self.document_rag_pipeline = RAGPipeline(
             vector_store=self.vector_store,
             embedding_model=self.embedding_model,
@@ -24,7 +26,7 @@ class ChatService:
         if video_index_name == self.vector_store.index_name:
             self.video_vector_store = self.vector_store
         else:
-            self.video_vector_store = VectorStore(index_name=video_index_name)
+            self.video_vector_store = get_vector_store(index_name=video_index_name)
         self.video_rag_pipeline = RAGPipeline(
             vector_store=self.video_vector_store,
             embedding_model=self.embedding_model,
@@ -91,7 +93,9 @@ class ChatService:
                 top_k = settings.DEFAULT_TOP_K
             
             # Check if vector store has any data
-            if self._is_vector_store_empty():
+            with span("index_stats"):
+                vector_store_empty = self._is_vector_store_empty()
+            if vector_store_empty:
                 return {
                     "success": False,
                     "question": question,
@@ -102,7 +106,8 @@ class ChatService:
                 }
             
             # Retrieve relevant context
-            context_chunks = self.document_rag_pipeline.retrieve_context(question, top_k)
+            with span("retrieve"):
+                context_chunks = self.document_rag_pipeline.retrieve_context(question, top_k)
             
             # Filter and rank images from context chunks
             relevant_images = self._filter_and_rank_images(context_chunks, max_images=3, min_score=0.3)
@@ -117,7 +122,8 @@ class ChatService:
             llm_succeeded = False
             if settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_ENDPOINT:
                 try:
-                    answer, image_positions = self._generate_llm_answer(question, formatted_context, relevant_images, conversation_history)
+                    with span("llm"):
+                        answer, image_positions = self._generate_llm_answer(question, formatted_context, relevant_images, conversation_history)
                     # Strip [IMAGE: ...] markers and [CHUNKS_CITED: ...] annotations from the answer text
                     answer = re.sub(r'\[IMAGE:\s*[^\]]+\]', '', answer)
                     answer = re.sub(r'\[CHUNKS_CITED:[^\]]+\]', '', answer)
@@ -522,12 +528,14 @@ class ChatService:
             # Add current question
             messages.append({"role": "user", "content": user_prompt})
 
-            resp = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                temperature=0.2,
-                max_tokens=500,
-            )
+            with span("llm_completion"), track_call("azure_openai", "chat_completion"):
+                resp = client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=500,
+                )
+            record_llm_usage(getattr(resp, "usage", None))
             content = resp.choices[0].message.content if resp and resp.choices else None
             if not content:
                 raise RuntimeError("Empty response from Azure OpenAI")
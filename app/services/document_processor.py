@@ -3,6 +3,7 @@ from __future__ import annotations
 #TODO: Add an engpoint to upload a file to be ingested. Like a drag and drop featue or selct from folder
 
 import hashlib
+import importlib.util
 import logging
 import os
 import re
@@ -20,27 +21,20 @@ from docx.document import Document as _DocxDocument
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 
+# The PDF libraries are only checked for here and imported where they are
+# used, so importing this module (and the API routers) stays fast.
+
 # PDF support
-try:
-    import pdfplumber
-    _HAS_PDFPLUMBER = True
-except ImportError:
-    _HAS_PDFPLUMBER = False
+_HAS_PDFPLUMBER = importlib.util.find_spec("pdfplumber") is not None
 
 # pymupdf for structured PDF extraction (headings, images, tables)
-try:
-    import fitz  # pymupdf
-    _HAS_PYMUPDF = True
-except ImportError:
-    _HAS_PYMUPDF = False
+_HAS_PYMUPDF = importlib.util.find_spec("fitz") is not None
 
 # OCR fallback support for scanned/image-only PDFs
-try:
-    import pytesseract
-    from pdf2image import convert_from_path, pdfinfo_from_path
-    _HAS_PDF_OCR = True
-except ImportError:
-    _HAS_PDF_OCR = False
+_HAS_PDF_OCR = (
+    importlib.util.find_spec("pytesseract") is not None
+    and importlib.util.find_spec("pdf2image") is not None
+)
 
 from app.config import settings  # if you need settings in the future
 
@@ -66,6 +60,8 @@ def _configure_tesseract_from_env() -> None:
 
     tesseract_cmd = os.getenv("TESSERACT_CMD")
     if tesseract_cmd:
+        import pytesseract
+
         pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
 
 # Optional Windows COM for high-fidelity DOC->DOCX
@@ -144,6 +140,9 @@ def _extract_pdf_text_with_ocr(pdf_path: Path) -> str:
     if not _HAS_PDF_OCR:
         return ""
 
+    import pytesseract
+    from pdf2image import convert_from_path, pdfinfo_from_path
+
     _configure_tesseract_from_env()
 
     # Determine total page count first (cheap — no rendering involved)
@@ -324,6 +323,9 @@ class DocumentProcessor:
           - Extracts embedded images (SHA1 dedup, same _ImageRecord path as DOCX)
           - Feeds sections into the shared _build_chunks() — identical to DOCX chunking
         """
+        import fitz  # pymupdf
+        import pdfplumber
+
         doc_slug = _slugify(pdf_path.stem)
 
         try:
@@ -531,6 +533,8 @@ class DocumentProcessor:
         any_text_found = False
 
         try:
+            import pdfplumber
+
             with pdfplumber.open(str(pdf_path)) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text() or ""
@@ -4,9 +4,11 @@ import os, json
 from dataclasses import dataclass
 from typing import Dict, List
 from pathlib import Path
-from supabase import create_client
 from dotenv import load_dotenv
 
+from app.core.chunk_cache import chunk_cache
+from app.core.supabase_clients import create_client, use_memory_supabase
+
 BASE_DIR = Path(__file__).resolve().parents[2]
 load_dotenv(BASE_DIR / ".env")
 
@@ -33,7 +35,7 @@ class SupabaseContentRepository:
         self.video_bucket = os.getenv("SUPABASE_BUCKET_VIDEOS") or os.getenv("SUPABASE_BUCKET", "cfc-videos")
         self.bucket = self.doc_bucket  # backward-compat alias
 
-        if not self.url or not self.key:
+        if not use_memory_supabase() and (not self.url or not self.key):
             raise RuntimeError(
                 "Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY. "
                 "SERVICE_ROLE_KEY is required for backend storage operations."
@@ -143,6 +145,7 @@ class SupabaseContentRepository:
 
         try:
             self.client.table("document_chunks").delete().eq("doc_id", doc_id).execute()
+            chunk_cache.invalidate(doc_id=doc_id)
         except Exception:
             pass
 
@@ -161,5 +164,6 @@ class SupabaseContentRepository:
 
         try:
             self.client.table("document_chunks").delete().eq("doc_id", slug).execute()
+            chunk_cache.invalidate(doc_id=slug)
         except Exception:
             pass
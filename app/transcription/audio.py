@@ -0,0 +1,250 @@
+"""
+ffmpeg helpers shared by the transcription pipeline: locating the binary,
+probing media duration, finding silent stretches, decoding a time window of a
+file straight into the 16 kHz mono float32 array Whisper consumes, and
+extracting an upload's audio track once into a content-addressed cache.
+
+Tracks an upload is still transcribing are held with ``hold_audio_track`` /
+``release_audio_track`` (reference counted, per process), and
+``prune_audio_cache`` never deletes a held track: chunked transcription
+reopens the file for every window.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper's native sample rate
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+
+# Cached tracks in use by a transcription in this process -> number of holders.
+_held_tracks: Dict[Path, int] = {}
+_held_lock = threading.Lock()
+
+
+def ffmpeg_binary() -> Optional[str]:
+    """Return the ffmpeg executable: system PATH first, then imageio-ffmpeg's bundled copy."""
+    found = shutil.which("ffmpeg")
+    if found:
+        return found
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _require_ffmpeg() -> str:
+    binary = ffmpeg_binary()
+    if not binary:
+        raise RuntimeError("ffmpeg binary not found; install ffmpeg or imageio-ffmpeg")
+    return binary
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Return the media duration in seconds, or None if ffmpeg cannot read it."""
+    binary = ffmpeg_binary()
+    if not binary:
+        return None
+    try:
+        # ffmpeg exits non-zero without an output file but still prints the header.
+        proc = subprocess.run(
+            [binary, "-hide_banner", "-i", path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=60,
+        )
+    except Exception as exc:
+        logger.warning("ffmpeg probe failed for %s: %s", path, exc)
+        return None
+    match = _DURATION_RE.search(proc.stderr.decode("utf-8", "replace"))
+    if not match:
+        return None
+    h, m, s = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def parse_silences(ffmpeg_log: str, duration: Optional[float] = None) -> List[Tuple[float, float]]:
+    """Extract (start, end) pairs from ffmpeg ``silencedetect`` log output."""
+    silences: List[Tuple[float, float]] = []
+    pending_start: Optional[float] = None
+    for line in ffmpeg_log.splitlines():
+        start = _SILENCE_START_RE.search(line)
+        if start:
+            pending_start = max(0.0, float(start.group(1)))
+            continue
+        end = _SILENCE_END_RE.search(line)
+        if end and pending_start is not None:
+            silences.append((pending_start, float(end.group(1))))
+            pending_start = None
+    # Trailing silence runs to end-of-file without a silence_end line.
+    if pending_start is not None and duration is not None and duration > pending_start:
+        silences.append((pending_start, duration))
+    return silences
+
+
+def detect_silences(
+    path: str,
+    noise_db: float = -30.0,
+    min_silence_seconds: float = 0.5,
+    duration: Optional[float] = None,
+) -> List[Tuple[float, float]]:
+    """Run ffmpeg ``silencedetect`` over the audio track and return silent intervals."""
+    binary = _require_ffmpeg()
+    proc = subprocess.run(
+        [
+            binary, "-hide_banner", "-nostats", "-i", path,
+            "-vn", "-af", f"silencedetect=noise={noise_db}dB:d={min_silence_seconds}",
+            "-f", "null", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {proc.stderr.decode('utf-8', 'replace')[-500:]}")
+    return parse_silences(proc.stderr.decode("utf-8", "replace"), duration)
+
+
+def load_audio_window(path: str, start: float = 0.0, duration: Optional[float] = None) -> np.ndarray:
+    """Decode ``[start, start + duration)`` of a file to 16 kHz mono float32 in [-1, 1]."""
+    binary = _require_ffmpeg()
+    cmd = [binary, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {proc.stderr.decode('utf-8', 'replace')[-500:]}")
+    return np.frombuffer(proc.stdout, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_track_path(cache_dir: Path, content_hash: str) -> Path:
+    """Where ``extract_audio_track`` caches the track of a source with this SHA-256."""
+    return Path(cache_dir) / f"{content_hash}.wav"
+
+
+def hold_audio_track(track: Path) -> None:
+    """Protect a cached track from ``prune_audio_cache`` until it is released."""
+    key = Path(track).resolve()
+    with _held_lock:
+        _held_tracks[key] = _held_tracks.get(key, 0) + 1
+
+
+def release_audio_track(track: Path) -> None:
+    key = Path(track).resolve()
+    with _held_lock:
+        count = _held_tracks.get(key, 0) - 1
+        if count > 0:
+            _held_tracks[key] = count
+        else:
+            _held_tracks.pop(key, None)
+
+
+def extract_audio_track(path: str, cache_dir: Path, content_hash: Optional[str] = None) -> Path:
+    """
+    Return a 16 kHz mono 16-bit WAV of ``path``'s audio, extracting it only once.
+
+    The file is keyed by the source's SHA-256, so re-uploads and
+    re-transcriptions with another model reuse the same track instead of
+    decoding the video again.  The WAV is what Whisper would have resampled
+    to anyway and is typically a fraction of the size of the video.
+    """
+    content_hash = content_hash or file_sha256(path)
+    cache_dir = Path(cache_dir)
+    target = audio_track_path(cache_dir, content_hash)
+    if target.exists():
+        os.utime(target)  # mark as recently used for pruning
+        record_cache("audio_tracks", hit=True)
+        return target
+    record_cache("audio_tracks", hit=False)
+
+    binary = _require_ffmpeg()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write to a temp name and rename, so a crash never leaves a truncated cache entry.
+    fd, partial = tempfile.mkstemp(dir=cache_dir, suffix=".wav.part")
+    os.close(fd)
+    try:
+        proc = subprocess.run(
+            [
+                binary, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", path, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-c:a", "pcm_s16le", "-f", "wav", partial,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to extract audio: {proc.stderr.decode('utf-8', 'replace')[-500:]}")
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return target
+
+
+def prune_audio_cache(cache_dir: Path, max_bytes: int, protected: Iterable[Path] = ()) -> int:
+    """
+    Delete least-recently-used cached tracks until the cache fits in
+    ``max_bytes``. Returns files removed.
+
+    ``protected`` tracks and held ones (``hold_audio_track``) are never
+    deleted but still count towards the size, so the cache may stay over
+    the limit while they are in use.
+    """
+    cache_dir = Path(cache_dir)
+    if max_bytes <= 0 or not cache_dir.exists():
+        return 0
+    with _held_lock:
+        keep = set(_held_tracks)
+    keep.update(Path(track).resolve() for track in protected)
+    entries = []
+    for entry in cache_dir.glob("*.wav"):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if entry.resolve() in keep:
+            continue
+        try:
+            entry.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
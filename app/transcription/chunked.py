@@ -0,0 +1,316 @@
+"""
+Chunked, parallel transcription for long videos.
+
+A single ``model.transcribe`` call on a one-hour recording runs on one core
+and produces nothing until it finishes.  This module instead:
+
+1. finds silent stretches with ffmpeg ``silencedetect``;
+2. splits the timeline into ~``TRANSCRIBE_WINDOW_SECONDS`` windows whose cut
+   points land in the silence closest to each target boundary, padding every
+   window with ``TRANSCRIBE_WINDOW_OVERLAP_SECONDS`` of context on both sides;
+3. detects the spoken language once on the first window (unless given),
+   then transcribes every window in that language across a process pool with
+   the selected backend.  Each worker keeps the job's model resident between
+   jobs, so the pool holds one model copy per worker; the number of workers
+   is capped by ``TRANSCRIBE_MEMORY_BUDGET_MB`` divided by the model's
+   estimated footprint (``model_memory_mb``);
+4. shifts segment timestamps back onto the original timeline and keeps each
+   segment only in the window that owns its midpoint, so the overlap never
+   produces duplicate captions;
+5. yields windows in timeline order as soon as each one (and all before it)
+   is done, so callers can index partial transcripts while the rest of the
+   file is still being processed.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.metrics import QUEUE_DEPTH
+from app.transcription.audio import detect_silences, load_audio_window, probe_duration
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AudioWindow:
+    """A slice of the timeline: decoded range plus the range it owns after stitching."""
+
+    index: int
+    start: float
+    end: float
+    core_start: float
+    core_end: float
+    is_last: bool = False
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def owns(self, timestamp: float) -> bool:
+        if timestamp < self.core_start:
+            return False
+        return self.is_last or timestamp < self.core_end
+
+
+def plan_windows(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    window_seconds: float,
+    overlap_seconds: float = 0.0,
+    search_seconds: Optional[float] = None,
+) -> List[AudioWindow]:
+    """Split ``[0, duration]`` into windows cut at silence midpoints near each target boundary."""
+    if duration <= 0:
+        return []
+    if search_seconds is None:
+        search_seconds = window_seconds * 0.2
+    midpoints = sorted((start + end) / 2 for start, end in silences)
+
+    cuts: List[float] = []
+    pos = 0.0
+    # Stop once the remainder fits in one window (plus slack) to avoid a tiny tail window.
+    while duration - pos > window_seconds + search_seconds:
+        target = pos + window_seconds
+        candidates = [m for m in midpoints if abs(m - target) <= search_seconds and pos < m < duration]
+        cut = min(candidates, key=lambda m: abs(m - target)) if candidates else target
+        cuts.append(cut)
+        pos = cut
+
+    bounds = [0.0] + cuts + [duration]
+    last = len(bounds) - 2
+    return [
+        AudioWindow(
+            index=i,
+            start=max(0.0, core_start - overlap_seconds),
+            end=min(duration, core_end + overlap_seconds),
+            core_start=core_start,
+            core_end=core_end,
+            is_last=(i == last),
+        )
+        for i, (core_start, core_end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def stitch_window_segments(window: AudioWindow, segments: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Shift window-relative segments onto the full timeline and drop ones owned by a neighbour."""
+    stitched: List[Dict[str, Any]] = []
+    for seg in segments:
+        start = window.start + float(seg["start"])
+        end = window.start + float(seg["end"])
+        if window.owns((start + end) / 2):
+            stitched.append({"start": start, "end": end, "text": seg["text"]})
+    return stitched
+
+
+# ── Worker side (runs inside pool processes) ─────────────────────────────────
+
+def _init_worker(torch_threads: int) -> None:
+    """Keep each worker to its share of cores and to one resident model."""
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+    # The pool is sized for one model per worker (see worker_count).
+    from app.transcription.backends import BACKENDS
+
+    for backend in BACKENDS.values():
+        backend.models.max_resident = 1
+
+
+def _transcribe_window(
+    path: str,
+    window: AudioWindow,
+    model_name: str,
+    language: Optional[str],
+    backend_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    from app.transcription.backends import get_backend
+
+    audio = load_audio_window(path, window.start, window.duration)
+    if audio.size == 0:
+        return []
+    raw = get_backend(backend_name).transcribe(audio, model_name, language)
+    return stitch_window_segments(window, raw)
+
+
+def _detect_window_language(
+    path: str,
+    window: AudioWindow,
+    model_name: str,
+    backend_name: Optional[str] = None,
+) -> Optional[str]:
+    from app.transcription.backends import get_backend
+
+    audio = load_audio_window(path, window.start, min(window.duration, 30.0))
+    if audio.size == 0:
+        return None
+    return get_backend(backend_name).detect_language(audio, model_name)
+
+
+# ── Pool management ──────────────────────────────────────────────────────────
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Rough resident size (MB) of one loaded model while it decodes: fp32 weights
+# of the openai-whisper checkpoints plus activations and runtime overhead.
+_MODEL_MEMORY_MB = {
+    "tiny": 400,
+    "base": 600,
+    "small": 1500,
+    "medium": 4500,
+    "turbo": 5000,
+    "large": 9000,
+}
+
+
+def model_memory_mb(model_name: str) -> int:
+    """Estimated memory of one worker holding ``model_name`` (unknown names: as large)."""
+    family = model_name.strip().lower().split(".")[0].split("-")[0]
+    return _MODEL_MEMORY_MB.get(family, _MODEL_MEMORY_MB["large"])
+
+
+def _memory_budget_mb() -> Optional[float]:
+    """``TRANSCRIBE_MEMORY_BUDGET_MB``, or half the physical memory if unset (None if unknown)."""
+    if settings.TRANSCRIBE_MEMORY_BUDGET_MB > 0:
+        return settings.TRANSCRIBE_MEMORY_BUDGET_MB
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+    return total / (1024 * 1024) / 2
+
+
+def worker_count(model_name: Optional[str] = None) -> int:
+    """
+    Pool size: ``TRANSCRIBE_WORKERS`` (0 = half the cores, at least one),
+    lowered so that one copy of ``model_name`` per worker fits the memory budget.
+    """
+    configured = settings.TRANSCRIBE_WORKERS
+    workers = configured if configured and configured > 0 else max(1, (os.cpu_count() or 2) // 2)
+    budget = _memory_budget_mb()
+    if model_name and budget is not None:
+        workers = min(workers, max(1, int(budget // model_memory_mb(model_name))))
+    return workers
+
+
+def _get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    workers = workers or worker_count()
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            # Sized for another model: its workers would load this one next to
+            # their resident model anyway, so start over with the right size.
+            # Jobs already queued on the old pool still finish there.
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            logger.info("Starting transcription pool: %d workers x %d torch threads", workers, torch_threads)
+            # spawn, not fork: the API process has live threads and possibly torch state.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(torch_threads,),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop pool workers (called from the lifespan shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ── Public API ───────────────────────────────────────────────────────────────
+
+def iter_transcribed_windows(
+    path: str,
+    model_name: str = "small",
+    language: Optional[str] = None,
+    duration: Optional[float] = None,
+    backend_name: Optional[str] = None,
+) -> Iterator[Tuple[AudioWindow, List[Dict[str, Any]]]]:
+    """Transcribe ``path`` window by window, yielding ``(window, segments)`` in timeline order."""
+    if duration is None:
+        duration = probe_duration(path)
+    if not duration:
+        raise RuntimeError(f"Could not determine media duration for {path}")
+
+    try:
+        silences = detect_silences(path, duration=duration)
+    except Exception as exc:
+        logger.warning("Silence detection failed, cutting at fixed intervals: %s", exc)
+        silences = []
+
+    windows = plan_windows(
+        duration,
+        silences,
+        window_seconds=settings.TRANSCRIBE_WINDOW_SECONDS,
+        overlap_seconds=settings.TRANSCRIBE_WINDOW_OVERLAP_SECONDS,
+    )
+    logger.info(
+        "Chunked transcription of %s: %.0fs -> %d windows, %d silences found",
+        path, duration, len(windows), len(silences),
+    )
+
+    pool = _get_pool(worker_count(model_name))
+    if language is None and windows:
+        # Detect once so every window is decoded in the same language.
+        try:
+            language = pool.submit(_detect_window_language, path, windows[0], model_name, backend_name).result()
+        except BrokenProcessPool:
+            shutdown_pool()
+            raise
+        except Exception as exc:
+            logger.warning("Language detection failed, detecting per window: %s", exc)
+        else:
+            logger.info("Detected language %s for %s", language, path)
+    futures = [pool.submit(_transcribe_window, path, w, model_name, language, backend_name) for w in windows]
+    pending = len(futures)
+    QUEUE_DEPTH.labels("transcription_windows").inc(pending)
+    try:
+        # Later windows keep running while the caller consumes earlier ones.
+        for window, future in zip(windows, futures):
+            segments = future.result()
+            pending -= 1
+            QUEUE_DEPTH.labels("transcription_windows").dec()
+            yield window, segments
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); drop the pool so the next job gets a fresh one.
+        shutdown_pool()
+        raise
+    finally:
+        QUEUE_DEPTH.labels("transcription_windows").dec(pending)
+        for future in futures:
+            future.cancel()
+
+
+def transcribe_chunked(
+    path: str,
+    model_name: str = "small",
+    language: Optional[str] = None,
+    backend_name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Transcribe the whole file in parallel windows and return stitched segments."""
+    segments: List[Dict[str, Any]] = []
+    for _, window_segments in iter_transcribed_windows(path, model_name, language, backend_name=backend_name):
+        segments.extend(window_segments)
+    return segments
@@ -0,0 +1,204 @@
+"""
+Process-wide cache of loaded Whisper models used by the video ingestion flow.
+
+``whisper.load_model`` reads hundreds of MB of weights from disk and builds a
+PyTorch module every time it is called.  The cache keeps recently used models
+resident (keyed by model name), evicts the least-recently-used one once
+``WHISPER_MAX_RESIDENT_MODELS`` is exceeded, and tracks how much memory the
+resident weights occupy.  Models listed in ``WHISPER_PRELOAD_MODELS`` are
+loaded in the background by the ``main.py`` lifespan hook so the first upload
+after a deploy starts transcribing immediately.
+
+Whisper installs forward hooks on the decoder while it decodes, so a model
+instance must not be used by two transcriptions at once.  ``lease()`` hands
+out a model together with its per-model lock; concurrent uploads that ask for
+the same model queue behind each other instead of corrupting each other's
+key/value cache.  A leased model is never evicted: it stays resident (and
+counted against the limit) until its last lease ends, so a request for it
+in the meantime reuses it instead of loading a second copy.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from app.config import settings
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _load_whisper_model(model_name: str) -> Any:
+    """Default loader: build an openai-whisper model on the configured device."""
+    import whisper  # deferred: pulls in PyTorch
+
+    return whisper.load_model(model_name, device=settings.WHISPER_DEVICE)
+
+
+def model_nbytes(model: Any) -> Optional[int]:
+    """Return the bytes held by a torch module's parameters and buffers."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except Exception:
+        return None
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class _CachedModel:
+    model: Any
+    nbytes: Optional[int]
+    load_seconds: float
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Leases taken or waiting for ``lock``; guarded by the cache's ``_lock``.
+    leases: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WhisperModelCache:
+    """LRU cache of loaded transcription models with memory accounting."""
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[str], Any]] = None,
+        max_resident: Optional[int] = None,
+        sizer: Callable[[Any], Optional[int]] = model_nbytes,
+        name: str = "whisper_models",
+    ) -> None:
+        self.name = name
+        self._loader = loader or _load_whisper_model
+        self._sizer = sizer
+        self.max_resident = max(1, max_resident if max_resident is not None else settings.WHISPER_MAX_RESIDENT_MODELS)
+        self._models: "OrderedDict[str, _CachedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per model name so two threads never load the same weights twice.
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ── Lookup ───────────────────────────────────────────────────────────────
+
+    def get(self, model_name: str) -> Any:
+        """Return the model, loading it on first use."""
+        return self._entry(model_name).model
+
+    @contextmanager
+    def lease(self, model_name: str) -> Iterator[Any]:
+        """Yield the model while holding its lock (one transcription at a time)."""
+        entry = self._entry(model_name, lease=True)
+        try:
+            with entry.lock:
+                entry.last_used = time.monotonic()
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                self._evict_over_limit()
+
+    def _entry(self, model_name: str, lease: bool = False) -> _CachedModel:
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None:
+                self._models.move_to_end(model_name)
+                entry.leases += lease
+                self.hits += 1
+                record_cache(self.name, hit=True)
+                return entry
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading while we waited.
+            with self._lock:
+                entry = self._models.get(model_name)
+                if entry is not None:
+                    self._models.move_to_end(model_name)
+                    entry.leases += lease
+                    self.hits += 1
+                    record_cache(self.name, hit=True)
+                    return entry
+
+            logger.info("Loading transcription model: %s", model_name)
+            started = time.perf_counter()
+            model = self._loader(model_name)
+            elapsed = time.perf_counter() - started
+            entry = _CachedModel(model=model, nbytes=self._sizer(model), load_seconds=elapsed, leases=int(lease))
+            logger.info(
+                "Transcription model %s loaded in %.1fs (%s MB resident)",
+                model_name,
+                elapsed,
+                f"{entry.nbytes / 1e6:.0f}" if entry.nbytes is not None else "?",
+            )
+
+            record_cache(self.name, hit=False)
+            with self._lock:
+                self.misses += 1
+                self._models[model_name] = entry
+                self._evict_over_limit()
+            return entry
+
+    def _evict_over_limit(self) -> None:
+        """Drop least-recently-used idle models until within ``max_resident``. Caller holds ``_lock``.
+
+        Leased models are skipped, so the cache can briefly hold more than
+        ``max_resident``; the excess is evicted when those leases end.
+        """
+        excess = len(self._models) - self.max_resident
+        for name in [name for name, entry in self._models.items() if not entry.leases][: max(0, excess)]:
+            del self._models[name]
+            self.evictions += 1
+            logger.info("Evicted transcription model %s from cache", name)
+
+    # ── Management ───────────────────────────────────────────────────────────
+
+    def preload(self, model_names: Iterable[str]) -> None:
+        """Load each model now; failures are logged, never raised."""
+        for name in model_names:
+            try:
+                self.get(name)
+            except Exception as exc:
+                logger.warning("Failed to preload transcription model %s: %s", name, exc)
+
+    def evict(self, model_name: str) -> bool:
+        """Remove a model from the cache. Returns True if it was resident."""
+        with self._lock:
+            return self._models.pop(model_name, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def is_loaded(self, model_name: str) -> bool:
+        with self._lock:
+            return model_name in self._models
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of resident models, memory use, and hit/miss counters."""
+        with self._lock:
+            models = {
+                name: {
+                    "bytes": entry.nbytes,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "in_use": entry.leases > 0,
+                }
+                for name, entry in self._models.items()
+            }
+            total = sum(entry.nbytes or 0 for entry in self._models.values())
+            return {
+                "resident_models": models,
+                "resident_bytes": total,
+                "max_resident": self.max_resident,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by the video endpoint and the lifespan preload.
+whisper_models = WhisperModelCache()
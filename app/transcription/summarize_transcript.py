@@ -6,12 +6,19 @@ app/services/supabase_content_repository.py.
 """
 
 import os
+import sys
 import json
 import argparse
 from datetime import timedelta
+from pathlib import Path
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
 
 # --- transcription deps ---
-import whisper
+from app.transcription.backends import BACKENDS, get_backend
 
 # --- summarization deps ---
 import re
@@ -147,10 +154,11 @@ def write_topic_summary(sections, out_path, markdown=True):
 # ---------- main ----------
 def main():
     """CLI entry point: transcribe, emit artifacts, and build the summary file."""
-    ap = argparse.ArgumentParser(description="Transcribe and summarize a video with Whisper (Python).")
+    ap = argparse.ArgumentParser(description="Transcribe and summarize a video with Whisper (openai-whisper or faster-whisper).")
     ap.add_argument("--input", "-i", required=True, help="Path to video/audio file (e.g., C:\\path\\to\\file.mp4)")
     ap.add_argument("--model", default="small", help="Whisper model: tiny/base/small/medium/large (CPU users: small/base recommended)")
     ap.add_argument("--language", default=None, help="Force language code like 'en' (optional)")
+    ap.add_argument("--backend", default=None, choices=list(BACKENDS), help="Transcription backend (default: TRANSCRIPTION_BACKEND)")
     ap.add_argument("--gap", type=float, default=20.0, help="Pause (seconds) that starts a new topic section")
     ap.add_argument("--max_section_minutes", type=float, default=8.0, help="Maximum section length before splitting")
     ap.add_argument("--outdir", default=None, help="Folder to write outputs (default: same as input)")
@@ -171,21 +179,13 @@ def main():
     path_sum  = os.path.join(outdir, f"{base}_topics.md" if args.markdown else f"{base}_topics.txt")
 
     # --- 1) load model
-    print(f"[whisper] loading model: {args.model}")
-    model = whisper.load_model(args.model)
-
-    # --- 2) transcribe
-    print(f"[whisper] transcribing: {inpath}")
-    result = model.transcribe(
-        inpath,
-        language=args.language,     # None lets whisper auto-detect
-        verbose=False,
-        word_timestamps=False,      # set True if you need per-word timing
-        condition_on_previous_text=True
-    )
-
-    # segments: start, end, text
-    segments = [{"start": float(s["start"]), "end": float(s["end"]), "text": s["text"]} for s in result["segments"]]
+    backend = get_backend(args.backend)
+    print(f"[{backend.name}] loading model: {args.model}")
+    backend.models.get(args.model)
+
+    # --- 2) transcribe (segments: start, end, text)
+    print(f"[{backend.name}] transcribing: {inpath}")
+    segments = backend.transcribe(inpath, args.model, args.language)  # language None = auto-detect
 
     # --- 3) write outputs
     print("[write] saving .txt/.srt/.vtt/.json")
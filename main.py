@@ -3,6 +3,7 @@ CFC Animal Feed Software Chatbot API
 Main FastAPI application with organized structure
 """
 from contextlib import asynccontextmanager
+import asyncio
 from fastapi.staticfiles import StaticFiles
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -32,7 +33,7 @@ else:
 
 # Import the organized modules
 from app.config import settings
-from app.api.endpoints import health, ingest, chat, visibility, videos, auth, sessions, profile
+from app.api.endpoints import health, ingest, chat, visibility, videos, auth, sessions, profile, metrics
 from app.api.endpoints.admin import router as admin_router
 from app.api.endpoints.upload import router as upload_router
 
@@ -65,11 +66,48 @@ async def lifespan(app: FastAPI):
     (settings.DOCUMENTS_DIR / "doc").mkdir(exist_ok=True)
     (settings.VIDEOS_DIR / "transcripts").mkdir(exist_ok=True)
     logger.info("Data directories initialized")
+
+    # Heavy modules (sentence_transformers / PyTorch) are imported on first use.
+    # Warm the embedding model, vector stores and LLM SDK in the background;
+    # /api/health/ready reports 503 until this is done so the load balancer
+    # only sends traffic to warm workers.
+    from app.core import warmup
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warmup.run_warmup))
+    else:
+        warmup.state.skip()
+
+    # Load Whisper models in the background so the first video upload does not
+    # pay the weight-loading cost; startup itself is not blocked.
+    preload_task = None
+    if settings.WHISPER_PRELOAD_MODELS and shutil.which("ffmpeg") is not None:
+        from app.transcription.backends import get_backend
+        try:
+            backend = get_backend()
+        except ValueError as exc:
+            logger.warning(f"Skipping Whisper preload: {exc}")
+        else:
+            logger.info(f"Preloading {backend.name} models in background: {settings.WHISPER_PRELOAD_MODELS}")
+            preload_task = asyncio.create_task(
+                asyncio.to_thread(
+                    warmup.run_step, "whisper", backend.preload, settings.WHISPER_PRELOAD_MODELS, required=False
+                )
+            )
     logger.info(f"API running at http://{settings.API_HOST}:{settings.API_PORT}")
 
     yield
 
     # --- Shutdown ---
+    if preload_task is not None and not preload_task.done():
+        logger.info("Whisper preload still running at shutdown; abandoning it")
+    if warmup_task is not None and not warmup_task.done():
+        logger.info("Warmup still running at shutdown; abandoning it")
+    from app.transcription.chunked import shutdown_pool
+    shutdown_pool()
+    # Write the feedback events still queued (write-behind, see feedback_queue).
+    from app.core.feedback_queue import feedback_queue
+    await asyncio.to_thread(feedback_queue.shutdown)
     logger.info("Shutting down CFC Animal Feed Software Chatbot API")
 
 
@@ -99,8 +137,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request stage timing (Server-Timing header + request_trace log line)
+if settings.TRACING_ENABLED:
+    from app.core.tracing import ServerTimingMiddleware
+    app.add_middleware(ServerTimingMiddleware)
+
+# Request latency histograms for /metrics
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
+# Save a wall-clock profile of any request slower than PROFILE_SLOW_REQUESTS_MS
+if settings.PROFILE_SLOW_REQUESTS_MS > 0:
+    from app.core.profiler import SlowRequestProfilerMiddleware
+    app.add_middleware(SlowRequestProfilerMiddleware)
+
 # Include routers
 app.include_router(health.router, prefix="/api")
+app.include_router(metrics.router)
 app.include_router(ingest.router, prefix="/api")
 app.include_router(chat.router, prefix="/api/chat")
 app.include_router(visibility.router, prefix="/api")
@@ -0,0 +1 @@
+# Benchmark scripts for measuring pipeline performance.
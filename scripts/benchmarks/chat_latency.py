@@ -0,0 +1,317 @@
+"""Replay CFC support questions through the chat path and report per-stage latency.
+
+Three stages are measured, innermost first:
+
+* ``retrieve_context`` – ``RAGPipeline.retrieve_context`` (embed, vector query,
+  chunk hydration, feedback re-ranking).
+* ``ask_question``     – ``ChatService.ask_question`` (retrieval + answer).
+* ``chat_message``     – ``POST /api/chat/message`` through the ASGI app
+  (auth, history reads/writes, ``ask_question``).
+
+The app runs on the in-memory backends from ``local_app`` so no network is
+needed; the latency of the services it would normally call is simulated with
+``--llm-ms``, ``--vector-ms``, ``--supabase-ms`` (per round trip) and
+``--embed-ms``.  Each stage is run at every ``--concurrency`` level: Python
+stages with a thread pool, the endpoint with concurrent requests on one event
+loop, as uvicorn would serve them.
+
+Results (p50/p95/p99/mean in ms, throughput in req/s) are printed and can be
+written with ``--json``; ``--compare`` prints the change against an earlier
+JSON file so two commits can be compared.
+
+Usage:
+    python -m scripts.benchmarks.chat_latency
+    python -m scripts.benchmarks.chat_latency --concurrency 1 4 16 --requests 200 \
+        --llm-ms 1200 --vector-ms 40 --supabase-ms 15 --json after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+_CHUNK_ID_RE = re.compile(r"\[CHUNK_ID:\s*([^\]]+)\]")
+
+STAGES = ("retrieve_context", "ask_question", "chat_message")
+
+QUESTIONS: List[str] = [
+    "How do I create a new ration for finishing pigs?",
+    "Where do I update ingredient prices?",
+    "Why does my formula say the optimization is infeasible?",
+    "How can I export a batch report to Excel?",
+    "What is the difference between a minimum and maximum nutrient constraint?",
+    "How do I give a nutritionist permission to edit formulas?",
+    "Can mill operators change formulas?",
+    "How do I re-cost all formulas after a price change?",
+    "Where do I set the crude protein limit for a ration?",
+    "How do I filter batch reports by mill and date range?",
+    "How do I add a new ingredient to the ingredient library?",
+    "What happens to existing formulas when I change an ingredient cost?",
+    "How do I record actual scale weights for a batch?",
+    "Which roles can view batch sheets?",
+    "How do I relax a constraint when the ration cannot be optimized?",
+    "How do I choose the animal group for a new ration?",
+]
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (``pct`` in 0-100) of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies_ms: Sequence[float], wall_seconds: float, errors: int = 0) -> Dict[str, float]:
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies_ms), 2) if latencies_ms else 0.0,
+        "throughput_rps": round(len(latencies_ms) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Percentage change of p50/p95/p99/throughput for every stage/concurrency in both runs."""
+    def keyed(run: Dict[str, Any]) -> Dict[tuple, Dict[str, Any]]:
+        return {(r["stage"], r["concurrency"]): r for r in run.get("results", [])}
+
+    old = keyed(baseline)
+    rows = []
+    for key, new in keyed(current).items():
+        if key not in old:
+            continue
+        row: Dict[str, Any] = {"stage": key[0], "concurrency": key[1]}
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            before = old[key].get(metric) or 0.0
+            row[metric] = round((new[metric] - before) / before * 100.0, 1) if before else None
+        rows.append(row)
+    return rows
+
+
+# ── simulated service latency ────────────────────────────────────────────────
+
+def _delayed(fn: Callable[..., Any], delay_ms: float) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        time.sleep(delay_ms / 1000.0)
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def install_latency_stubs(llm_ms: float, vector_ms: float, supabase_ms: float, embed_ms: float) -> None:
+    """Add fixed delays to the in-memory backends and answer with a canned LLM reply."""
+    from app.config import settings
+    from app.core.embeddings import HashingEmbeddingModel
+    from app.core.memory_supabase import MemoryAuth, MemoryQuery, MemoryRpc
+    from app.core.memory_vector_store import MemoryIndex
+    from app.services.chat_service import ChatService
+
+    if supabase_ms > 0:
+        MemoryQuery.execute = _delayed(MemoryQuery.execute, supabase_ms)
+        MemoryRpc.execute = _delayed(MemoryRpc.execute, supabase_ms)
+        MemoryAuth.get_user = _delayed(MemoryAuth.get_user, supabase_ms)
+    if vector_ms > 0:
+        MemoryIndex.query = _delayed(MemoryIndex.query, vector_ms)
+    if embed_ms > 0:
+        HashingEmbeddingModel.encode_query = _delayed(HashingEmbeddingModel.encode_query, embed_ms)
+
+    if llm_ms >= 0:
+        def fake_llm_answer(self, question, formatted_context, available_images=None, conversation_history=None):
+            time.sleep(llm_ms / 1000.0)
+            cited = _CHUNK_ID_RE.findall(formatted_context)[:3]
+            answer = f"Here is how to do that. [CHUNKS_CITED: {', '.join(cited)}]"
+            return answer, self._parse_image_references_by_chunks(answer, available_images or [], set(cited))
+
+        ChatService._generate_llm_answer = fake_llm_answer
+        settings.AZURE_OPENAI_API_KEY = settings.AZURE_OPENAI_API_KEY or "benchmark"
+        settings.AZURE_OPENAI_ENDPOINT = settings.AZURE_OPENAI_ENDPOINT or "http://llm.local"
+
+
+def synthetic_chunks(count: int) -> List[Dict[str, Any]]:
+    """``count`` chunks built by rotating the sample articles, so the index has realistic size."""
+    from scripts.benchmarks.local_app import SAMPLE_CHUNKS
+
+    chunks = []
+    for i in range(count):
+        base = SAMPLE_CHUNKS[i % len(SAMPLE_CHUNKS)]
+        suffix = "" if i < len(SAMPLE_CHUNKS) else f" Revision {i // len(SAMPLE_CHUNKS)} of this article."
+        chunks.append({
+            **base,
+            "chunk_id": base["chunk_id"] if i < len(SAMPLE_CHUNKS) else f"{base['chunk_id']}-r{i}",
+            "content": base["content"] + suffix,
+        })
+    return chunks
+
+
+# ── runners ──────────────────────────────────────────────────────────────────
+
+def run_threaded(fn: Callable[[str], Any], questions: Sequence[str], concurrency: int) -> Dict[str, float]:
+    def timed(question: str) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            fn(question)
+        except Exception:
+            return None
+        return (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, questions))
+    wall = time.perf_counter() - started
+    latencies = [r for r in results if r is not None]
+    return summarize(latencies, wall, errors=len(results) - len(latencies))
+
+
+def _require_success(result: Dict[str, Any]) -> Dict[str, Any]:
+    # ask_question reports failures in the payload instead of raising.
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "ask_question failed")
+    return result
+
+
+async def _run_endpoint(app: Any, headers: Dict[str, str], session_ids: Sequence[str], questions: Sequence[str], concurrency: int) -> Dict[str, float]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        async def one(i: int, question: str) -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/chat/message",
+                    json={"session_id": session_ids[i % len(session_ids)], "content": question},
+                    headers=headers,
+                )
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - started) * 1000.0)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, q) for i, q in enumerate(questions)))
+        wall = time.perf_counter() - started
+    return summarize(latencies, wall, errors=errors)
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from scripts.benchmarks.local_app import LocalApp, configure_local_environment
+
+    configure_local_environment()
+    local = LocalApp()
+    local.seed_chunks(synthetic_chunks(args.chunks))
+    install_latency_stubs(args.llm_ms, args.vector_ms, args.supabase_ms, args.embed_ms)
+
+    from app.api.endpoints.chat import chat_service
+
+    headers = local.create_user()
+    session_ids = [
+        local.client.post("/api/chat/sessions", json={"title": f"Bench {i}"}, headers=headers).json()["id"]
+        for i in range(max(args.concurrency))
+    ]
+    corpus = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.requests)]
+
+    # Warm-up so lazy imports and first-call setup are not in the numbers.
+    chat_service.ask_question(QUESTIONS[0])
+
+    stage_fns: Dict[str, Callable[[int], Dict[str, float]]] = {
+        "retrieve_context": lambda c: run_threaded(chat_service.document_rag_pipeline.retrieve_context, corpus, c),
+        "ask_question": lambda c: run_threaded(lambda q: _require_success(chat_service.ask_question(q)), corpus, c),
+        "chat_message": lambda c: asyncio.run(_run_endpoint(local.app, headers, session_ids, corpus, c)),
+    }
+    results = []
+    for stage in args.stages:
+        for concurrency in args.concurrency:
+            results.append({"stage": stage, "concurrency": concurrency, **stage_fns[stage](concurrency)})
+    return {
+        "benchmark": "chat_latency",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "requests": args.requests,
+            "chunks": args.chunks,
+            "llm_ms": args.llm_ms,
+            "vector_ms": args.vector_ms,
+            "supabase_ms": args.supabase_ms,
+            "embed_ms": args.embed_ms,
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark chat latency per stage on the in-memory backends.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Stages to measure.")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16], help="Concurrency levels.")
+    parser.add_argument("--requests", type=int, default=64, help="Questions replayed per stage and level.")
+    parser.add_argument("--chunks", type=int, default=500, help="Chunks seeded into the vector index.")
+    parser.add_argument("--llm-ms", type=float, default=800.0, help="Simulated LLM latency (negative = summariser).")
+    parser.add_argument("--vector-ms", type=float, default=30.0, help="Simulated vector query latency.")
+    parser.add_argument("--supabase-ms", type=float, default=10.0, help="Simulated latency per Supabase call.")
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="Simulated query embedding latency.")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file.")
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier JSON results to compare against.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    args.concurrency = sorted({max(1, c) for c in args.concurrency})
+    report = run_benchmark(args)
+
+    print(f"Commit: {report['commit']}  config: {report['config']}")
+    print(f"{'stage':<18}{'conc':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>9}{'errors':>8}")
+    for r in report["results"]:
+        print(
+            f"{r['stage']:<18}{r['concurrency']:>6}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['p99_ms']:>10.1f}{r['mean_ms']:>10.1f}{r['throughput_rps']:>9.2f}{r['errors']:>8}"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(f"\nChange vs {args.compare} (commit {baseline.get('commit')}), % (negative latency = faster):")
+        for row in compare(report, baseline):
+            print(
+                f"{row['stage']:<18}{row['concurrency']:>6}"
+                + "".join(f"{(row[m] if row[m] is not None else float('nan')):>+10.1f}" for m in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"))
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Measure document ingestion stage by stage on synthetic DOCX / PDF guides.
+
+Documents are generated with a controllable number of pages, headings per
+page, tables and embedded images (python-docx / pymupdf + Pillow), then run
+through the same steps as ``POST /api/ingest/document``:
+
+* ``process_document``          – parse, extract images, section and chunk.
+* ``build_chunks``              – ``DocumentProcessor._build_chunks`` alone, on
+  the parsed sections.
+* ``persist_document_content``  – store sections / images (local content root
+  in a temp dir, so no bucket is touched).
+* ``prepare_vectors``           – embed chunks and upsert ``document_chunks``.
+
+Each stage reports median wall time over ``--runs``, then one extra traced run
+reports peak RSS growth and Python allocations (tracemalloc peak, and the
+number of memory blocks still held afterwards); tracing is kept out of the
+timed runs because it slows Python down several times.  Supabase runs on the in-memory backend; pick the embedder with
+``--embedder`` (``hashing`` is fast and offline, ``sentence-transformers``
+gives production numbers).  ``--estimate-pages`` extrapolates linearly from
+the largest size measured.
+
+Usage:
+    python -m scripts.benchmarks.ingestion
+    python -m scripts.benchmarks.ingestion --formats pdf --pages 10 50 200 \
+        --images-per-page 1 --tables-per-page 1 --estimate-pages 500 --json ingest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import io
+import json
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+STAGES = ("process_document", "build_chunks", "persist_document_content", "prepare_vectors")
+
+_VOCABULARY = (
+    "ration formula ingredient nutrient constraint optimize batch mill premix protein energy lysine "
+    "phosphorus calcium fiber moisture cost price supplier inventory report export operator scale "
+    "weight tolerance version approve review animal group phase grower finisher layer broiler dairy "
+    "beef swine poultry matrix specification library template margin delivery order schedule"
+).split()
+
+
+# ── synthetic documents ──────────────────────────────────────────────────────
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_VOCABULARY, k=rng.randint(10, 22))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _table_rows(rng: random.Random, rows: int = 6, cols: int = 4) -> List[List[str]]:
+    header = ["Ingredient", "Min %", "Max %", "Cost / ton"][:cols]
+    body = [
+        [rng.choice(_VOCABULARY).title()] + [f"{rng.uniform(0, 100):.2f}" for _ in range(cols - 1)]
+        for _ in range(rows - 1)
+    ]
+    return [header] + body
+
+
+def _png_bytes(rng: random.Random, size: int = 320) -> bytes:
+    from PIL import Image
+
+    # Random noise so images do not dedupe by hash and compress realistically.
+    image = Image.frombytes("RGB", (size, size // 2), rng.randbytes(size * (size // 2) * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def generate_docx(
+    path: Path,
+    pages: int,
+    headings_per_page: int = 2,
+    tables_per_page: int = 0,
+    images_per_page: int = 0,
+    paragraphs_per_page: int = 5,
+    seed: int = 0,
+) -> Path:
+    """Write a DOCX guide of roughly ``pages`` pages (an explicit page break after each)."""
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    from docx.shared import Inches
+
+    rng = random.Random(seed)
+    document = Document()
+    document.add_heading("Synthetic CFC user guide", level=0)
+    for page in range(pages):
+        for h in range(max(1, headings_per_page)):
+            document.add_heading(f"{page + 1}.{h + 1} {_sentence(rng)[:48].rstrip('.')}", level=1 if h == 0 else 2)
+            for _ in range(max(1, paragraphs_per_page // max(1, headings_per_page))):
+                document.add_paragraph(_paragraph(rng))
+        for _ in range(tables_per_page):
+            rows = _table_rows(rng)
+            table = document.add_table(rows=len(rows), cols=len(rows[0]))
+            for r, row in enumerate(rows):
+                for c, value in enumerate(row):
+                    table.cell(r, c).text = value
+        for _ in range(images_per_page):
+            document.add_picture(io.BytesIO(_png_bytes(rng)), width=Inches(3))
+        document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    document.save(str(path))
+    return path
+
+
+def generate_pdf(
+    path: Path,
+    pages: int,
+    headings_per_page: int = 2,
+    tables_per_page: int = 0,
+    images_per_page: int = 0,
+    paragraphs_per_page: int = 5,
+    seed: int = 0,
+) -> Path:
+    """Write a text-layer PDF with larger bold headings, ruled tables and embedded images."""
+    import fitz  # pymupdf
+
+    rng = random.Random(seed)
+    document = fitz.open()
+    width, height, margin = 612, 792, 54
+    for page_no in range(pages):
+        page = document.new_page(width=width, height=height)
+        y = margin
+        per_heading = max(1, paragraphs_per_page // max(1, headings_per_page))
+        for h in range(max(1, headings_per_page)):
+            page.insert_text((margin, y + 16), f"{page_no + 1}.{h + 1} {_sentence(rng)[:40].rstrip('.')}",
+                             fontsize=16, fontname="hebo")
+            y += 28
+            for _ in range(per_heading):
+                rect = fitz.Rect(margin, y, width - margin, y + 70)
+                page.insert_textbox(rect, _paragraph(rng), fontsize=9, fontname="helv")
+                y += 74
+        for _ in range(tables_per_page):
+            rows = _table_rows(rng, rows=5)
+            col_w, row_h = (width - 2 * margin) / len(rows[0]), 14
+            for r, row in enumerate(rows):
+                for c, value in enumerate(row):
+                    cell = fitz.Rect(margin + c * col_w, y + r * row_h, margin + (c + 1) * col_w, y + (r + 1) * row_h)
+                    page.draw_rect(cell, color=(0, 0, 0), width=0.5)
+                    page.insert_text((cell.x0 + 3, cell.y1 - 4), value, fontsize=8, fontname="helv")
+            y += len(rows) * row_h + 10
+        for i in range(images_per_page):
+            top = min(y, height - margin - 90)
+            page.insert_image(fitz.Rect(margin + i * 170, top, margin + i * 170 + 160, top + 80), stream=_png_bytes(rng))
+    document.save(str(path))
+    document.close()
+    return path
+
+
+GENERATORS: Dict[str, Callable[..., Path]] = {"docx": generate_docx, "pdf": generate_pdf}
+
+
+# ── measurement ──────────────────────────────────────────────────────────────
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's high-water mark so VmHWM measures one stage (Linux only)."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and bytes on macOS; it never resets.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def _current_rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def measure_memory(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Run ``fn`` once under tracemalloc; report peak RSS growth, traced peak and retained blocks."""
+    resettable = _reset_peak_rss()
+    rss_before = _current_rss_mb()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return {
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - rss_before, 1) if resettable else None,
+        "traced_peak_mb": round(traced_peak / (1024.0 * 1024.0), 2),
+        "retained_blocks": blocks,
+    }
+
+
+def benchmark_document(path: Path, runs: int, content_root: Path) -> Dict[str, Any]:
+    from app.api.endpoints import ingest
+    from app.services.content_repository import ContentRepository
+
+    processor = ingest._document_processor
+    ingest._content_repository = ContentRepository(root=content_root)
+
+    processed = processor.process_document(path)
+    if not processed.get("success"):
+        raise RuntimeError(f"process_document failed for {path}: {processed.get('error')}")
+
+    # Each stage gets a fresh copy of its input so the persist step's in-place
+    # edits do not leak between runs.
+    stage_fns: Dict[str, Callable[[], Any]] = {
+        "process_document": lambda: processor.process_document(path),
+        "build_chunks": lambda: processor._build_chunks(copy.deepcopy(processed["sections"])),
+        "persist_document_content": lambda: ingest._persist_document_content(copy.deepcopy(processed)),
+        "prepare_vectors": lambda: ingest._prepare_vectors(copy.deepcopy(persisted)),
+    }
+    persisted = ingest._persist_document_content(copy.deepcopy(processed))
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    for stage in STAGES:
+        fn = stage_fns[stage]
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        stages[stage] = {"median_seconds": round(statistics.median(timings), 4), **measure_memory(fn)}
+
+    return {
+        "sections": len(processed.get("sections", [])),
+        "chunks": len(processed.get("chunks", [])),
+        "images": len(processed.get("images", [])),
+        "stages": stages,
+    }
+
+
+def _ingest_seconds(result: Dict[str, Any]) -> float:
+    # build_chunks already runs inside process_document, so it is not added again.
+    return sum(result["stages"][s]["median_seconds"] for s in ("process_document", "persist_document_content", "prepare_vectors"))
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark document ingestion stages on synthetic documents.")
+    parser.add_argument("--formats", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[5, 25, 100], help="Document sizes to generate.")
+    parser.add_argument("--headings-per-page", type=int, default=2)
+    parser.add_argument("--paragraphs-per-page", type=int, default=5)
+    parser.add_argument("--tables-per-page", type=int, default=1)
+    parser.add_argument("--images-per-page", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per stage.")
+    parser.add_argument(
+        "--embedder",
+        choices=["hashing", "sentence-transformers"],
+        default="hashing",
+        help="Embedding backend used by prepare_vectors.",
+    )
+    parser.add_argument("--estimate-pages", type=int, default=500, help="Extrapolate total ingest time to this size.")
+    parser.add_argument("--keep", type=Path, default=None, help="Keep generated documents in this directory.")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+
+    from scripts.benchmarks.local_app import configure_local_environment
+
+    configure_local_environment(EMBEDDING_BACKEND=args.embedder)
+
+    workdir = Path(tempfile.mkdtemp(prefix="ingest-bench-"))
+    docs_dir = args.keep or workdir / "docs"
+    docs_dir.mkdir(parents=True, exist_ok=True)
+    results: List[Dict[str, Any]] = []
+    try:
+        for fmt in args.formats:
+            for pages in sorted(set(args.pages)):
+                path = GENERATORS[fmt](
+                    docs_dir / f"synthetic-guide-{pages}p.{fmt}",
+                    pages,
+                    headings_per_page=args.headings_per_page,
+                    tables_per_page=args.tables_per_page,
+                    images_per_page=args.images_per_page,
+                    paragraphs_per_page=args.paragraphs_per_page,
+                )
+                result = benchmark_document(path, max(1, args.runs), workdir / "content" / f"{fmt}-{pages}")
+                result.update({"format": fmt, "pages": pages, "file_mb": round(path.stat().st_size / 1e6, 2)})
+                result["ingest_seconds"] = round(_ingest_seconds(result), 3)
+                result["seconds_per_page"] = round(result["ingest_seconds"] / pages, 4)
+                results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Embedder: {args.embedder}, runs: {args.runs}")
+    print(f"{'format':<7}{'pages':>6}{'chunks':>8}{'stage':>27}{'median s':>10}{'peak RSS +MB':>14}{'traced MB':>11}{'blocks':>10}")
+    for r in results:
+        for stage in STAGES:
+            s = r["stages"][stage]
+            rss = "n/a" if s["peak_rss_delta_mb"] is None else f"{s['peak_rss_delta_mb']:.1f}"
+            print(
+                f"{r['format']:<7}{r['pages']:>6}{r['chunks']:>8}{stage:>27}{s['median_seconds']:>10.3f}"
+                f"{rss:>14}{s['traced_peak_mb']:>11.2f}{s['retained_blocks']:>10}"
+            )
+
+    estimates = {}
+    for fmt in args.formats:
+        largest = max((r for r in results if r["format"] == fmt), key=lambda r: r["pages"], default=None)
+        if largest:
+            estimates[fmt] = round(largest["seconds_per_page"] * args.estimate_pages, 1)
+            print(f"Estimated {args.estimate_pages}-page {fmt}: ~{estimates[fmt]}s (from {largest['pages']} pages)")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "benchmark": "ingestion",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+            "results": results,
+            "estimates_seconds": estimates,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Run the full FastAPI app offline on the in-memory Supabase / vector store backends.
+
+``configure_local_environment()`` must run before anything under ``app`` is
+imported: it selects ``SUPABASE_BACKEND=memory``, ``VECTOR_STORE_BACKEND=memory``
+and (by default) the hashing embedder, and clears the Azure OpenAI settings so
+answers come from the local summariser.  ``LocalApp`` then wraps ``main.app``
+with a ``TestClient`` plus helpers to create users and seed the knowledge base.
+
+Usage (from a benchmark or a one-off script):
+    from scripts.benchmarks.local_app import configure_local_environment, LocalApp
+    configure_local_environment()
+    local = LocalApp()
+    headers = local.create_user()
+    local.seed_chunks(SAMPLE_CHUNKS)
+    session = local.client.post("/api/chat/sessions", json={"title": "t"}, headers=headers).json()
+    local.client.post("/api/chat/message", json={"session_id": session["id"], "content": "..."}, headers=headers)
+
+Smoke test:
+    python -m scripts.benchmarks.local_app
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+LOCAL_ENV = {
+    "SUPABASE_BACKEND": "memory",
+    "VECTOR_STORE_BACKEND": "memory",
+    "EMBEDDING_BACKEND": "hashing",
+    "SUPABASE_URL": "http://supabase.local",
+    "SUPABASE_SERVICE_ROLE_KEY": "local-service-role",
+    "SUPABASE_ANON_KEY": "local-anon",
+    "AZURE_OPENAI_API_KEY": "",
+    "AZURE_OPENAI_ENDPOINT": "",
+    "WHISPER_PRELOAD_MODELS": "",
+}
+
+# A few support-article style chunks so retrieval has something to rank.
+SAMPLE_CHUNKS: List[Dict[str, Any]] = [
+    {
+        "chunk_id": "ration-setup-1",
+        "doc_id": "ration-guide",
+        "section_title": "Creating a ration",
+        "content": "To create a new ration open Formulation > Rations, click New, choose the animal group and "
+                   "target nutrient profile, then add ingredients from the ingredient library before optimizing.",
+    },
+    {
+        "chunk_id": "ingredient-price-1",
+        "doc_id": "ingredient-guide",
+        "section_title": "Updating ingredient prices",
+        "content": "Ingredient prices are updated under Ingredients > Pricing. Enter the new cost per ton and "
+                   "the effective date; existing formulas are re-costed the next time they are optimized.",
+    },
+    {
+        "chunk_id": "batch-report-1",
+        "doc_id": "reports-guide",
+        "section_title": "Batch reports",
+        "content": "Batch reports list every mixed batch with its formula version, operator and scale weights. "
+                   "Filter by date range and mill, then export the batch report to PDF or Excel.",
+    },
+    {
+        "chunk_id": "nutrient-constraint-1",
+        "doc_id": "ration-guide",
+        "section_title": "Nutrient constraints",
+        "content": "Nutrient constraints set minimum and maximum levels for crude protein, fat, fiber and "
+                   "minerals. If optimization is infeasible, relax the tightest constraint shown in the report.",
+    },
+    {
+        "chunk_id": "user-permissions-1",
+        "doc_id": "admin-guide",
+        "section_title": "User permissions",
+        "content": "Administrators assign roles under Settings > Users. Nutritionists can edit formulas, mill "
+                   "operators can only view batch sheets and record actual weights.",
+    },
+]
+
+
+def configure_local_environment(**overrides: str) -> None:
+    """Point the app at the in-memory backends. Call before importing ``app`` / ``main``."""
+    env = {**LOCAL_ENV, **overrides}
+    already = "app.config" in sys.modules
+    for key, value in env.items():
+        os.environ[key] = value
+    if already:
+        from app.config import settings
+
+        if settings.SUPABASE_BACKEND != env["SUPABASE_BACKEND"] or settings.VECTOR_STORE_BACKEND != env["VECTOR_STORE_BACKEND"]:
+            raise RuntimeError("configure_local_environment() must run before app.config is imported")
+
+
+class LocalApp:
+    """The real ``main.app`` wired to in-memory backends, plus seeding helpers."""
+
+    def __init__(self) -> None:
+        from fastapi.testclient import TestClient
+
+        from app.config import settings
+        from app.core.embeddings import create_embedding_model
+        from app.core.memory_supabase import memory_database
+        from app.core.memory_vector_store import get_memory_index
+        import main
+
+        if settings.SUPABASE_BACKEND != "memory" or settings.VECTOR_STORE_BACKEND != "memory":
+            raise RuntimeError("Call configure_local_environment() before creating LocalApp")
+
+        self.app = main.app
+        self.client = TestClient(self.app)
+        self.db = memory_database
+        self.index = get_memory_index(settings.PINECONE_INDEX_NAME)
+        self.embedder = create_embedding_model()
+        self.namespace = settings.PINECONE_NAMESPACE
+
+    def create_user(self, role: str = "user", email: Optional[str] = None) -> Dict[str, str]:
+        """Create an active user and return request headers carrying their token."""
+        _, token = self.db.create_user(email=email, role=role)
+        return {"Authorization": f"Bearer {token}"}
+
+    def seed_chunks(self, chunks: Iterable[Dict[str, Any]]) -> int:
+        """Write chunks to ``document_chunks`` and their embeddings to the vector index."""
+        rows = [
+            {"source": f"{c.get('doc_id', 'doc')}.docx", "source_type": "document", "image_paths": [], **c}
+            for c in chunks
+        ]
+        if not rows:
+            return 0
+        self.db.insert("document_chunks", rows)
+        embeddings = self.embedder.encode([r["content"] for r in rows])
+        vectors = [
+            (
+                r["chunk_id"],
+                embedding,
+                {"doc_id": r.get("doc_id"), "source": r["source"], "source_type": r["source_type"]},
+            )
+            for r, embedding in zip(rows, embeddings)
+        ]
+        self.index.upsert(vectors=vectors, namespace=self.namespace)
+        return len(rows)
+
+    def reset(self) -> None:
+        from app.core.memory_vector_store import reset_memory_indexes
+
+        self.db.reset()
+        reset_memory_indexes()
+        from app.config import settings
+        from app.core.memory_vector_store import get_memory_index
+
+        self.index = get_memory_index(settings.PINECONE_INDEX_NAME)
+
+
+def main() -> None:
+    configure_local_environment()
+    local = LocalApp()
+    headers = local.create_user()
+    local.seed_chunks(SAMPLE_CHUNKS)
+
+    session = local.client.post("/api/chat/sessions", json={"title": "Smoke test"}, headers=headers).json()
+    reply = local.client.post(
+        "/api/chat/message",
+        json={"session_id": session["id"], "content": "How do I update ingredient prices?"},
+        headers=headers,
+    )
+    reply.raise_for_status()
+    message = reply.json()
+    feedback = local.client.post(
+        "/api/chat/feedback",
+        json={"message_id": message["id"], "session_id": session["id"], "rating": 1},
+        headers=headers,
+    )
+    feedback.raise_for_status()
+    history = local.client.get(f"/api/chat/sessions/{session['id']}", headers=headers).json()
+
+    print(f"Top citation: {message['citations'][0]['chunk_id'] if message['citations'] else None}")
+    print(f"History messages: {len(history)}")
+    print(f"Feedback scores: {local.db.tables.get('chunk_feedback_scores', [])}")
+
+
+if __name__ == "__main__":
+    main()
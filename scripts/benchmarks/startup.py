@@ -0,0 +1,245 @@
+"""Measure how long a fresh API worker takes to accept traffic.
+
+Each run starts a new interpreter (so nothing is cached in ``sys.modules``)
+that imports ``main``, runs the lifespan startup and answers one
+``GET /api/health``, and reports:
+
+* ``import_s``          – ``import main`` (routers, services, clients).
+* ``ready_s``           – import plus lifespan startup.
+* ``first_response_s``  – until the first health check has been answered.
+* ``process_s``         – wall time of the whole child process, including
+  interpreter start-up and shutdown.
+* ``heavy_modules``     – modules from ``HEAVY_MODULES`` that were imported
+  during startup; these should all load lazily, on first use.
+
+Supabase and the vector store run on the in-memory backends so no network is
+touched; the embedder defaults to ``sentence-transformers`` because deferring
+its import is most of what this guards.  The background warmup is off unless
+``--warmup`` is given, so the numbers are stable; with it, ``ready_wait_s``
+reports how long ``/api/health/ready`` took to turn 200.  With
+``--max-seconds`` the script exits non-zero when the median
+``first_response_s`` exceeds the budget or a heavy module was imported, which
+makes it usable as a CI guard.  ``--top`` lists the slowest imports
+(``python -X importtime``).
+
+Usage:
+    python -m scripts.benchmarks.startup
+    python -m scripts.benchmarks.startup --runs 5 --max-seconds 3 --json startup.json
+    python -m scripts.benchmarks.startup --runs 1 --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+# Modules that cost seconds to import and must not be needed to serve requests.
+HEAVY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "sklearn",
+    "whisper",
+    "faster_whisper",
+    "openai",
+    "fitz",
+    "pdfplumber",
+    "pytesseract",
+)
+
+TIMINGS = ("import_s", "ready_s", "first_response_s", "process_s")
+
+_CHILD = """
+import json, os, sys, time
+HEAVY = %r
+warmup = os.environ.get("WARMUP_ENABLED") == "true"
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+# With warmup on, the background thread imports the heavy modules on purpose.
+heavy = [m for m in HEAVY if m in sys.modules] if warmup else None
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    status = client.get("/api/health").status_code
+    answered = time.perf_counter()
+    if heavy is None:
+        heavy = [m for m in HEAVY if m in sys.modules]
+    ready_wait = None
+    if warmup:
+        while client.get("/api/health/ready").status_code != 200:
+            time.sleep(0.05)
+        ready_wait = time.perf_counter() - started
+print("STARTUP_RESULT " + json.dumps({
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "first_response_s": answered - started,
+    "ready_wait_s": ready_wait,
+    "status": status,
+    "heavy_modules": heavy,
+}))
+""" % (HEAVY_MODULES,)
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def child_environment(embedder: str = "sentence-transformers", warmup: bool = False) -> Dict[str, str]:
+    """Environment for the child interpreter: in-memory backends, optional warmup."""
+    from scripts.benchmarks.local_app import LOCAL_ENV
+
+    return {
+        **os.environ,
+        **LOCAL_ENV,
+        "EMBEDDING_BACKEND": embedder,
+        "WARMUP_ENABLED": "true" if warmup else "false",
+        "WHISPER_PRELOAD_MODELS": "",
+    }
+
+
+def measure_startup(env: Dict[str, str], importtime: bool = False) -> Dict[str, Any]:
+    """Start one fresh worker and return its timings (plus ``-X importtime`` output if asked)."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _CHILD]
+    started = time.perf_counter()
+    proc = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    process_s = time.perf_counter() - started
+    line = next((l for l in proc.stdout.splitlines() if l.startswith("STARTUP_RESULT ")), None)
+    if proc.returncode != 0 or line is None:
+        raise RuntimeError(f"Startup run failed (exit {proc.returncode}):\n{proc.stderr[-4000:]}")
+    result = json.loads(line[len("STARTUP_RESULT "):])
+    result["process_s"] = process_s
+    if importtime:
+        result["importtime"] = proc.stderr
+    return result
+
+
+def slowest_imports(importtime_output: str, limit: int) -> List[Dict[str, Any]]:
+    """Top-level-ish imports by cumulative time from ``-X importtime`` output."""
+    rows = []
+    for line in importtime_output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                "module": module,
+                "depth": len(indent) // 2,
+                "cumulative_ms": int(cumulative_us) / 1000.0,
+                "self_ms": int(self_us) / 1000.0,
+            })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def summarize_runs(runs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"runs": len(runs)}
+    for key in TIMINGS:
+        values = [run[key] for run in runs]
+        summary[key] = {
+            "median": round(statistics.median(values), 3),
+            "min": round(min(values), 3),
+            "max": round(max(values), 3),
+        }
+    waits = [run["ready_wait_s"] for run in runs if run.get("ready_wait_s") is not None]
+    if waits:
+        summary["ready_wait_s"] = {
+            "median": round(statistics.median(waits), 3),
+            "min": round(min(waits), 3),
+            "max": round(max(waits), 3),
+        }
+    summary["heavy_modules"] = sorted({m for run in runs for m in run["heavy_modules"]})
+    return summary
+
+
+def check_budget(summary: Dict[str, Any], max_seconds: Optional[float]) -> List[str]:
+    """Reasons the run breaks the startup budget (empty when it passes)."""
+    problems = []
+    if summary["heavy_modules"]:
+        problems.append(f"heavy modules imported at startup: {', '.join(summary['heavy_modules'])}")
+    if max_seconds is not None and summary["first_response_s"]["median"] > max_seconds:
+        problems.append(
+            f"median first response {summary['first_response_s']['median']:.2f}s exceeds {max_seconds:.2f}s"
+        )
+    return problems
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark API worker startup time.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start.")
+    parser.add_argument(
+        "--embedder",
+        choices=["sentence-transformers", "hashing"],
+        default="sentence-transformers",
+        help="EMBEDDING_BACKEND for the worker.",
+    )
+    parser.add_argument("--warmup", action="store_true", help="Run the background warmup and wait for readiness.")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if median first response exceeds this.")
+    parser.add_argument("--top", type=int, default=0, help="Show the N slowest imports of the last run.")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this JSON file.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    env = child_environment(args.embedder, args.warmup)
+
+    runs = []
+    for i in range(max(1, args.runs)):
+        runs.append(measure_startup(env, importtime=bool(args.top) and i == args.runs - 1))
+    summary = summarize_runs(runs)
+
+    print(f"Embedder: {args.embedder}, warmup: {args.warmup}, runs: {summary['runs']}")
+    print(f"{'timing':<18} {'median':>8} {'min':>8} {'max':>8}")
+    for key in TIMINGS + ("ready_wait_s",):
+        row = summary.get(key)
+        if row is None:
+            continue
+        print(f"{key:<18} {row['median']:>8.3f} {row['min']:>8.3f} {row['max']:>8.3f}")
+    print(f"heavy modules at startup: {', '.join(summary['heavy_modules']) or 'none'}")
+
+    if args.top:
+        print(f"\nSlowest imports (cumulative ms):")
+        for row in slowest_imports(runs[-1].pop("importtime"), args.top):
+            print(f"{row['cumulative_ms']:>10.1f}  {'  ' * row['depth']}{row['module']}")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "embedder": args.embedder,
+            "warmup": args.warmup,
+            "summary": summary,
+            "runs": [{k: v for k, v in run.items() if k != "importtime"} for run in runs],
+        }, indent=2))
+        print(f"Wrote {args.json}")
+
+    problems = check_budget(summary, args.max_seconds)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
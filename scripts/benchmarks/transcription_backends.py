@@ -0,0 +1,138 @@
+"""Compare transcription backends on a sample clip: speed (real-time factor) and accuracy (WER).
+
+Each backend transcribes the clip ``--runs`` times after a warm-up run that
+loads the model, so load time is reported separately from transcription time.
+The real-time factor is transcription seconds divided by clip seconds (lower is
+faster; 0.25 means four times faster than real time).  Word error rate is
+measured against ``--reference`` (a plain-text transcript) or, when none is
+given, against the first backend's output.
+
+Usage:
+    python -m scripts.benchmarks.transcription_backends --input clip.mp4 --model small
+    python -m scripts.benchmarks.transcription_backends --input clip.mp4 \
+        --backends whisper faster-whisper --reference clip.txt --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Ensure project imports resolve when executed directly.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+from app.transcription.audio import probe_duration
+from app.transcription.backends import BACKENDS, get_backend
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[\w']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def benchmark_backend(
+    name: str,
+    clip: Path,
+    model: str,
+    language: Optional[str],
+    runs: int,
+    clip_seconds: float,
+) -> Dict[str, object]:
+    backend = get_backend(name)
+
+    started = time.perf_counter()
+    backend.models.get(model)
+    load_seconds = time.perf_counter() - started
+
+    backend.transcribe(str(clip), model, language)  # warm-up
+    timings = []
+    segments = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        segments = backend.transcribe(str(clip), model, language)
+        timings.append(time.perf_counter() - started)
+
+    median = statistics.median(timings)
+    return {
+        "backend": backend.name,
+        "model": model,
+        "load_seconds": round(load_seconds, 3),
+        "transcribe_seconds": [round(t, 3) for t in timings],
+        "median_seconds": round(median, 3),
+        "rtf": round(median / clip_seconds, 4),
+        "segments": len(segments),
+        "text": " ".join(seg["text"].strip() for seg in segments),
+    }
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends on a sample clip.")
+    parser.add_argument("--input", "-i", type=Path, required=True, help="Audio/video clip to transcribe.")
+    parser.add_argument("--model", default="small", help="Model size to load in every backend.")
+    parser.add_argument("--language", default=None, help="Force language code like 'en'.")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=None,
+        choices=list(BACKENDS),
+        help="Backends to compare (default: every installed backend).",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per backend after warm-up.")
+    parser.add_argument("--reference", type=Path, default=None, help="Plain-text reference transcript for WER.")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this JSON file.")
+    return parser
+
+
+def main() -> None:
+    args = _build_parser().parse_args()
+    clip = args.input.expanduser()
+    clip_seconds = probe_duration(str(clip))
+    if not clip_seconds:
+        raise SystemExit(f"Could not read duration of {clip} (is ffmpeg available?)")
+
+    names = args.backends or [name for name, backend in BACKENDS.items() if backend.is_available()]
+    results = [
+        benchmark_backend(name, clip, args.model, args.language, max(1, args.runs), clip_seconds)
+        for name in names
+    ]
+
+    reference = args.reference.read_text(encoding="utf-8") if args.reference else results[0]["text"]
+    for result in results:
+        result["wer"] = round(word_error_rate(reference, result["text"]), 4)
+
+    print(f"Clip: {clip} ({clip_seconds:.1f}s), model: {args.model}, runs: {args.runs}")
+    print(f"WER reference: {'--reference file' if args.reference else results[0]['backend'] + ' output'}")
+    print(f"{'backend':<16}{'load s':>9}{'median s':>10}{'RTF':>8}{'WER':>8}{'segments':>10}")
+    for r in results:
+        print(
+            f"{r['backend']:<16}{r['load_seconds']:>9.2f}{r['median_seconds']:>10.2f}"
+            f"{r['rtf']:>8.3f}{r['wer']:>8.3f}{r['segments']:>10}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"clip": str(clip), "clip_seconds": clip_seconds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
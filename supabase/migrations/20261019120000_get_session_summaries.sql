@@ -0,0 +1,63 @@
+-- Session list for the History page in one round trip: every session of a
+-- user with its message count and the start of its last user message.
+--
+-- Replaces one chat_messages query per session (GET /api/chat/sessions?detail=true).
+-- Keyset pagination: pass the created_at / id of the last row of the previous
+-- page as p_before_created_at / p_before_id; p_limit null returns everything.
+--
+-- SECURITY INVOKER, so the caller's Row Level Security policies still apply.
+
+create index if not exists chat_sessions_user_created_idx
+    on public.chat_sessions (user_id, created_at desc, id desc);
+
+create index if not exists chat_messages_session_role_created_idx
+    on public.chat_messages (session_id, role, created_at desc);
+
+create or replace function public.get_session_summaries(
+    p_user_id uuid,
+    p_limit integer default null,
+    p_before_created_at timestamptz default null,
+    p_before_id uuid default null
+)
+returns table (
+    id uuid,
+    user_id uuid,
+    title text,
+    created_at timestamptz,
+    message_count bigint,
+    last_message text
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+    select s.id,
+           s.user_id,
+           s.title,
+           s.created_at,
+           coalesce(counts.message_count, 0) as message_count,
+           left(last_user.content, 100) as last_message
+    from chat_sessions s
+    left join lateral (
+        select count(*) as message_count
+        from chat_messages m
+        where m.session_id = s.id
+    ) counts on true
+    left join lateral (
+        select m.content
+        from chat_messages m
+        where m.session_id = s.id and m.role = 'user'
+        order by m.created_at desc
+        limit 1
+    ) last_user on true
+    where s.user_id = p_user_id
+      and (
+          p_before_created_at is null
+          or (s.created_at, s.id) < (p_before_created_at, coalesce(p_before_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'::uuid))
+      )
+    order by s.created_at desc, s.id desc
+    limit p_limit;
+$$;
+
+grant execute on function public.get_session_summaries(uuid, integer, timestamptz, uuid) to authenticated;
@@ -0,0 +1,5 @@
+-- Keyset pagination of a session's messages (GET /api/chat/sessions/{id}?limit=&before=)
+-- walks this index instead of sorting every message of the session.
+
+create index if not exists chat_messages_session_created_idx
+    on public.chat_messages (session_id, created_at desc);
@@ -0,0 +1,49 @@
+-- Start of a chat turn in one round trip (POST /api/chat/message): checks that
+-- the session belongs to the user, stores the user's message and returns it
+-- with the session's last p_history_limit messages (oldest first, including
+-- the new one) as the conversation history for the LLM.
+--
+-- Replaces three requests (ownership check, insert, history select). Returns
+-- null when the session does not exist or belongs to another user. The API
+-- calls it with the service-role key, so ownership is checked here, not by RLS.
+
+create or replace function public.begin_chat_turn(
+    p_session_id uuid,
+    p_user_id uuid,
+    p_content text,
+    p_history_limit integer default 10
+)
+returns jsonb
+language plpgsql
+volatile
+security invoker
+set search_path = public
+as $$
+declare
+    v_message chat_messages;
+    v_history jsonb;
+begin
+    perform 1 from chat_sessions where id = p_session_id and user_id = p_user_id;
+    if not found then
+        return null;
+    end if;
+
+    insert into chat_messages (session_id, role, content)
+    values (p_session_id, 'user', p_content)
+    returning * into v_message;
+
+    select coalesce(jsonb_agg(jsonb_build_object('role', h.role, 'content', h.content) order by h.created_at, h.id), '[]'::jsonb)
+    into v_history
+    from (
+        select m.id, m.role, m.content, m.created_at
+        from chat_messages m
+        where m.session_id = p_session_id
+        order by m.created_at desc, m.id desc
+        limit p_history_limit
+    ) h;
+
+    return jsonb_build_object('user_message', to_jsonb(v_message), 'history', v_history);
+end;
+$$;
+
+grant execute on function public.begin_chat_turn(uuid, uuid, text, integer) to service_role;
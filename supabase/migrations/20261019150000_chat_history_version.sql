@@ -0,0 +1,86 @@
+-- Version stamp of each session's message history, so API workers can keep
+-- the recent messages of a session in memory (app/core/history_cache.py).
+--
+-- chat_sessions.history_version is bumped by a trigger on every insert,
+-- update and delete in chat_messages. begin_chat_turn takes the version the
+-- caller has cached (p_known_version) and omits the history ('history' is
+-- null) when nothing changed since; it always returns the new version.
+
+alter table public.chat_sessions
+    add column if not exists history_version bigint not null default 0;
+
+create or replace function public.bump_chat_history_version()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update chat_sessions
+    set history_version = history_version + 1
+    where id = coalesce(new.session_id, old.session_id);
+    return null;
+end;
+$$;
+
+drop trigger if exists chat_messages_history_version on public.chat_messages;
+create trigger chat_messages_history_version
+    after insert or update or delete on public.chat_messages
+    for each row execute function public.bump_chat_history_version();
+
+drop function if exists public.begin_chat_turn(uuid, uuid, text, integer);
+
+create or replace function public.begin_chat_turn(
+    p_session_id uuid,
+    p_user_id uuid,
+    p_content text,
+    p_history_limit integer default 10,
+    p_known_version bigint default null
+)
+returns jsonb
+language plpgsql
+volatile
+security invoker
+set search_path = public
+as $$
+declare
+    v_version bigint;
+    v_message chat_messages;
+    v_history jsonb;
+begin
+    -- Row lock: turns of one session are serialized, so versions never race.
+    select history_version into v_version
+    from chat_sessions
+    where id = p_session_id and user_id = p_user_id
+    for update;
+    if not found then
+        return null;
+    end if;
+
+    insert into chat_messages (session_id, role, content)
+    values (p_session_id, 'user', p_content)
+    returning * into v_message;
+
+    if p_known_version is distinct from v_version then
+        select coalesce(jsonb_agg(jsonb_build_object('role', h.role, 'content', h.content) order by h.created_at, h.id), '[]'::jsonb)
+        into v_history
+        from (
+            select m.id, m.role, m.content, m.created_at
+            from chat_messages m
+            where m.session_id = p_session_id
+            order by m.created_at desc, m.id desc
+            limit p_history_limit
+        ) h;
+    end if;
+
+    select history_version into v_version from chat_sessions where id = p_session_id;
+
+    return jsonb_build_object(
+        'user_message', to_jsonb(v_message),
+        'history', v_history,
+        'history_version', v_version
+    );
+end;
+$$;
+
+grant execute on function public.begin_chat_turn(uuid, uuid, text, integer, bigint) to service_role;
@@ -0,0 +1,37 @@
+-- Everything the Phase 2 feedback writer needs for a batch of rated assistant
+-- messages in one round trip: the message's stored citations and the last
+-- user message sent before it (the question whose embedding is recorded).
+--
+-- Replaces two chat_messages queries per vote (app/core/feedback_queue.py).
+-- Messages that are not assistant messages, or have no earlier user message,
+-- are returned with a null query.
+
+create or replace function public.get_feedback_event_sources(p_message_ids uuid[])
+returns table (
+    message_id uuid,
+    citations jsonb,
+    query text
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+    select a.id as message_id,
+           coalesce(a.metadata -> 'citations', '[]'::jsonb) as citations,
+           question.content as query
+    from chat_messages a
+    left join lateral (
+        select u.content
+        from chat_messages u
+        where u.session_id = a.session_id
+          and u.role = 'user'
+          and u.created_at < a.created_at
+        order by u.created_at desc
+        limit 1
+    ) question on true
+    where a.id = any(p_message_ids)
+      and a.role = 'assistant';
+$$;
+
+grant execute on function public.get_feedback_event_sources(uuid[]) to service_role;
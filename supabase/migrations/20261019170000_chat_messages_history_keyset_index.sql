@@ -0,0 +1,7 @@
+-- Message history pages on (created_at, id) so replies sharing a timestamp are
+-- neither skipped nor repeated; the id tiebreaker joins the history index.
+
+drop index if exists public.chat_messages_session_created_idx;
+
+create index if not exists chat_messages_session_created_id_idx
+    on public.chat_messages (session_id, created_at desc, id desc);
@@ -0,0 +1,65 @@
+-- History page search and date range on the server: the page used to filter
+-- only the sessions it had loaded, so matches on later pages never showed up.
+--
+-- p_search: case-insensitive substring of the title or of the last question
+-- preview (the text the page shows); p_since: sessions created at or after it.
+-- Both default to null, so existing callers get the same pages as before.
+
+drop function if exists public.get_session_summaries(uuid, integer, timestamptz, uuid);
+
+create or replace function public.get_session_summaries(
+    p_user_id uuid,
+    p_limit integer default null,
+    p_before_created_at timestamptz default null,
+    p_before_id uuid default null,
+    p_search text default null,
+    p_since timestamptz default null
+)
+returns table (
+    id uuid,
+    user_id uuid,
+    title text,
+    created_at timestamptz,
+    message_count bigint,
+    last_message text
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+    select s.id,
+           s.user_id,
+           s.title,
+           s.created_at,
+           coalesce(counts.message_count, 0) as message_count,
+           left(last_user.content, 100) as last_message
+    from chat_sessions s
+    left join lateral (
+        select count(*) as message_count
+        from chat_messages m
+        where m.session_id = s.id
+    ) counts on true
+    left join lateral (
+        select m.content
+        from chat_messages m
+        where m.session_id = s.id and m.role = 'user'
+        order by m.created_at desc
+        limit 1
+    ) last_user on true
+    where s.user_id = p_user_id
+      and (
+          p_before_created_at is null
+          or (s.created_at, s.id) < (p_before_created_at, coalesce(p_before_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'::uuid))
+      )
+      and (p_since is null or s.created_at >= p_since)
+      and (
+          p_search is null
+          or strpos(lower(coalesce(s.title, '')), lower(p_search)) > 0
+          or strpos(lower(left(coalesce(last_user.content, ''), 100)), lower(p_search)) > 0
+      )
+    order by s.created_at desc, s.id desc
+    limit p_limit;
+$$;
+
+grant execute on function public.get_session_summaries(uuid, integer, timestamptz, uuid, text, timestamptz) to authenticated;
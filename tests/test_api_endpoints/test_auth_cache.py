@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core import auth
+from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+SECRET = "test-jwt-secret-with-enough-bytes-for-hs256"
+
+
+@pytest.fixture()
+def db(monkeypatch):
+    database = MemoryDatabase()
+    monkeypatch.setattr(auth, "supabase", MemorySupabaseClient(database))
+    monkeypatch.setattr(auth, "access_cache", auth.UserAccessCache(60))
+    monkeypatch.setattr(settings, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "AUTH_LOCAL_JWT_VERIFY", True)
+    return database
+
+
+def _token(user_id, secret=SECRET, audience="authenticated", expires_in=3600):
+    claims = {"sub": user_id, "aud": audience, "role": "authenticated", "email": "a@example.com", "exp": int(time.time()) + expires_in}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def _profile(db, user_id, **changes):
+    db.tables["profiles"] = [dict(row, **changes) if row["id"] == user_id else row for row in db.tables["profiles"]]
+
+
+def test_token_is_verified_locally_and_status_is_cached_until_invalidated(db):
+    user, _ = db.create_user(role="user")
+    token = _token(user.id)
+
+    current = asyncio.run(auth.get_current_user(token))
+    assert (current.id, current.email) == (user.id, "a@example.com")
+
+    # The status is served from the cache until an admin endpoint invalidates it.
+    _profile(db, user.id, status="inactive")
+    assert asyncio.run(auth.get_current_user(token)).id == user.id
+    auth.invalidate_user_access(user.id)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_user(token))
+    assert exc.value.status_code == 403 and exc.value.detail == "Account is inactive"
+
+
+@pytest.mark.parametrize("token", [
+    _token("u1", secret="another-secret-with-enough-bytes-for-hs256"),
+    _token("u1", expires_in=-60),
+    _token("u1", audience="anon"),
+    "not-a-jwt",
+])
+def test_invalid_tokens_are_rejected_without_calling_supabase_auth(db, token):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_user(token))
+    assert exc.value.status_code == 401
+
+
+def test_admin_role_comes_from_the_cached_profile_lookup(db):
+    admin, _ = db.create_user(role="admin")
+    user = asyncio.run(auth.get_current_user(_token(admin.id)))
+    assert asyncio.run(auth.get_current_admin(user)) is user
+
+    _profile(db, admin.id, role="user")
+    auth.invalidate_user_access(admin.id)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_admin(user))
+    assert exc.value.status_code == 403
+
+
+def test_deleting_a_user_drops_its_cached_access_even_when_auth_fails(db, monkeypatch):
+    from app.api.endpoints.admin import users
+
+    admin, _ = db.create_user(role="admin")
+    user, _ = db.create_user(role="user")
+    client = MemorySupabaseClient(db)
+    monkeypatch.setattr(users, "supabase", client)
+    token = _token(user.id)
+    assert asyncio.run(auth.get_current_user(token)).id == user.id  # access now cached
+
+    def delete_then_time_out(user_id, *_args):
+        db.tables["profiles"] = [row for row in db.tables["profiles"] if row["id"] != user_id]
+        raise TimeoutError("auth API timed out after deleting")
+
+    monkeypatch.setattr(client.auth.admin, "delete_user", delete_then_time_out)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(users.delete_user(user.id, admin=admin))
+    assert exc.value.status_code == 500
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_user(token))
+    assert exc.value.status_code == 401  # no profile any more
@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import pytest
 from app.api.endpoints import chat
+from app.core.history_cache import SessionHistoryCache
 from app.services.content_repository import ContentRepository
 from app.services.supabase_content_repository import SupabaseContentRepository
 
@@ -41,6 +42,10 @@ class FakeRpcQuery:
 		return SupabaseQueryResponse(self._data)
 
 
+class MissingFunctionError(Exception):
+	code = "PGRST202"
+
+
 class FakeTableQuery:
 	"""A fake Supabase client and query classes for testing"""
 	def __init__(self, data=None, error: Exception | None = None):
@@ -102,7 +107,8 @@ class FakeSupabase:
 		self.rpc_calls.append((fn_name, params))
 		queue = self.rpc_queries.get(fn_name, [])
 		if not queue:
-			raise AssertionError(f"Unexpected rpc call: {fn_name}")
+			# As PostgREST answers when the migration defining the function is not applied.
+			return FakeRpcQuery(error=MissingFunctionError(f"Could not find the function public.{fn_name}"))
 		query = queue.pop(0)
 		self.rpc_queries[fn_name] = queue
 		return query
@@ -167,6 +173,7 @@ def test_send_message_returns_assistant_message(client, monkeypatch):
 		"role": "assistant",
 		"content": "Kali and  Natri Sunfat.",
 		"citations": [{"source": "nutrition-guide.pdf"}],
+		"relevant_images": [],
 		"created_at": "2026-03-17T09:00:00Z",
 	}
 	assert captured["question"] == "What is beef nutrition?"
@@ -184,7 +191,7 @@ def test_send_message_returns_assistant_message(client, monkeypatch):
 		"session_id": "session-1",
 		"role": "assistant",
 		"content": "Kali and  Natri Sunfat.",
-		"metadata": {"citations": [{"source": "nutrition-guide.pdf"}]},
+		"metadata": {"citations": [], "relevant_images": []},
 	}
 	assert history_query.order_by == ("created_at", True)
 	assert history_query.limit_value == 10
@@ -260,6 +267,165 @@ def test_send_message_returns_500_on_unexpected_exception(client, monkeypatch):
 	assert response.json() == {"detail": "database unavailable"}
 
 
+def test_send_message_starts_the_turn_with_one_rpc(client, monkeypatch):
+	"""Test that ownership check, user message insert and history load are one begin_chat_turn call"""
+	from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+	db = MemoryDatabase()
+	db.insert("chat_sessions", {"id": "session-1", "user_id": "user-123"})
+	db.insert("chat_sessions", {"id": "session-2", "user_id": "someone-else"})
+	for i in range(12):
+		db.insert("chat_messages", {"session_id": "session-1", "role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}"})
+	monkeypatch.setattr(chat, "history_cache", SessionHistoryCache(10))
+	fake_supabase = MemorySupabaseClient(db)
+	tables = []
+	monkeypatch.setattr(fake_supabase, "table", lambda name: tables.append(name) or MemorySupabaseClient.table(fake_supabase, name))
+	monkeypatch.setattr(chat, "supabase", fake_supabase)
+	captured = {}
+
+	def fake_ask(question, top_k=None, conversation_history=None):
+		captured["conversation_history"] = conversation_history
+		return {"success": True, "answer": "reply", "context_used": []}
+
+	monkeypatch.setattr(chat.chat_service, "ask_question", fake_ask)
+
+	response = client.post("/api/chat/message", json={"session_id": "session-1", "content": "latest"})
+
+	assert response.status_code == 200
+	assert [m["content"] for m in captured["conversation_history"]] == [f"m{i}" for i in range(3, 12)] + ["latest"]
+	# Only the assistant insert touches a table directly.
+	assert tables == ["chat_messages"]
+	assert [m["content"] for m in db.tables["chat_messages"][-2:]] == ["latest", "reply"]
+
+	response = client.post("/api/chat/message", json={"session_id": "session-2", "content": "not mine"})
+	assert response.status_code == 404
+	assert not any(m["content"] == "not mine" for m in db.tables["chat_messages"])
+
+
+def test_send_message_does_not_repeat_the_turn_when_the_rpc_fails(client, monkeypatch):
+	"""Test that only a missing begin_chat_turn function falls back; a dropped RPC response must not insert the message again"""
+	fake_supabase = FakeSupabase(
+		{},
+		rpc_queries={"begin_chat_turn": [FakeRpcQuery(error=TimeoutError("read timed out"))]},
+	)
+	monkeypatch.setattr(chat, "supabase", fake_supabase)
+	monkeypatch.setattr(chat, "history_cache", SessionHistoryCache(10))
+	monkeypatch.setattr(
+		chat.chat_service,
+		"ask_question",
+		lambda *args, **kwargs: pytest.fail("the turn failed; the LLM must not be called"),
+	)
+
+	response = client.post("/api/chat/message", json={"session_id": "session-1", "content": "q1"})
+
+	assert response.status_code == 500
+	assert response.json() == {"detail": "read timed out"}
+	assert [name for name, _ in fake_supabase.rpc_calls] == ["begin_chat_turn"]
+	assert fake_supabase.table_calls == []
+
+
+def test_send_message_returns_500_and_drops_cached_history_when_the_reply_is_not_saved(client, monkeypatch):
+	"""Test that the reply is saved before responding, so a failed insert never returns a message id"""
+	from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+	db = MemoryDatabase()
+	db.insert("chat_sessions", {"id": "session-1", "user_id": "user-123"})
+	fake_supabase = MemorySupabaseClient(db)
+	monkeypatch.setattr(chat, "supabase", fake_supabase)
+	cache = SessionHistoryCache(10)
+	monkeypatch.setattr(chat, "history_cache", cache)
+	monkeypatch.setattr(
+		chat.chat_service,
+		"ask_question",
+		lambda *args, **kwargs: {"success": True, "answer": "reply", "context_used": []},
+	)
+
+	def failing_table(name):
+		raise RuntimeError("insert failed")
+
+	monkeypatch.setattr(fake_supabase, "table", failing_table)
+
+	response = client.post("/api/chat/message", json={"session_id": "session-1", "content": "q1"})
+
+	assert response.status_code == 500
+	assert cache.get("session-1") is None
+	assert [m["role"] for m in db.tables["chat_messages"]] == ["user"]
+
+
+def test_send_message_reuses_cached_history_until_another_writer_changes_the_session(client, monkeypatch):
+	"""Test that consecutive turns skip the history query and a write elsewhere forces a reload"""
+	from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+	db = MemoryDatabase()
+	db.insert("chat_sessions", {"id": "session-1", "user_id": "user-123"})
+	monkeypatch.setattr(chat, "supabase", MemorySupabaseClient(db))
+	monkeypatch.setattr(chat, "history_cache", SessionHistoryCache(10))
+	histories, rpc_results = [], []
+	begin_chat_turn = db.rpcs["begin_chat_turn"]
+
+	def spy_begin_chat_turn(db, **params):
+		rpc_results.append(begin_chat_turn(db, **params))
+		return rpc_results[-1]
+
+	db.register_rpc("begin_chat_turn", spy_begin_chat_turn)
+
+	def fake_ask(question, top_k=None, conversation_history=None):
+		histories.append([m["content"] for m in conversation_history])
+		return {"success": True, "answer": f"re: {question}", "context_used": []}
+
+	monkeypatch.setattr(chat.chat_service, "ask_question", fake_ask)
+
+	for content in ("q1", "q2"):
+		assert client.post("/api/chat/message", json={"session_id": "session-1", "content": content}).status_code == 200
+	# A message written by another worker bumps the session's history version.
+	db.insert("chat_messages", {"session_id": "session-1", "role": "user", "content": "elsewhere"})
+	assert client.post("/api/chat/message", json={"session_id": "session-1", "content": "q3"}).status_code == 200
+
+	assert histories == [
+		["q1"],
+		["q1", "re: q1", "q2"],
+		["q1", "re: q1", "q2", "re: q2", "elsewhere", "q3"],
+	]
+	assert [r["history"] is None for r in rpc_results] == [False, True, False]
+
+
+def test_send_message_stores_compact_citations_and_hydrates_them_on_demand(client, monkeypatch):
+	"""Test that replies store only chunk ids/scores/ranks and the citations endpoint rebuilds the text"""
+	from app.core import chunk_cache
+	from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+	db = MemoryDatabase()
+	db.insert("chat_sessions", {"id": "session-1", "user_id": "user-123"})
+	db.insert("chat_sessions", {"id": "session-2", "user_id": "someone-else"})
+	db.insert("document_chunks", {"chunk_id": "c1", "doc_id": "guide", "content": "Beef is rich in iron.", "source": "guide.pdf", "source_type": "document"})
+	monkeypatch.setattr(chat, "supabase", MemorySupabaseClient(db))
+	monkeypatch.setattr(chunk_cache, "chunk_cache", chunk_cache.ChunkCache(100, 60))
+	monkeypatch.setattr(chat, "history_cache", SessionHistoryCache(10))
+	retrieved = make_search_result(chunk_id="c1", text="Beef is rich in iron.", score=0.91)
+	monkeypatch.setattr(chat.chat_service, "ask_question", lambda *a, **k: {"success": True, "answer": "Iron.", "context_used": [retrieved]})
+
+	response = client.post("/api/chat/message", json={"session_id": "session-1", "content": "Is beef healthy?"})
+	assert response.status_code == 200
+	assert response.json()["citations"][0]["text"] == "Beef is rich in iron."
+	message_id = response.json()["id"]
+	stored = next(m for m in db.tables["chat_messages"] if m["id"] == message_id)
+	assert stored["metadata"]["citations"] == [{"chunk_id": "c1", "score": 0.91, "rank": 1}]
+
+	# Hydration goes through the chunk cache, so a second read needs no query.
+	for _ in range(2):
+		hydrated = client.get(f"/api/chat/messages/{message_id}/citations")
+		assert hydrated.status_code == 200
+		citation = hydrated.json()["citations"][0]
+		assert (citation["text"], citation["source"], citation["doc_id"], citation["score"]) == ("Beef is rich in iron.", "guide.pdf", "guide", 0.91)
+		db.tables["document_chunks"] = []
+
+	# Legacy rows with full citations are returned unchanged; other users' messages are hidden.
+	[legacy] = db.insert("chat_messages", {"session_id": "session-1", "role": "assistant", "content": "old", "metadata": {"citations": [{"chunk_id": "c9", "text": "stored text"}]}})
+	assert client.get(f"/api/chat/messages/{legacy['id']}/citations").json()["citations"] == [{"chunk_id": "c9", "text": "stored text"}]
+	[foreign] = db.insert("chat_messages", {"session_id": "session-2", "role": "assistant", "content": "x", "metadata": {}})
+	assert client.get(f"/api/chat/messages/{foreign['id']}/citations").status_code == 404
+
+
 def test_send_message_missing_field_returns_422(client):
 	"""Test that sending a message with missing fields returns 422"""
 	response = client.post("/api/chat/message", json={"session_id": "session-123"})
@@ -299,6 +465,31 @@ def test_submit_feedback_returns_success(client, monkeypatch, rating):
 	]
 
 
+def test_submit_feedback_queues_the_query_aware_event_sync(client, monkeypatch):
+	"""Test that a vote is handed to the write-behind feedback queue instead of synced inline"""
+	monkeypatch.setattr(chat.settings, "FEEDBACK_ENABLED", True, raising=False)
+	monkeypatch.setattr(chat.settings, "FEEDBACK_QUEUE_FLUSH_SECONDS", 2, raising=False)
+	fake_supabase = FakeSupabase({
+		"chat_messages": [FakeTableQuery(data=[{"id": "msg-123", "session_id": "session-123", "metadata": {"citations": [{"chunk_id": "c1"}]}}])],
+		"chat_sessions": [FakeTableQuery(data=[{"id": "session-123"}])],
+	}, rpc_queries={
+		"submit_message_feedback": [FakeRpcQuery(data={"ok": True})],
+	})
+	monkeypatch.setattr(chat, "supabase", fake_supabase)
+	refreshed, queued = [], []
+	monkeypatch.setattr(chat._feedback_service, "refresh_chunk_scores", refreshed.append)
+	monkeypatch.setattr(chat.feedback_queue, "submit", queued.append)
+
+	response = client.post(
+		"/api/chat/feedback",
+		json={"message_id": "msg-123", "session_id": "session-123", "rating": -1},
+	)
+
+	assert response.status_code == 200
+	assert refreshed == [["c1"]]
+	assert queued == ["msg-123"]
+
+
 @pytest.mark.parametrize("rating", [-1, 1])
 def test_submit_feedback_returns_500_on_exception(client, monkeypatch, rating):
 	"""Test that submitting feedback returns 500 when the atomic RPC raises an exception."""
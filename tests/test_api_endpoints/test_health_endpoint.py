@@ -37,4 +37,18 @@ def test_health_endpoint_post_method_not_allowed(client):
     """Test that POST on health endpoint is not allowed."""
     response = client.post("/health")
 
-    assert response.status_code == 405
\ No newline at end of file
+    assert response.status_code == 405
+
+def test_health_ready_returns_503_until_warmup_finishes(client, monkeypatch):
+    state = health.warmup.WarmupState()
+    monkeypatch.setattr(health.warmup, "state", state)
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+    health.warmup.run_warmup(steps=[("embedding_model", lambda: None)], state=state)
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["steps"]["embedding_model"]["status"] == "ok"
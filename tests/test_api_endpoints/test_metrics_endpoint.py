@@ -0,0 +1,49 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from app.api.endpoints import metrics
+from app.core import metrics as core_metrics
+from app.core.metrics import MetricsMiddleware
+
+
+@pytest.fixture()
+def client():
+    app = FastAPI()
+    items = APIRouter()
+
+    @items.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.include_router(items, prefix="/api")
+    app.include_router(metrics.router)
+    app.add_middleware(MetricsMiddleware)
+    return TestClient(app)
+
+
+def test_metrics_endpoint_reports_request_latency_by_route_template(client):
+    if not core_metrics.ENABLED:
+        pytest.skip("METRICS_ENABLED is off")
+
+    client.get("/api/items/1")
+    client.get("/api/items/2")
+    client.get("/does-not-exist")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/api/items/{item_id}"' in body
+    assert 'route="unmatched",status="404"' in body
+    assert "/api/items/1" not in body
+
+
+def test_metrics_endpoint_returns_503_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(metrics, "render_latest", lambda: None)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 503
@@ -0,0 +1,63 @@
+import types
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints.admin import profiling
+
+
+@pytest.fixture()
+def client():
+    app = FastAPI()
+    app.include_router(profiling.router, prefix="/api/admin")
+    app.dependency_overrides[profiling.get_current_admin] = lambda: types.SimpleNamespace(id="admin-1")
+    return TestClient(app)
+
+
+def test_capture_profile_returns_summary_and_collapsed_stacks(client):
+    response = client.post("/api/admin/profile", params={"seconds": 0.2, "interval_ms": 5})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["mode"] == "wall"
+    assert data["ticks"] > 0
+    assert data["samples"] > 0
+    assert data["collapsed"].strip()
+
+
+def test_capture_profile_collapsed_download(client):
+    response = client.post("/api/admin/profile", params={"seconds": 0.1, "format": "collapsed"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert ".collapsed" in response.headers["content-disposition"]
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_capture_profile_rejects_concurrent_capture_and_long_duration(client):
+    assert client.post("/api/admin/profile", params={"seconds": 10_000}).status_code == 400
+
+    assert profiling.profiler.capture_lock.acquire(blocking=False)
+    try:
+        assert client.post("/api/admin/profile", params={"seconds": 0.1}).status_code == 409
+    finally:
+        profiling.profiler.capture_lock.release()
+
+
+def test_profile_captures_list_and_download(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling.profiler.settings, "PROFILES_DIR", tmp_path)
+    result = profiling.profiler.Profile(mode="wall", interval_ms=10, duration_s=1.5, ticks=3)
+    result.stacks[("MainThread", "ask_question (app/services/chat_service.py:40)")] = 3
+    name = profiling.profiler.save_capture(result, {"method": "POST", "path": "/api/chat/message"})
+
+    listed = client.get("/api/admin/profile/captures").json()
+    assert listed["total"] == 1
+    assert listed["captures"][0]["name"] == name
+    assert listed["captures"][0]["path"] == "/api/chat/message"
+
+    download = client.get(f"/api/admin/profile/captures/{name}")
+    assert download.status_code == 200
+    assert download.text == "MainThread;ask_question (app/services/chat_service.py:40) 3\n"
+    assert client.get("/api/admin/profile/captures/missing").status_code == 404
@@ -90,6 +90,19 @@ class FakeUserClient:
         self.table_queries[table_name] = queue
         return query
 
+    def rpc(self, name, params=None):
+        # As PostgREST answers when the migration defining the function is not applied.
+        return FakeSessionQuery(error=MissingFunctionError(f"Could not find the function public.{name}"))
+
+
+class MissingFunctionError(Exception):
+    code = "PGRST202"
+
+
+def session_id(i):
+    "Session ids are UUIDs, as the paging cursor requires"
+    return f"00000000-0000-4000-8000-{i:012d}"
+
 
 def make_session(**kwargs):
     "Use to set up a session structure"
@@ -402,4 +415,201 @@ def test_update_session_title_missing_title_returns_422(client, dependency_state
 
     response = client.patch("/api/sessions/session-123", json={})
 
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+def test_get_sessions_detail_pages_through_summaries_rpc(client, dependency_state):
+    """Test that detail=true uses one get_session_summaries RPC per page and follows X-Next-Cursor."""
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    db = MemoryDatabase()
+    for i in range(5):
+        db.insert("chat_sessions", {"id": session_id(i), "user_id": "user-123", "title": f"Chat {i}"})
+        db.insert("chat_messages", [
+            {"session_id": session_id(i), "role": "user", "content": f"first {i}"},
+            {"session_id": session_id(i), "role": "assistant", "content": "answer"},
+            {"session_id": session_id(i), "role": "user", "content": f"last question {i}"},
+        ])
+    db.insert("chat_sessions", {"id": "other", "user_id": "user-999", "title": "Not mine"})
+    user_client = MemorySupabaseClient(db)
+    user_client.table = lambda name: pytest.fail(f"Unexpected table call: {name}")
+    dependency_state["user_client"] = user_client
+
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/sessions", params={"detail": "true", "limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [[s["id"] for s in page] for page in pages] == [[session_id(4), session_id(3)], [session_id(2), session_id(1)], [session_id(0)]]
+    assert pages[0][0]["message_count"] == 3
+    assert pages[0][0]["last_message"] == "last question 4"
+
+
+def test_get_sessions_detail_rejects_invalid_cursor(client, dependency_state):
+    """Test that a malformed cursor returns 400."""
+    dependency_state["user_client"] = FakeUserClient({})
+
+    response = client.get("/api/sessions?detail=true&limit=2&cursor=not-a-cursor")
+
+    assert response.status_code == 400
+
+
+def test_get_session_history_pages_backwards_with_light_metadata(client, dependency_state):
+    """Test keyset paging of a session's messages, newest page first, with heavy metadata omitted."""
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    db = MemoryDatabase()
+    db.insert("chat_sessions", {"id": "session-123", "user_id": "user-123"})
+    image = {"url": "https://example.com/feed.png", "position": 0}
+    for i in range(7):
+        db.insert("chat_messages", {
+            "id": f"m{i}",
+            "session_id": "session-123",
+            "role": "assistant",
+            "content": f"answer {i}",
+            "metadata": {"citations": [{"chunk_id": "c1", "text": "x" * 1000}], "relevant_images": [image]},
+        })
+    dependency_state["user_client"] = MemorySupabaseClient(db)
+
+    response = client.get("/api/sessions/session-123", params={"limit": 3, "metadata": "light"})
+    assert response.status_code == 200
+    assert response.headers["X-Has-More"] == "true"
+    page = response.json()
+    assert [m["id"] for m in page] == ["m4", "m5", "m6"]
+    assert page[0]["metadata"] == {"relevant_images": [image]}
+
+    older = client.get("/api/sessions/session-123", params={"limit": 3, "before": page[0]["created_at"], "metadata": "none"})
+    assert [m["id"] for m in older.json()] == ["m1", "m2", "m3"]
+    assert older.json()[0]["metadata"] is None
+
+    newer = client.get("/api/sessions/session-123", params={"limit": 3, "after": older.json()[-1]["created_at"]})
+    assert [m["id"] for m in newer.json()] == ["m4", "m5", "m6"]
+    assert newer.headers["X-Has-More"] == "false"
+    assert "citations" in newer.json()[0]["metadata"]
+
+
+def test_get_session_history_pages_past_messages_sharing_a_timestamp(client, dependency_state):
+    """Test the (created_at, id) keyset: no message with an equal created_at is skipped or repeated."""
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    db = MemoryDatabase()
+    db.insert("chat_sessions", {"id": "session-123", "user_id": "user-123"})
+    ids = [f"00000000-0000-4000-8000-00000000000{i}" for i in range(5)]
+    for i in range(5):
+        db.insert("chat_messages", {
+            "id": ids[i],
+            "session_id": "session-123",
+            "role": "assistant",
+            "content": f"answer {i}",
+            "created_at": "2026-03-17T09:00:00+00:00" if i < 4 else "2026-03-17T09:00:01+00:00",
+        })
+    dependency_state["user_client"] = MemorySupabaseClient(db)
+
+    page = client.get("/api/sessions/session-123", params={"limit": 2}).json()
+    assert [m["id"] for m in page] == ids[3:5]
+
+    older = client.get(
+        "/api/sessions/session-123",
+        params={"limit": 2, "before": page[0]["created_at"], "before_id": page[0]["id"]},
+    )
+    assert [m["id"] for m in older.json()] == ids[1:3]
+    assert older.headers["X-Has-More"] == "true"
+
+    newer = client.get(
+        "/api/sessions/session-123",
+        params={"limit": 3, "after": older.json()[0]["created_at"], "after_id": older.json()[0]["id"]},
+    )
+    assert [m["id"] for m in newer.json()] == ids[2:5]
+    assert newer.headers["X-Has-More"] == "false"
+
+
+def test_get_sessions_detail_does_not_mask_other_rpc_errors(client, dependency_state):
+    """Test that only a missing get_session_summaries function falls back to per-session queries."""
+    user_client = FakeUserClient({})
+    user_client.rpc = lambda name, params=None: FakeSessionQuery(error=RuntimeError("permission denied"))
+    dependency_state["user_client"] = user_client
+
+    response = client.get("/api/sessions?detail=true")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "permission denied"}
+    assert user_client.table_calls == []
+
+
+@pytest.mark.parametrize("with_rpc", [True, False])
+def test_get_sessions_detail_filters_on_the_server(client, dependency_state, with_rpc):
+    """Test that ?q= and ?since= filter every page, not just the sessions already loaded."""
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    db = MemoryDatabase()
+    for i in range(6):
+        db.insert("chat_sessions", {
+            "id": session_id(i),
+            "user_id": "user-123",
+            "title": "Feed costs" if i in (0, 3) else f"Chat {i}",
+            "created_at": f"2026-03-1{i}T09:00:00+00:00",
+        })
+        db.insert("chat_messages", {"session_id": session_id(i), "role": "user", "content": "About RATIONS" if i == 1 else "hello"})
+    if not with_rpc:
+        del db.rpcs["get_session_summaries"]
+    dependency_state["user_client"] = MemorySupabaseClient(db)
+
+    pages, cursor = [], None
+    while True:
+        params = {"detail": "true", "limit": 1, "q": "  feed ", **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/sessions", params=params)
+        assert response.status_code == 200
+        pages.append([s["id"] for s in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == [[session_id(3)], [session_id(0)]]
+
+    ration = client.get("/api/sessions", params={"detail": "true", "q": "rations"}).json()
+    assert [s["id"] for s in ration] == [session_id(1)]
+
+    recent = client.get("/api/sessions", params={"detail": "true", "since": "2026-03-14T00:00:00+00:00"}).json()
+    assert [s["id"] for s in recent] == [session_id(5), session_id(4)]
+
+    assert client.get("/api/sessions", params={"detail": "true", "since": "last week"}).status_code == 422
+
+
+@pytest.mark.parametrize("with_rpc", [True, False])
+def test_get_sessions_detail_pages_past_sessions_sharing_a_timestamp(client, dependency_state, with_rpc):
+    """Test that the RPC and the per-session fallback both page on (created_at, id), dropping no ties."""
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    db = MemoryDatabase()
+    for i in range(5):
+        db.insert("chat_sessions", {"id": session_id(i), "user_id": "user-123", "created_at": "2026-03-17T09:00:00+00:00"})
+    if not with_rpc:
+        del db.rpcs["get_session_summaries"]
+    dependency_state["user_client"] = MemorySupabaseClient(db)
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/sessions", params={"detail": "true", "limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [s["id"] for s in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [session_id(i) for i in reversed(range(5))]
+
+
+@pytest.mark.parametrize("params", [
+    {"before": '2026-03-17T09:00:00",id.gt."0'},
+    {"before": "2026-03-17T09:00:00+00:00", "before_id": 'x"),role.eq.(user'},
+    {"after": "yesterday"},
+])
+def test_get_session_history_rejects_malformed_cursors(client, dependency_state, params):
+    """Test that cursor values are parsed before they reach the PostgREST filter."""
+    dependency_state["user_client"] = FakeUserClient({})
+
+    response = client.get("/api/sessions/session-123", params={"limit": 2, **params})
+
+    assert response.status_code == 422
@@ -1,7 +1,12 @@
+import hashlib
+import os
+from types import SimpleNamespace
+
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import pytest
 from app.api.endpoints import videos
+from app.transcription import audio
 
 @pytest.fixture()
 def client():
@@ -17,7 +22,7 @@ def test_upload_video_returns_expected_payload(client, monkeypatch):
         upload_calls.append(storage_path)
         return f"https://cdn.example.com/{storage_path}"
 
-    def fake_transcribe_to_segments(tmp_video_path, model_name, language):
+    def fake_transcribe_to_segments(tmp_video_path, model_name, language, backend_name=None):
         return [
             {"start": 0.0, "end": 2.0, "text": "Beef nutrition starts here."},
             {"start": 2.0, "end": 4.0, "text": "Protein and minerals are discussed."},
@@ -94,7 +99,7 @@ def test_upload_video_returns_500_on_transcription_error(client, monkeypatch):
     monkeypatch.setattr(videos, "_bucket_name", lambda: "cfc-videos-test")
     monkeypatch.setattr(videos, "_upload_bytes", lambda *_args, **_kwargs: "https://cdn.example.com/videos/file.mp4")
 
-    def fail_transcription(_tmp_video_path, _model_name, _language):
+    def fail_transcription(_tmp_video_path, _model_name, _language, _backend_name=None):
         raise RuntimeError("transcription exploded")
 
     monkeypatch.setattr(videos, "_transcribe_to_segments", fail_transcription)
@@ -106,4 +111,134 @@ def test_upload_video_returns_500_on_transcription_error(client, monkeypatch):
     )
 
     assert response.status_code == 500
-    assert response.json() == {"detail": "Upload/transcription failed: transcription exploded"}
\ No newline at end of file
+    assert response.json() == {"detail": "Upload/transcription failed: transcription exploded"}
+
+
+def test_upload_video_passes_requested_backend(client, monkeypatch):
+    seen = {}
+
+    def fake_transcribe_to_segments(tmp_video_path, model_name, language, backend_name=None):
+        seen["backend"] = backend_name
+        return [{"start": 0.0, "end": 2.0, "text": "Beef nutrition starts here."}]
+
+    monkeypatch.setattr(videos, "_bucket_name", lambda: "cfc-videos-test")
+    monkeypatch.setattr(videos, "_upload_bytes", lambda *_args, **_kwargs: "https://cdn.example.com/file")
+    monkeypatch.setattr(videos, "_transcribe_to_segments", fake_transcribe_to_segments)
+    monkeypatch.setattr(videos, "_index_transcript_chunks", lambda *_args, **_kwargs: 1)
+    monkeypatch.setattr(videos, "get_backend", lambda name=None: SimpleNamespace(name=name))
+
+    response = client.post(
+        "/api/videos/upload",
+        data={"slug": "beef-clip", "model": "small", "backend": "faster-whisper"},
+        files={"file": ("beef-clip.mp4", b"fake-video-bytes", "video/mp4")},
+    )
+
+    assert response.status_code == 200
+    assert seen["backend"] == "faster-whisper"
+
+
+def test_upload_video_rejects_unknown_backend(client):
+    response = client.post(
+        "/api/videos/upload",
+        data={"slug": "beef-clip", "model": "small", "backend": "nope"},
+        files={"file": ("beef-clip.mp4", b"fake-video-bytes", "video/mp4")},
+    )
+
+    assert response.status_code == 400
+    assert "Unknown transcription backend" in response.json()["detail"]
+
+
+def test_upload_video_transcribes_extracted_audio_track(client, monkeypatch, tmp_path):
+    audio_file = tmp_path / "track.wav"
+    audio_file.write_bytes(b"RIFF")
+    seen = {}
+
+    def fake_prepare_audio(tmp_video_path, content_hash):
+        seen["video"] = tmp_video_path
+        seen["hash"] = content_hash
+        return str(audio_file)
+
+    def fake_transcribe_to_segments(media_path, model_name, language, backend_name=None):
+        seen["media"] = media_path
+        return [{"start": 0.0, "end": 2.0, "text": "Beef nutrition starts here."}]
+
+    monkeypatch.setattr(videos, "_bucket_name", lambda: "cfc-videos-test")
+    monkeypatch.setattr(videos, "_upload_bytes", lambda *_args, **_kwargs: "https://cdn.example.com/file")
+    monkeypatch.setattr(videos, "_prepare_audio", fake_prepare_audio)
+    monkeypatch.setattr(videos, "_transcribe_to_segments", fake_transcribe_to_segments)
+    monkeypatch.setattr(videos, "_index_transcript_chunks", lambda *_args, **_kwargs: 1)
+
+    response = client.post(
+        "/api/videos/upload",
+        data={"slug": "beef-clip", "model": "small"},
+        files={"file": ("beef-clip.mp4", b"fake-video-bytes", "video/mp4")},
+    )
+
+    assert response.status_code == 200
+    assert seen["media"] == str(audio_file)
+    assert seen["hash"] == hashlib.sha256(b"fake-video-bytes").hexdigest()
+    # The video temp file is dropped once the audio track exists; the cached track is kept.
+    assert not os.path.exists(seen["video"])
+    assert audio_file.exists()
+
+
+def test_upload_video_prunes_the_audio_cache_after_transcription(client, monkeypatch, tmp_path):
+    events = []
+    held = {}
+    monkeypatch.setattr(videos.settings, "AUDIO_CACHE_DIR", tmp_path)
+
+    def fake_transcribe_to_segments(media_path, model_name, language, backend_name=None):
+        held["during"] = dict(audio._held_tracks)
+        events.append("transcribe")
+        return [{"start": 0.0, "end": 2.0, "text": "Beef nutrition starts here."}]
+
+    def fake_prune(cache_dir, max_bytes, protected=()):
+        held["after"] = dict(audio._held_tracks)
+        events.append(("prune", [p.name for p in protected]))
+        return 0
+
+    monkeypatch.setattr(videos, "_bucket_name", lambda: "cfc-videos-test")
+    monkeypatch.setattr(videos, "_upload_bytes", lambda *_args, **_kwargs: "https://cdn.example.com/file")
+    monkeypatch.setattr(videos, "_prepare_audio", lambda tmp_video_path, content_hash: tmp_video_path)
+    monkeypatch.setattr(videos, "_transcribe_to_segments", fake_transcribe_to_segments)
+    monkeypatch.setattr(videos, "_index_transcript_chunks", lambda *_args, **_kwargs: 1)
+    monkeypatch.setattr(videos, "prune_audio_cache", fake_prune)
+
+    response = client.post(
+        "/api/videos/upload",
+        data={"slug": "beef-clip", "model": "small"},
+        files={"file": ("beef-clip.mp4", b"fake-video-bytes", "video/mp4")},
+    )
+
+    assert response.status_code == 200
+    track = f"{hashlib.sha256(b'fake-video-bytes').hexdigest()}.wav"
+    assert events == ["transcribe", ("prune", [track])]
+    assert [p.name for p in held["during"]] == [track]
+    assert held["after"] == {}
+
+
+def test_chunked_indexing_removes_written_chunks_when_a_window_fails(monkeypatch):
+    from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+    window = SimpleNamespace(index=0, core_start=0.0, core_end=300.0)
+
+    def windows(*_args, **_kwargs):
+        yield window, [{"start": 0.0, "end": 2.0, "text": "first window"}]
+        raise RuntimeError("worker died")
+
+    db = MemoryDatabase()
+    db.insert("document_chunks", [{"chunk_id": "c1", "doc_id": "clip"}, {"chunk_id": "other", "doc_id": "other"}])
+    deleted = []
+    fake_index = SimpleNamespace(delete=lambda ids, **kwargs: deleted.extend(ids))
+    monkeypatch.setattr(videos, "iter_transcribed_windows", windows)
+    monkeypatch.setattr(videos, "_public_url", lambda bucket, path: f"https://cdn.example.com/{path}")
+    monkeypatch.setattr(videos, "_write_transcript_chunks", lambda *_args: ["c1"])
+    monkeypatch.setattr(videos, "_pinecone_index", lambda: fake_index)
+    monkeypatch.setattr(videos, "_pinecone_namespace", lambda: None)
+    monkeypatch.setattr(videos, "get_client", lambda *_args: MemorySupabaseClient(db))
+
+    with pytest.raises(RuntimeError, match="worker died"):
+        videos._transcribe_chunked_and_index("audio.wav", "clip", "small", None, "bucket", "https://cdn.example.com/v.mp4")
+
+    assert deleted == ["c1"]
+    assert [row["chunk_id"] for row in db.tables["document_chunks"]] == ["other"]
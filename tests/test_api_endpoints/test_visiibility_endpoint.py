@@ -227,3 +227,16 @@ def test_get_vector_store_stats_returns_500_on_exception(client, monkeypatch):
 
     assert response.status_code == 500
     assert response.json() == {"detail": "Failed to fetch vector store stats"}
+
+
+def test_get_vector_store_connections_reports_registry_stats(client, monkeypatch):
+    monkeypatch.setattr(
+        visibility,
+        "vector_store_stats",
+        lambda: {"backend": "pinecone", "client_created": True, "indexes": {}, "stores": []},
+    )
+
+    response = client.get("/visibility/vector-store/connections")
+
+    assert response.status_code == 200
+    assert response.json()["client_created"] is True
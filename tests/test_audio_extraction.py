@@ -0,0 +1,100 @@
+import os
+import subprocess
+import wave
+
+import pytest
+
+from app.transcription import audio
+from app.transcription.audio import extract_audio_track, ffmpeg_binary, prune_audio_cache
+
+pytestmark = pytest.mark.skipif(ffmpeg_binary() is None, reason="ffmpeg not available")
+
+
+@pytest.fixture()
+def stereo_clip(tmp_path):
+    path = tmp_path / "clip.mkv"
+    subprocess.run(
+        [
+            ffmpeg_binary(), "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", "sine=frequency=440:duration=2:sample_rate=44100",
+            "-ac", "2", "-c:a", "pcm_s16le", str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def test_extract_audio_track_writes_16k_mono_wav(stereo_clip, tmp_path):
+    track = extract_audio_track(str(stereo_clip), tmp_path / "cache", "abc123")
+
+    assert track.name == "abc123.wav"
+    with wave.open(str(track)) as wav:
+        assert wav.getframerate() == 16000
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert abs(wav.getnframes() / 16000 - 2.0) < 0.05
+    assert list((tmp_path / "cache").glob("*.part")) == []
+
+
+def test_extract_audio_track_reuses_cached_track(stereo_clip, tmp_path, monkeypatch):
+    first = extract_audio_track(str(stereo_clip), tmp_path / "cache")
+
+    def no_ffmpeg(*_args, **_kwargs):
+        raise AssertionError("ffmpeg should not run for a cached track")
+
+    monkeypatch.setattr(audio.subprocess, "run", no_ffmpeg)
+    second = extract_audio_track(str(stereo_clip), tmp_path / "cache")
+
+    assert second == first
+
+
+def test_extract_audio_track_raises_for_non_media(tmp_path):
+    bogus = tmp_path / "bogus.mp4"
+    bogus.write_bytes(b"not a video")
+
+    with pytest.raises(RuntimeError):
+        extract_audio_track(str(bogus), tmp_path / "cache")
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_prune_audio_cache_removes_least_recently_used(tmp_path):
+    for i, name in enumerate(["old", "mid", "new"]):
+        entry = tmp_path / f"{name}.wav"
+        entry.write_bytes(b"x" * 100)
+        os.utime(entry, (1000 + i, 1000 + i))
+
+    removed = prune_audio_cache(tmp_path, max_bytes=200)
+
+    assert removed == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mid.wav", "new.wav"]
+
+
+def test_prune_audio_cache_keeps_the_just_extracted_track_even_when_it_alone_is_too_big(stereo_clip, tmp_path):
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    stale = cache / "stale.wav"
+    stale.write_bytes(b"x" * 100)
+    os.utime(stale, (1000, 1000))
+    track = extract_audio_track(str(stereo_clip), cache, "abc123")
+
+    removed = prune_audio_cache(cache, max_bytes=10, protected=[track])
+
+    assert removed == 1
+    assert track.exists()
+    assert not stale.exists()
+
+
+def test_prune_audio_cache_skips_tracks_held_by_other_uploads(tmp_path):
+    for i, name in enumerate(["held", "old", "new"]):
+        entry = tmp_path / f"{name}.wav"
+        entry.write_bytes(b"x" * 100)
+        os.utime(entry, (1000 + i, 1000 + i))
+
+    audio.hold_audio_track(tmp_path / "held.wav")
+    try:
+        assert prune_audio_cache(tmp_path, max_bytes=100) == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["held.wav"]
+    finally:
+        audio.release_audio_track(tmp_path / "held.wav")
+
+    assert prune_audio_cache(tmp_path, max_bytes=1) == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from scripts.benchmarks.chat_latency import compare, percentile, summarize
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_reports_throughput_and_errors():
+    summary = summarize([10.0, 20.0, 30.0, 40.0], wall_seconds=2.0, errors=1)
+
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["p50_ms"] == 20.0
+    assert summary["mean_ms"] == 25.0
+    assert summary["throughput_rps"] == 2.0
+
+
+def test_compare_reports_percentage_change_for_matching_runs():
+    baseline = {"results": [
+        {"stage": "ask_question", "concurrency": 4, "p50_ms": 100.0, "p95_ms": 200.0, "p99_ms": 0.0, "throughput_rps": 10.0},
+        {"stage": "chat_message", "concurrency": 4, "p50_ms": 100.0, "p95_ms": 200.0, "p99_ms": 300.0, "throughput_rps": 10.0},
+    ]}
+    current = {"results": [
+        {"stage": "ask_question", "concurrency": 4, "p50_ms": 50.0, "p95_ms": 250.0, "p99_ms": 10.0, "throughput_rps": 20.0},
+        {"stage": "ask_question", "concurrency": 16, "p50_ms": 1.0, "p95_ms": 1.0, "p99_ms": 1.0, "throughput_rps": 1.0},
+    ]}
+
+    rows = compare(current, baseline)
+
+    assert rows == [{
+        "stage": "ask_question",
+        "concurrency": 4,
+        "p50_ms": pytest.approx(-50.0),
+        "p95_ms": pytest.approx(25.0),
+        "p99_ms": None,
+        "throughput_rps": pytest.approx(100.0),
+    }]
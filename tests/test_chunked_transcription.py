@@ -0,0 +1,120 @@
+"""Tests for window planning, stitching and silence parsing in chunked transcription."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.transcription import chunked
+from app.transcription.audio import parse_silences
+from app.transcription.chunked import AudioWindow, plan_windows, stitch_window_segments
+
+
+def test_plan_windows_short_media_is_single_window():
+    windows = plan_windows(120.0, [], window_seconds=300, overlap_seconds=2)
+
+    assert len(windows) == 1
+    assert windows[0].start == 0.0
+    assert windows[0].end == 120.0
+    assert windows[0].is_last
+
+
+def test_plan_windows_cuts_at_nearest_silence_midpoint():
+    silences = [(280.0, 282.0), (305.0, 309.0), (610.0, 612.0)]
+
+    windows = plan_windows(900.0, silences, window_seconds=300, overlap_seconds=2)
+
+    # 307 is closer to the 300s target than 281; next target is 607 -> 611.
+    assert [(w.core_start, w.core_end) for w in windows] == [(0.0, 307.0), (307.0, 611.0), (611.0, 900.0)]
+    assert windows[1].start == 305.0
+    assert windows[1].end == 613.0
+    assert windows[-1].end == 900.0
+    assert [w.is_last for w in windows] == [False, False, True]
+
+
+def test_plan_windows_falls_back_to_fixed_cuts_without_silence():
+    windows = plan_windows(950.0, [], window_seconds=300)
+
+    # The 350s remainder is within the search slack, so no 50s tail window.
+    assert [w.core_end for w in windows] == [300.0, 600.0, 950.0]
+
+
+def test_plan_windows_cores_tile_the_timeline():
+    silences = [(s, s + 1.0) for s in range(50, 3600, 97)]
+
+    windows = plan_windows(3600.0, silences, window_seconds=300, overlap_seconds=2)
+
+    assert windows[0].core_start == 0.0
+    assert windows[-1].core_end == 3600.0
+    for prev, nxt in zip(windows, windows[1:]):
+        assert prev.core_end == nxt.core_start
+
+
+def test_stitch_offsets_and_drops_segments_owned_by_neighbours():
+    window = AudioWindow(index=1, start=298.0, end=602.0, core_start=300.0, core_end=600.0)
+    segments = [
+        {"start": 0.0, "end": 1.5, "text": "tail of previous"},   # midpoint 298.75 -> previous window
+        {"start": 2.5, "end": 6.0, "text": "first owned"},
+        {"start": 300.0, "end": 303.0, "text": "head of next"},   # midpoint 599.5 -> still ours
+        {"start": 302.5, "end": 304.0, "text": "next window"},    # midpoint 601.25 -> next window
+    ]
+
+    stitched = stitch_window_segments(window, segments)
+
+    assert [s["text"] for s in stitched] == ["first owned", "head of next"]
+    assert stitched[0]["start"] == 300.5
+    assert stitched[0]["end"] == 304.0
+
+
+def test_stitch_last_window_keeps_segments_at_end():
+    window = AudioWindow(index=2, start=598.0, end=700.0, core_start=600.0, core_end=700.0, is_last=True)
+
+    stitched = stitch_window_segments(window, [{"start": 100.0, "end": 102.0, "text": "end"}])
+
+    assert [s["text"] for s in stitched] == ["end"]
+
+
+def test_parse_silences_pairs_start_and_end_and_closes_trailing():
+    log = "\n".join([
+        "[silencedetect @ 0x1] silence_start: -0.01",
+        "[silencedetect @ 0x1] silence_end: 1.2 | silence_duration: 1.21",
+        "[silencedetect @ 0x1] silence_start: 10.5",
+        "[silencedetect @ 0x1] silence_end: 11.75 | silence_duration: 1.25",
+        "[silencedetect @ 0x1] silence_start: 58.0",
+    ])
+
+    assert parse_silences(log, duration=60.0) == [(0.0, 1.2), (10.5, 11.75), (58.0, 60.0)]
+
+
+def test_worker_count_fits_one_model_per_worker_in_the_memory_budget(monkeypatch):
+    monkeypatch.setattr(chunked.settings, "TRANSCRIBE_WORKERS", 8)
+    monkeypatch.setattr(chunked.settings, "TRANSCRIBE_MEMORY_BUDGET_MB", 8000)
+
+    assert chunked.worker_count("small") == 5
+    assert chunked.worker_count("medium.en") == 1
+    assert chunked.worker_count("large-v3") == 1
+    assert chunked.worker_count("tiny") == 8
+
+
+def test_language_is_detected_once_and_passed_to_every_window(monkeypatch):
+    calls = []
+
+    def detect(path, window, model_name, backend_name=None):
+        calls.append(("detect", window.index))
+        return "de"
+
+    def transcribe(path, window, model_name, language, backend_name=None):
+        calls.append(("transcribe", window.index, language))
+        return []
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(chunked, "_get_pool", lambda workers=None: pool)
+    monkeypatch.setattr(chunked, "detect_silences", lambda path, duration=None: [])
+    monkeypatch.setattr(chunked, "_detect_window_language", detect)
+    monkeypatch.setattr(chunked, "_transcribe_window", transcribe)
+    monkeypatch.setattr(chunked.settings, "TRANSCRIBE_WINDOW_SECONDS", 300)
+
+    try:
+        windows = list(chunked.iter_transcribed_windows("audio.wav", "small", duration=900.0))
+    finally:
+        pool.shutdown()
+
+    assert len(windows) == 3
+    assert calls == [("detect", 0), ("transcribe", 0, "de"), ("transcribe", 1, "de"), ("transcribe", 2, "de")]
@@ -0,0 +1,102 @@
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.core.embedding_server import EmbeddingServer, RemoteEmbeddingModel, parse_address
+from app.core.embeddings import HashingEmbeddingModel
+
+
+@pytest.fixture
+def server():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    # A long batch window makes the concurrent requests below share batches.
+    embedding_server = EmbeddingServer(HashingEmbeddingModel(), "tcp://127.0.0.1:0", max_batch=64, batch_wait_ms=50)
+    asyncio.run_coroutine_threadsafe(embedding_server.start(), loop).result(timeout=5)
+    yield embedding_server
+    asyncio.run_coroutine_threadsafe(embedding_server.close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def test_parse_address():
+    assert parse_address("tcp://127.0.0.1:8765") == ("tcp", ("127.0.0.1", 8765))
+    assert parse_address("unix:/tmp/embeddings.sock") == ("unix", "/tmp/embeddings.sock")
+    with pytest.raises(ValueError):
+        parse_address("http://localhost:8765")
+
+
+def test_remote_model_matches_local_and_batches_concurrent_requests(server):
+    local = HashingEmbeddingModel()
+    remote = RemoteEmbeddingModel(server.address, timeout=5)
+    remote.load_model()
+
+    queries = [f"how do I reset my password {i}" for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        vectors = list(pool.map(remote.encode_query, queries))
+
+    for query, vector in zip(queries, vectors):
+        assert np.allclose(vector, local.encode_query(query), atol=1e-6)
+    assert np.allclose(remote.encode(["a", "b c"]), local.encode(["a", "b c"]), atol=1e-6)
+    assert remote.encode([]) == []
+
+    stats = remote.server_stats()
+    assert stats["requests"] == len(queries) + 2
+    assert stats["texts"] == len(queries) + 2
+    assert stats["batches"] < stats["requests"]
+
+
+def test_unreachable_server_raises_runtime_error():
+    remote = RemoteEmbeddingModel("tcp://127.0.0.1:1", timeout=1)
+    with pytest.raises(RuntimeError, match="unavailable"):
+        remote.encode_query("hello")
+
+
+def _silent_server(on_connection):
+    """TCP server that hands each accepted connection to ``on_connection``; returns (address, connections)."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    connections = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            connections.append(conn)
+            on_connection(conn)
+
+    threading.Thread(target=serve, daemon=True).start()
+    host, port = listener.getsockname()
+    return f"tcp://{host}:{port}", connections, listener
+
+
+def test_slow_response_times_out_without_resending_the_request():
+    address, connections, listener = _silent_server(lambda conn: None)  # reads nothing, never answers
+    try:
+        remote = RemoteEmbeddingModel(address, timeout=0.3)
+        started = time.monotonic()
+        with pytest.raises(RuntimeError, match="timed out"):
+            remote.encode(["slow batch"])
+        assert time.monotonic() - started < 1.0
+        assert len(connections) == 1
+    finally:
+        listener.close()
+
+
+def test_stale_connection_is_retried_once_on_a_fresh_one(server):
+    remote = RemoteEmbeddingModel(server.address, timeout=5)
+    remote.load_model()
+    stale, peer = socket.socketpair()
+    peer.close()  # the old server went away: EOF before any response byte
+    remote._local.sock = stale
+
+    assert np.allclose(remote.encode_query("hello"), HashingEmbeddingModel().encode_query("hello"), atol=1e-6)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from app.core.feedback_index import FeedbackEventIndex
+from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+DIM = 384
+
+
+@pytest.fixture
+def events():
+    # Queries clustered around a few topics, so similarities span the threshold.
+    rng = np.random.default_rng(7)
+    topics = rng.normal(size=(4, DIM))
+    rows = [
+        {
+            "id": i,
+            "message_id": f"m{i // 3}",
+            "chunk_id": f"c{rng.integers(0, 25)}",
+            "rating": int(rng.choice([1, -1])),
+            "query_embedding": (topics[i % 4] + rng.normal(scale=0.6, size=DIM)).tolist(),
+        }
+        for i in range(400)
+    ]
+    return rows, topics
+
+
+def test_scores_match_the_sql_function(events):
+    rows, topics = events
+    db = MemoryDatabase()
+    db.insert("chunk_feedback_events", rows)
+    client = MemorySupabaseClient(db)
+    # Half as PostgREST returns pgvector columns (text), half as lists.
+    loaded = [dict(r, query_embedding=str(r["query_embedding"])) if r["id"] % 2 else r for r in rows]
+    index = FeedbackEventIndex(300, loader=lambda: loaded)
+    compared = 0
+    chunk_ids = [f"c{i}" for i in range(0, 30, 2)]
+
+    for query in [topics[0], topics[2] + 0.3 * topics[1], np.ones(DIM)]:
+        for threshold in (0.5, 0.75, 0.9):
+            expected = client.rpc("get_query_aware_chunk_scores", {
+                "p_query_emb": query.tolist(), "p_chunk_ids": chunk_ids, "p_sim_threshold": threshold,
+            }).execute().data
+            local = index.scores(query.tolist(), chunk_ids, threshold)
+            assert local.keys() == {r["chunk_id"] for r in expected}
+            for row in expected:
+                assert local[row["chunk_id"]] == pytest.approx(row["weighted_score"], abs=1e-4)
+            compared += len(expected)
+    assert compared > 0
+
+
+def test_events_recorded_on_this_worker_apply_immediately():
+    loads = []
+    index = FeedbackEventIndex(300, loader=lambda: loads.append(1) or [])
+    query = [1.0, 0.0, 0.0]
+    assert index.scores(query, ["c1"], 0.75) == {}
+
+    index.set_message_events("m1", ["c1", "c2"], 1, [0.9, 0.1, 0.0])
+    index.set_message_events("m2", ["c1"], -1, [0.0, 1.0, 0.0])
+    scores = index.scores(query, ["c1", "c2", "c3"], 0.75)
+    assert scores == pytest.approx({"c1": 0.9939, "c2": 0.9939}, abs=1e-4)
+
+    # A changed vote replaces the message's events; a cleared vote removes them.
+    index.set_message_events("m1", ["c1"], -1, [1.0, 0.0, 0.0])
+    assert index.scores(query, ["c1", "c2"], 0.75) == pytest.approx({"c1": -1.0})
+    index.remove_message("m1")
+    assert index.scores(query, ["c1", "c2"], 0.75) == {}
+    assert len(loads) == 1
+
+
+def test_failed_load_returns_none_so_the_rpc_is_used():
+    def broken():
+        raise RuntimeError("relation chunk_feedback_events does not exist")
+
+    assert FeedbackEventIndex(300, loader=broken).scores([1.0], ["c1"], 0.75) is None
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from app.core import feedback_queue, feedback_service
+from app.core.embeddings import HashingEmbeddingModel
+from app.core.feedback_index import FeedbackEventIndex
+from app.core.feedback_queue import FeedbackEventQueue
+from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+
+class _CountingModel(HashingEmbeddingModel):
+    def __init__(self):
+        super().__init__(dimension=16)
+        self.batches = []
+
+    def encode(self, texts, show_progress=False):
+        self.batches.append(list(texts))
+        return super().encode(texts)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = MemoryDatabase()
+    db.insert("chat_messages", [
+        {"id": "q1", "session_id": "s1", "role": "user", "content": "price update", "created_at": "2026-10-19T10:00:00+00:00"},
+        {"id": "m1", "session_id": "s1", "role": "assistant", "content": "a", "created_at": "2026-10-19T10:00:01+00:00",
+         "metadata": {"citations": [{"chunk_id": "c1"}, {"chunk_id": "c2", "text": "legacy"}]}},
+        {"id": "q2", "session_id": "s1", "role": "user", "content": "ration formula", "created_at": "2026-10-19T10:01:00+00:00"},
+        {"id": "m2", "session_id": "s1", "role": "assistant", "content": "b", "created_at": "2026-10-19T10:01:01+00:00",
+         "metadata": {"citations": [{"chunk_id": "c3"}]}},
+        {"id": "m3", "session_id": "s2", "role": "assistant", "content": "c", "created_at": "2026-10-19T10:02:00+00:00",
+         "metadata": {"citations": [{"chunk_id": "c4"}]}},
+    ])
+    db.insert("chunk_feedback_events", [
+        {"message_id": "m1", "chunk_id": "c1", "rating": -1, "query_embedding": [1.0] * 16},
+        {"message_id": "m3", "chunk_id": "c4", "rating": 1, "query_embedding": [1.0] * 16},
+    ])
+    client = MemorySupabaseClient(db)
+    monkeypatch.setattr(feedback_service, "supabase", client)
+    monkeypatch.setattr(feedback_queue, "supabase", client)
+    index = FeedbackEventIndex(300, loader=lambda: [])
+    index.scores([1.0] * 16, [], 0.5)  # loaded, so recorded events apply to it
+    monkeypatch.setattr(feedback_service, "event_index", index)
+    return db
+
+
+def _vote(db, message_id, rating):
+    """What submit_message_feedback stores before the endpoint queues the message."""
+    db.tables["feedback"] = [row for row in db.tables.get("feedback", []) if row["message_id"] != message_id]
+    if rating is not None:
+        db.insert("feedback", {"message_id": message_id, "user_id": "u1", "score": rating})
+
+
+def _events(db):
+    return sorted((e["message_id"], e["chunk_id"], e["rating"]) for e in db.tables["chunk_feedback_events"])
+
+
+def test_flush_coalesces_votes_and_syncs_the_batch_at_once(db, monkeypatch):
+    model = _CountingModel()
+    queue = FeedbackEventQueue(0, 100, embedding_model_factory=lambda: model)
+    client = feedback_queue.supabase
+    tables = []
+    monkeypatch.setattr(client, "table", lambda name: tables.append(name) or MemorySupabaseClient.table(client, name))
+
+    for rating in (1, -1, None, 1):  # toggled before the flush: only the last rating counts
+        _vote(db, "m1", rating)
+        queue.submit("m1")
+    _vote(db, "m2", -1)
+    queue.submit("m2")
+    queue.submit("m3")  # vote cleared
+    assert len(queue) == 3
+
+    assert queue.flush() == 3
+    assert len(queue) == 0
+    assert _events(db) == [("m1", "c1", 1), ("m1", "c2", 1), ("m2", "c3", -1)]
+    assert model.batches == [["price update", "ration formula"]]
+    # One ratings read, one delete and one insert; citations and questions come from one RPC.
+    assert tables == ["feedback", "chunk_feedback_events", "chunk_feedback_events"]
+    assert feedback_service.event_index.scores(model.encode_query("price update"), ["c1", "c3"], 0.5) == {
+        "c1": pytest.approx(1.0)
+    }
+
+
+def test_sources_fall_back_to_per_message_queries_without_the_rpc(db):
+    del db.rpcs["get_feedback_event_sources"]
+    queue = FeedbackEventQueue(0, 100, embedding_model_factory=_CountingModel)
+
+    _vote(db, "m2", 1)
+    _vote(db, "m3", 1)
+    queue.submit("m2")
+    queue.submit("m3")  # no earlier question in its session: old events go, none recorded
+    queue.flush()
+
+    assert _events(db) == [("m1", "c1", -1), ("m2", "c3", 1)]
+
+
+def test_full_batch_is_flushed_early_and_shutdown_flushes_the_rest(db):
+    queue = FeedbackEventQueue(60, 2, embedding_model_factory=_CountingModel)
+
+    _vote(db, "m1", 1)
+    _vote(db, "m2", 1)
+    queue.submit("m1")
+    queue.submit("m2")
+    deadline = time.monotonic() + 5
+    while len(queue) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(queue) == 0
+
+    _vote(db, "m1", None)
+    queue.submit("m1")
+    queue.shutdown()
+    assert len(queue) == 0
+    assert _events(db) == [("m2", "c3", 1), ("m3", "c4", 1)]
+
+
+def test_flushes_in_the_wrong_order_keep_the_stored_rating(db):
+    # Two workers, two queues: the older vote's queue flushes last.
+    first, second = (FeedbackEventQueue(0, 100, embedding_model_factory=_CountingModel) for _ in range(2))
+
+    _vote(db, "m1", 1)
+    first.submit("m1")
+    _vote(db, "m1", -1)
+    second.submit("m1")
+    second.flush()
+    first.flush()
+
+    assert _events(db) == [("m1", "c1", -1), ("m1", "c2", -1), ("m3", "c4", 1)]
@@ -16,7 +16,7 @@ import pytest
 from app.config import settings
 from app.core.rag import RAGPipeline
 from app.core.embeddings import EmbeddingModel
-from app.core.feedback_service import FeedbackService
+from app.core.feedback_service import FeedbackService, event_index, score_snapshot
 from app.core.supabase_service import supabase
 
 TEST_QUERY       = "What are the nutritional requirements for cattle feed?"
@@ -110,11 +110,14 @@ def phase1_injected(verified_chunk_ids):
 
     injected_ids = [r["chunk_id"] for r in rows]
     supabase.table("chunk_feedback_scores").upsert(rows, on_conflict="chunk_id").execute()
+    # Written behind the API's back, so drop the per-process score snapshot.
+    score_snapshot.invalidate()
 
     settings.FEEDBACK_ENABLED = True
     yield injected_ids
 
     supabase.table("chunk_feedback_scores").delete().in_("chunk_id", injected_ids).execute()
+    score_snapshot.invalidate()
     settings.FEEDBACK_ENABLED = True
 
 
@@ -177,12 +180,14 @@ def phase2_injected(verified_chunk_ids, embedding_model, phase2_message_id):
     ]
     res = supabase.table("chunk_feedback_events").insert(rows).execute()
     row_ids = [r["id"] for r in (res.data or [])]
+    event_index.invalidate()
 
     settings.FEEDBACK_ENABLED = True
     yield {"seed_embedding": seed_emb, "chunk_ids": chunk_ids}
 
     if row_ids:
         supabase.table("chunk_feedback_events").delete().in_("id", row_ids).execute()
+    event_index.invalidate()
     settings.FEEDBACK_ENABLED = True
 
 
@@ -285,6 +290,25 @@ class TestPhase2Boosting:
         )
 
 
+    def test_local_index_matches_sql_function(
+        self, embedding_model, all_chunk_ids, phase2_injected
+    ):
+        similar_emb = embedding_model.encode_query(SIMILAR_QUERY)
+        res = supabase.rpc(
+            "get_query_aware_chunk_scores",
+            {
+                "p_query_emb":     similar_emb,
+                "p_chunk_ids":     all_chunk_ids,
+                "p_sim_threshold": settings.FEEDBACK_SIM_THRESHOLD,
+            },
+        ).execute()
+        expected = {r["chunk_id"]: float(r["weighted_score"]) for r in (res.data or [])}
+        local = event_index.scores(similar_emb, all_chunk_ids, settings.FEEDBACK_SIM_THRESHOLD)
+        assert local.keys() == expected.keys()
+        for cid, score in expected.items():
+            assert local[cid] == pytest.approx(score, abs=1e-4)
+
+
 class TestCombinedReranking:
     def test_boosted_chunks_have_higher_adjusted_score(self, rag, phase2_injected):
         reranked = rag.retrieve_context(SIMILAR_QUERY, top_k=5)
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from app.config import settings
+from app.core import feedback_service
+from app.core.feedback_service import ChunkScoreSnapshot, FeedbackService
+from app.core.memory_supabase import MemoryDatabase, MemorySupabaseClient
+
+
+def _seed(db, count):
+    db.insert("chunk_feedback_scores", [{"chunk_id": f"c{i:04d}", "positive_count": i % 3} for i in range(count)])
+
+
+def test_snapshot_loads_every_page_once_and_answers_from_memory(monkeypatch):
+    db = MemoryDatabase()
+    _seed(db, 2500)
+    client = MemorySupabaseClient(db)
+    tables = []
+    monkeypatch.setattr(client, "table", lambda name: tables.append(name) or MemorySupabaseClient.table(client, name))
+    monkeypatch.setattr(feedback_service, "supabase", client)
+    monkeypatch.setattr(feedback_service, "score_snapshot", ChunkScoreSnapshot(60))
+    monkeypatch.setattr(settings, "FEEDBACK_SCORES_REFRESH_SECONDS", 60)
+    service = FeedbackService()
+
+    assert service.get_chunk_scores(["c0001", "c2498", "missing"]) == {"c0001": 1, "c2498": 2}
+    assert service.get_chunk_scores(["c0002"]) == {"c0002": 2}
+    assert len(tables) == 3  # three pages of 1000 rows, then no more queries
+
+    # A vote on this worker is applied immediately, without a full reload.
+    db.tables["chunk_feedback_scores"][2]["positive_count"] = 7
+    db.tables["chunk_feedback_scores"][2]["net_score"] = 7
+    service.refresh_chunk_scores(["c0002", "c9999"])
+    assert service.get_chunk_scores(["c0002", "c9999"]) == {"c0002": 7, "c9999": 0}
+
+
+def test_stale_snapshot_is_served_while_it_refreshes_in_the_background():
+    loads = []
+
+    def loader():
+        loads.append(time.monotonic())
+        return {"c1": len(loads)}
+
+    snapshot = ChunkScoreSnapshot(0.01, loader=loader)
+    assert snapshot.lookup(["c1"]) == {"c1": 1}
+    time.sleep(0.02)
+    assert snapshot.lookup(["c1"]) == {"c1": 1}  # previous copy while reloading
+    deadline = time.monotonic() + 2
+    while snapshot.lookup(["c1"]) == {"c1": 1} and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert snapshot.lookup(["c1"])["c1"] >= 2
+
+
+def test_votes_applied_during_a_refresh_survive_it():
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        if len(loads) > 1:  # the refresh query is in flight while the vote lands
+            started.set()
+            release.wait(2)
+        return {"c1": 1, "c2": 1}
+
+    snapshot = ChunkScoreSnapshot(0.01, loader=loader)
+    assert snapshot.lookup(["c1"]) == {"c1": 1}
+    time.sleep(0.02)
+    snapshot.lookup(["c1"])
+    assert started.wait(2)
+    snapshot.update({"c2": 5})
+    release.set()
+
+    deadline = time.monotonic() + 2
+    while snapshot._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(loads) == 2
+    assert snapshot.lookup(["c1", "c2"]) == {"c1": 1, "c2": 5}
+
+
+def test_failed_load_falls_back_to_querying_the_chunks(monkeypatch):
+    def broken():
+        raise RuntimeError("relation does not exist")
+
+    db = MemoryDatabase()
+    _seed(db, 3)
+    monkeypatch.setattr(feedback_service, "supabase", MemorySupabaseClient(db))
+    monkeypatch.setattr(feedback_service, "score_snapshot", ChunkScoreSnapshot(60, loader=broken))
+    monkeypatch.setattr(settings, "FEEDBACK_SCORES_REFRESH_SECONDS", 60)
+
+    assert FeedbackService().get_chunk_scores(["c0001"]) == {"c0001": 1}
@@ -0,0 +1,31 @@
+from app.services.document_processor import DocumentProcessor
+from scripts.benchmarks.ingestion import generate_docx, generate_pdf, measure_memory
+
+
+def test_generated_docx_has_requested_structure(tmp_path):
+    path = generate_docx(tmp_path / "guide.docx", pages=3, headings_per_page=2, tables_per_page=1, images_per_page=1)
+
+    processed = DocumentProcessor().process_document(path)
+
+    assert processed["success"]
+    assert len(processed["images"]) == 3
+    assert len(processed["sections"]) >= 6
+    assert any(block["type"] == "table" for s in processed["sections"] for block in s["blocks"])
+
+
+def test_generated_pdf_is_parsed_into_sections_with_images(tmp_path):
+    path = generate_pdf(tmp_path / "guide.pdf", pages=2, headings_per_page=2, images_per_page=1)
+
+    processed = DocumentProcessor().process_document(path)
+
+    assert processed["success"]
+    assert len(processed["images"]) == 2
+    assert len(processed["sections"]) >= 4
+    assert processed["chunks"]
+
+
+def test_measure_memory_reports_traced_peak():
+    stats = measure_memory(lambda: [bytearray(1024) for _ in range(2048)])
+
+    assert stats["traced_peak_mb"] >= 2.0
+    assert stats["peak_rss_mb"] > 0
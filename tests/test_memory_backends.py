@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from app.core.embeddings import HashingEmbeddingModel
+from app.core.memory_supabase import MemoryAPIError, MemoryDatabase, MemorySupabaseClient
+from app.core.memory_vector_store import MemoryIndex, matches_filter
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def client():
+    return MemorySupabaseClient(MemoryDatabase())
+
+
+def test_query_builder_filters_orders_and_counts(client):
+    client.table("chat_sessions").insert([
+        {"id": "s1", "user_id": "u1", "title": "Rations"},
+        {"id": "s2", "user_id": "u1", "title": "Pricing"},
+        {"id": "s3", "user_id": "u2", "title": "Reports"},
+    ]).execute()
+    client.table("chat_messages").insert([
+        {"session_id": "s1", "role": "user", "content": "a"},
+        {"session_id": "s1", "role": "assistant", "content": "b"},
+    ]).execute()
+
+    result = (
+        client.table("chat_sessions")
+        .select("id, title, chat_messages(count)", count="exact")
+        .eq("user_id", "u1")
+        .order("title", desc=True)
+        .limit(1)
+        .execute()
+    )
+
+    assert result.data == [{"id": "s1", "title": "Rations", "chat_messages": [{"count": 2}]}]
+    assert result.count == 2
+    assert client.table("chat_sessions").select("id").in_("id", ["s2", "s3"]).ilike("title", "%port%").execute().data == [{"id": "s3"}]
+
+
+def test_single_and_upsert_on_primary_key(client):
+    client.table("chunk_feedback_scores").upsert({"chunk_id": "c1", "positive_count": 2}).execute()
+    client.table("chunk_feedback_scores").upsert({"chunk_id": "c1", "negative_count": 3}).execute()
+
+    row = client.table("chunk_feedback_scores").select("*").eq("chunk_id", "c1").single().execute().data
+
+    assert (row["positive_count"], row["negative_count"], row["net_score"]) == (2, 3, -1)
+    assert client.table("chunk_feedback_scores").select("*").eq("chunk_id", "missing").maybe_single().execute().data is None
+    with pytest.raises(MemoryAPIError):
+        client.table("chunk_feedback_scores").select("*").eq("chunk_id", "missing").single().execute()
+
+
+def test_submit_message_feedback_rpc_updates_cited_chunk_scores(client):
+    client.table("chat_messages").insert({
+        "id": "m1",
+        "session_id": "s1",
+        "role": "assistant",
+        "metadata": {"citations": [{"chunk_id": "c1"}, {"chunk_id": "c2"}]},
+    }).execute()
+
+    client.rpc("submit_message_feedback", {"p_message_id": "m1", "p_user_id": "u1", "p_new_rating": 1}).execute()
+    result = client.rpc("submit_message_feedback", {"p_message_id": "m1", "p_user_id": "u1", "p_new_rating": -1}).execute()
+
+    scores = {r["chunk_id"]: r for r in client.table("chunk_feedback_scores").select("*").execute().data}
+    assert result.data == {"old_rating": 1, "new_rating": -1}
+    assert scores["c1"]["positive_count"] == 0
+    assert scores["c1"]["net_score"] == -1
+    assert set(scores) == {"c1", "c2"}
+
+
+def test_query_aware_scores_respect_similarity_threshold(client):
+    client.table("chunk_feedback_events").insert([
+        {"chunk_id": "c1", "rating": 1, "query_embedding": [1.0, 0.0]},
+        {"chunk_id": "c1", "rating": 1, "query_embedding": [0.0, 1.0]},
+        {"chunk_id": "c2", "rating": -1, "query_embedding": [1.0, 0.0]},
+    ]).execute()
+
+    rows = client.rpc(
+        "get_query_aware_chunk_scores",
+        {"p_query_emb": [1.0, 0.0], "p_chunk_ids": ["c1", "c2"], "p_sim_threshold": 0.75},
+    ).execute().data
+
+    assert {r["chunk_id"]: r["weighted_score"] for r in rows} == {"c1": pytest.approx(1.0), "c2": pytest.approx(-1.0)}
+
+
+def test_memory_index_query_filter_and_stats():
+    index = MemoryIndex("test", dimension=2)
+    index.upsert(vectors=[
+        ("a", [1.0, 0.0], {"doc_id": "d1", "source_type": "document"}),
+        ("b", [0.8, 0.2], {"doc_id": "d2", "source_type": "video"}),
+        {"id": "c", "values": [0.0, 1.0], "metadata": {"doc_id": "d3", "source_type": "document"}},
+    ])
+
+    result = index.query(vector=[1.0, 0.0], top_k=2, include_metadata=True, filter={"source_type": {"$eq": "document"}})
+    index.delete(filter={"doc_id": {"$in": ["d3"]}})
+
+    assert [m["id"] for m in result["matches"]] == ["a", "c"]
+    assert result["matches"][0]["metadata"]["doc_id"] == "d1"
+    assert index.describe_index_stats()["total_vector_count"] == 2
+    assert matches_filter({"tags": ["x", "y"]}, {"$or": [{"tags": "y"}, {"doc_id": "z"}]})
+
+
+def test_hashing_embedder_ranks_overlapping_text_higher():
+    model = HashingEmbeddingModel()
+    query = model.encode_query("update ingredient prices")
+    related, unrelated = model.encode(["How to update ingredient prices", "Export a batch report"])
+
+    def dot(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    assert len(query) == model.dimension
+    assert dot(query, related) > dot(query, unrelated)
+    assert model.encode_query("Same text") == model.encode_query("same TEXT")
+
+
+def test_chat_round_trip_through_local_app():
+    # The backends are chosen when app.config is imported, so drive the app in a fresh interpreter.
+    script = textwrap.dedent(
+        """
+        from scripts.benchmarks.local_app import SAMPLE_CHUNKS, LocalApp, configure_local_environment
+        configure_local_environment()
+        local = LocalApp()
+        headers = local.create_user()
+        local.seed_chunks(SAMPLE_CHUNKS)
+        session = local.client.post("/api/chat/sessions", json={"title": "t"}, headers=headers).json()
+        reply = local.client.post(
+            "/api/chat/message",
+            json={"session_id": session["id"], "content": "How do I update ingredient prices?"},
+            headers=headers,
+        ).json()
+        assert reply["citations"][0]["chunk_id"] == "ingredient-price-1", reply
+        local.client.post(
+            "/api/chat/feedback",
+            json={"message_id": reply["id"], "session_id": session["id"], "rating": 1},
+            headers=headers,
+        ).raise_for_status()
+        scores = {r["chunk_id"]: r["net_score"] for r in local.db.tables["chunk_feedback_scores"]}
+        assert scores["ingredient-price-1"] == 1, scores
+        history = local.client.get(f"/api/chat/sessions/{session['id']}", headers=headers).json()
+        assert [m["role"] for m in history] == ["user", "assistant"], history
+        """
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("SUPABASE_", "AZURE_OPENAI_"))}
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=300
+    )
+
+    assert result.returncode == 0, result.stderr[-4000:]
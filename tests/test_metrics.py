@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from app.core import metrics
+from app.core.metrics import record_cache, record_llm_usage, track_call
+
+pytestmark = pytest.mark.skipif(not metrics.ENABLED, reason="METRICS_ENABLED is off")
+
+
+def _sample(name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def test_track_call_counts_latency_and_errors():
+    calls_before = _sample("cfc_external_call_duration_seconds_count", service="pinecone", operation="test_op")
+    errors_before = _sample("cfc_external_call_errors_total", service="pinecone", operation="test_op")
+
+    with track_call("pinecone", "test_op"):
+        pass
+    with pytest.raises(RuntimeError):
+        with track_call("pinecone", "test_op"):
+            raise RuntimeError("boom")
+
+    assert _sample("cfc_external_call_duration_seconds_count", service="pinecone", operation="test_op") == calls_before + 2
+    assert _sample("cfc_external_call_errors_total", service="pinecone", operation="test_op") == errors_before + 1
+
+
+def test_cache_and_token_counters():
+    hits_before = _sample("cfc_cache_requests_total", cache="test_cache", result="hit")
+    prompt_before = _sample("cfc_llm_tokens_total", kind="prompt")
+
+    record_cache("test_cache", hit=True)
+    record_cache("test_cache", hit=False)
+    record_llm_usage(type("Usage", (), {"prompt_tokens": 120, "completion_tokens": 30})())
+    record_llm_usage(None)
+    # Mocked clients return non-numeric usage fields; they are skipped, never raised.
+    record_llm_usage(type("Usage", (), {"prompt_tokens": object(), "completion_tokens": "12"})())
+
+    assert _sample("cfc_cache_requests_total", cache="test_cache", result="hit") == hits_before + 1
+    assert _sample("cfc_llm_tokens_total", kind="prompt") == prompt_before + 120
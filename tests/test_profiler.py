@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import profiler
+from app.core.profiler import SamplingProfiler, SlowRequestProfilerMiddleware
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _idle(stop: threading.Event) -> None:
+    stop.wait()
+
+
+def _profile(mode: str) -> profiler.Profile:
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=_spin, args=(stop,), name="busy"),
+        threading.Thread(target=_idle, args=(stop,), name="idle"),
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        sampler = SamplingProfiler(mode=mode, interval_ms=5).start()
+        time.sleep(0.4)
+        return sampler.stop()
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+
+def _threads(result: profiler.Profile) -> set:
+    return {stack[0] for stack in result.stacks}
+
+
+def test_wall_profile_samples_every_thread_as_collapsed_stacks():
+    result = _profile("wall")
+
+    assert {"busy", "idle"} <= _threads(result)
+    assert "sampling-profiler" not in _threads(result)
+    line = next(line for line in result.collapsed().splitlines() if line.startswith("busy;"))
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_spin (tests/test_profiler.py:" in stack
+    assert result.top_functions()[0]["self"] > 0
+
+
+def test_cpu_profile_skips_idle_threads():
+    try:
+        result = _profile("cpu")
+    except ValueError:
+        pytest.skip("per-thread CPU times are not available on this platform")
+
+    assert "busy" in _threads(result)
+    assert "idle" not in _threads(result)
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        SamplingProfiler(mode="memory")
+
+
+def test_slow_requests_leave_a_saved_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler.settings, "PROFILES_DIR", tmp_path)
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        # Blocks the event loop like a synchronous ask_question call would.
+        time.sleep(0.3)
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    app.add_middleware(SlowRequestProfilerMiddleware, threshold_ms=100)
+    client = TestClient(app)
+
+    assert client.get("/fast").status_code == 200
+    assert profiler.list_captures() == []
+
+    assert client.get("/slow").status_code == 200
+    captures = profiler.list_captures()
+    assert len(captures) == 1
+    assert captures[0]["path"] == "/slow"
+    assert captures[0]["status"] == 200
+    assert captures[0]["elapsed_ms"] >= 300
+    assert "slow (tests/test_profiler.py:" in profiler.read_capture(captures[0]["name"])
+    assert profiler.read_capture("../secrets") is None
+
+
+def test_requests_share_one_watchdog_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler.settings, "PROFILES_DIR", tmp_path)
+    app = FastAPI()
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    app.add_middleware(SlowRequestProfilerMiddleware, threshold_ms=60_000)
+    client = TestClient(app)
+    threads_before = threading.active_count()
+
+    for _ in range(20):
+        assert client.get("/fast").status_code == 200
+
+    watchdogs = [t for t in threading.enumerate() if t.name == "slow-request-watchdog"]
+    assert len(watchdogs) == 1
+    assert threading.active_count() <= threads_before + 1
+    assert profiler.list_captures() == []
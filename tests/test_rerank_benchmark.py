@@ -0,0 +1,91 @@
+import copy
+import random
+
+import pytest
+
+import app.core.rag as rag_module
+from app.config import settings
+from app.core.feedback_service import FeedbackService
+from app.core.rag import RAGPipeline
+from scripts.benchmarks.rerank import loop_rerank, make_candidates, measure, same_ranking
+
+
+@pytest.mark.parametrize("size", [5, 50, 500])
+def test_vectorized_rerank_is_identical_to_the_loop(size):
+    rng = random.Random(size)
+    for _ in range(20):
+        assert same_ranking(make_candidates(size, rng, voted_share=rng.random()))
+
+
+def test_rerank_keeps_tied_chunks_in_input_order():
+    chunks = [
+        {"rank": 1, "score": 0.5, "chunk_id": "a"},
+        {"rank": 2, "score": None, "chunk_id": "b"},
+        {"rank": 3, "score": 0.5, "chunk_id": None},
+        {"rank": 4, "score": 0.5, "chunk_id": "c"},
+        {"rank": 5, "score": 0.0, "chunk_id": "d"},
+    ]
+    feedback = {"b": 3, "d": -2}
+
+    expected = loop_rerank(copy.deepcopy(chunks), feedback)
+    actual = FeedbackService.rerank(copy.deepcopy(chunks), feedback)
+
+    assert [c["chunk_id"] for c in actual] == [c["chunk_id"] for c in expected] == ["a", None, "c", "b", "d"]
+    assert [c["adjusted_score"] for c in actual] == [c["adjusted_score"] for c in expected]
+    assert [c["rank"] for c in actual] == [1, 2, 3, 4, 5]
+
+
+def test_rerank_order_without_scales_keeps_pinecone_order():
+    order, adjusted = FeedbackService.rerank_order([0.9, 0.8], ["a", "b"], {"b": 10}, {"b": 5.0}, scale=0, scale_query=0)
+
+    assert order.tolist() == [0, 1]
+    assert adjusted.tolist() == [0.9, 0.8]
+
+
+def test_measure_reports_each_candidate_size():
+    rows = measure([5, 50], runs=2)
+
+    assert [row["candidates"] for row in rows] == [5, 50]
+    assert all(row["identical"] for row in rows)
+    assert all(row["loop_us"] > 0 and row["rerank_order_us"] > 0 for row in rows)
+
+
+class _VectorStore:
+    def __init__(self, matches):
+        self.matches = matches
+        self.top_k = None
+
+    def query(self, vector, top_k, include_metadata=True, metadata_filter=None):
+        self.top_k = top_k
+        return {"matches": self.matches[:top_k]}
+
+
+class _EmbeddingModel:
+    def encode_query(self, query):
+        return [1.0, 0.0]
+
+
+def test_retrieve_context_reranks_the_candidates_and_hydrates_only_top_k(monkeypatch):
+    matches = [{"id": f"c{i}", "score": 0.9 - i * 0.01, "metadata": {}} for i in range(20)]
+    store = _VectorStore(matches)
+    pipeline = RAGPipeline(vector_store=store, embedding_model=_EmbeddingModel())
+    hydrated = []
+
+    def fetch_chunks(client, chunk_ids):
+        hydrated.extend(chunk_ids)
+        return {cid: {"id": cid, "content": f"text of {cid}"} for cid in chunk_ids}
+
+    monkeypatch.setattr(settings, "FEEDBACK_ENABLED", True)
+    monkeypatch.setattr(settings, "RERANK_CANDIDATES", 20)
+    monkeypatch.setattr(rag_module, "fetch_chunks", fetch_chunks)
+    monkeypatch.setattr(pipeline.feedback_service, "get_chunk_scores", lambda ids: {"c15": 10, "c0": -10})
+    monkeypatch.setattr(pipeline.feedback_service, "get_query_aware_scores", lambda embedding, ids: {})
+
+    chunks = pipeline.retrieve_context("question", top_k=3)
+
+    assert store.top_k == 20
+    assert [c["chunk_id"] for c in chunks] == ["c15", "c1", "c2"]
+    assert [c["rank"] for c in chunks] == [1, 2, 3]
+    assert chunks[0]["text"] == "text of c15"
+    assert chunks[0]["adjusted_score"] > chunks[1]["adjusted_score"]
+    assert sorted(hydrated) == ["c1", "c15", "c2"]
@@ -0,0 +1,45 @@
+from scripts.benchmarks.startup import (
+    check_budget,
+    child_environment,
+    measure_startup,
+    slowest_imports,
+    summarize_runs,
+)
+
+
+def test_api_starts_without_importing_heavy_modules():
+    result = measure_startup(child_environment())
+
+    assert result["status"] == 200
+    assert result["heavy_modules"] == []
+    assert 0 < result["import_s"] <= result["ready_s"] <= result["first_response_s"] < result["process_s"]
+
+
+def test_budget_check_flags_heavy_modules_and_slow_starts():
+    runs = [
+        {"import_s": 1.0, "ready_s": 1.1, "first_response_s": 1.2, "process_s": 1.5, "heavy_modules": []},
+        {"import_s": 3.0, "ready_s": 3.1, "first_response_s": 3.2, "process_s": 3.5, "heavy_modules": ["torch"]},
+        {"import_s": 2.0, "ready_s": 2.1, "first_response_s": 2.2, "process_s": 2.5, "heavy_modules": []},
+    ]
+    summary = summarize_runs(runs)
+
+    assert summary["first_response_s"] == {"median": 2.2, "min": 1.2, "max": 3.2}
+    assert summary["heavy_modules"] == ["torch"]
+    problems = check_budget(summary, max_seconds=2.0)
+    assert len(problems) == 2
+    assert check_budget({**summary, "heavy_modules": []}, max_seconds=None) == []
+
+
+def test_slowest_imports_parses_importtime_output():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     json.decoder",
+        "import time:      2000 |       5000 |   app.api.endpoints",
+        "import time:       300 |       9000 | main",
+    ])
+
+    rows = slowest_imports(output, limit=2)
+
+    assert [row["module"] for row in rows] == ["main", "app.api.endpoints"]
+    assert rows[0]["cumulative_ms"] == 9.0
+    assert rows[1]["depth"] == 1
@@ -0,0 +1,46 @@
+import httpx
+import pytest
+
+from app.config import settings
+from app.core import supabase_clients
+
+URL = "https://project.supabase.co"
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[])
+
+    monkeypatch.setattr(settings, "SUPABASE_BACKEND", "supabase")
+    monkeypatch.setattr(supabase_clients, "_http_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(supabase_clients, "_clients", {})
+    return requests
+
+
+def test_user_clients_share_the_pool_and_send_their_own_token(sent):
+    shared = supabase_clients.shared_http_client()
+    alice = supabase_clients.create_user_client(URL, "anon-key", "alice-token")
+    bob = supabase_clients.create_user_client(URL, "anon-key", "bob-token")
+
+    alice.table("chat_sessions").select("id").execute()
+    bob.table("chat_sessions").select("id").execute()
+
+    assert alice.postgrest.session is shared and bob.postgrest.session is shared
+    assert [r.headers["authorization"] for r in sent] == ["Bearer alice-token", "Bearer bob-token"]
+    assert {r.headers["apikey"] for r in sent} == {"anon-key"}
+
+
+def test_service_clients_are_cached_until_the_pool_is_closed(sent):
+    client = supabase_clients.get_client(URL, "service-key")
+    assert supabase_clients.get_client(URL, "service-key") is client
+    assert supabase_clients.get_client(URL, "other-key") is not client
+
+    supabase_clients.shared_http_client().close()
+    rebuilt = supabase_clients.get_client(URL, "service-key")
+
+    assert rebuilt is not client
+    assert not rebuilt.options.httpx_client.is_closed
@@ -0,0 +1,63 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.tracing import ServerTimingMiddleware, span, start_trace
+
+
+def test_span_is_noop_outside_a_trace():
+    assert tracing.current_trace() is None
+    with span("embed"):
+        pass
+    assert span("embed") is span("vector_query")
+
+
+def test_repeated_spans_are_summed_and_counted():
+    with start_trace() as trace:
+        with span("message_insert"):
+            pass
+        with span("llm"):
+            pass
+        with span("message_insert"):
+            pass
+
+    stages = trace.stages
+    assert list(stages) == ["message_insert", "llm"]
+    assert stages["message_insert"][1] == 2
+    assert tracing.current_trace() is None
+    header = trace.server_timing(total_ms=12.34)
+    assert header.startswith('message_insert;dur=')
+    assert 'desc="x2"' in header
+    assert header.endswith("total;dur=12.3")
+
+
+def test_middleware_adds_server_timing_header_and_logs(caplog):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        with span("embed"):
+            pass
+        with span("vector_query"):
+            pass
+        return {"ok": True}
+
+    @app.get("/plain")
+    async def plain():
+        return {"ok": True}
+
+    app.add_middleware(ServerTimingMiddleware)
+    client = TestClient(app)
+
+    with caplog.at_level(logging.INFO, logger="app.core.tracing"):
+        response = client.get("/work")
+        plain = client.get("/plain")
+
+    timing = response.headers["server-timing"]
+    assert "embed;dur=" in timing and "vector_query;dur=" in timing and "total;dur=" in timing
+    assert plain.headers["server-timing"].startswith("total;dur=")
+    traces = [r.getMessage() for r in caplog.records if r.getMessage().startswith("request_trace")]
+    assert len(traces) == 1
+    assert '"path": "/work"' in traces[0]
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.transcription import backends
+from app.transcription.backends import FasterWhisperBackend, WhisperBackend, get_backend
+from app.transcription.model_cache import WhisperModelCache
+
+
+class FakeWhisperModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs))
+        return {"segments": [{"start": 0, "end": 1.5, "text": " Hello", "tokens": [1, 2]}]}
+
+
+class FakeSegment:
+    def __init__(self, start, end, text):
+        self.start, self.end, self.text = start, end, text
+
+
+class FakeFasterModel:
+    def transcribe(self, audio, **kwargs):
+        def generate():
+            yield FakeSegment(0.0, 1.5, " Hello")
+            yield FakeSegment(1.5, 3, " world")
+
+        return generate(), {"language": "en"}
+
+
+def test_whisper_backend_returns_plain_segment_dicts():
+    model = FakeWhisperModel()
+    backend = WhisperBackend(WhisperModelCache(loader=lambda name: model, sizer=lambda m: None))
+    audio = np.zeros(16000, dtype=np.float32)
+
+    segments = backend.transcribe(audio, "tiny", "en")
+
+    assert segments == [{"start": 0.0, "end": 1.5, "text": " Hello"}]
+    assert model.calls[0][0] is audio
+    assert model.calls[0][1]["language"] == "en"
+
+
+def test_faster_whisper_backend_matches_segment_shape():
+    backend = FasterWhisperBackend(WhisperModelCache(loader=lambda name: FakeFasterModel(), sizer=lambda m: None))
+
+    segments = backend.transcribe("clip.mp4", "tiny")
+
+    assert segments == [
+        {"start": 0.0, "end": 1.5, "text": " Hello"},
+        {"start": 1.5, "end": 3.0, "text": " world"},
+    ]
+
+
+def test_get_backend_uses_configured_default(monkeypatch):
+    monkeypatch.setattr(backends.settings, "TRANSCRIPTION_BACKEND", "whisper")
+    monkeypatch.setattr(WhisperBackend, "is_available", lambda self: True)
+    monkeypatch.setattr(FasterWhisperBackend, "is_available", lambda self: True)
+
+    assert get_backend().name == "whisper"
+    assert get_backend("Faster_Whisper").name == "faster-whisper"
+
+
+def test_get_backend_rejects_unknown_and_uninstalled(monkeypatch):
+    monkeypatch.setattr(FasterWhisperBackend, "is_available", lambda self: False)
+
+    with pytest.raises(ValueError, match="Unknown transcription backend"):
+        get_backend("vosk")
+    with pytest.raises(ValueError, match="not installed"):
+        get_backend("faster-whisper")
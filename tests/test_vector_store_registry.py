@@ -0,0 +1,73 @@
+import types
+
+import pytest
+
+from app.core import vector_store
+from app.core.vector_store import get_vector_store, vector_store_stats
+
+
+class FakeIndex:
+    def __init__(self, name):
+        self.name = name
+
+    def query(self, **kwargs):
+        return {"matches": []}
+
+
+class FakePinecone:
+    def __init__(self, existing=("docs",)):
+        self.existing = list(existing)
+        self.list_calls = 0
+        self.created = []
+        self.handles = []
+
+    def list_indexes(self):
+        self.list_calls += 1
+        return types.SimpleNamespace(names=lambda: list(self.existing))
+
+    def create_index(self, name, **kwargs):
+        self.created.append(name)
+        self.existing.append(name)
+
+    def Index(self, name, **kwargs):
+        self.handles.append(name)
+        return FakeIndex(name)
+
+
+@pytest.fixture()
+def fake_pinecone(monkeypatch):
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_BACKEND", "pinecone")
+    vector_store.reset_vector_stores()
+    client = FakePinecone()
+    monkeypatch.setattr(vector_store, "_client", client)
+    yield client
+    vector_store.reset_vector_stores()
+
+
+def test_stores_are_shared_per_index_and_namespace(fake_pinecone):
+    store = get_vector_store("docs", "kb")
+
+    assert get_vector_store("docs", "kb") is store
+    assert get_vector_store("docs", "other") is not store
+    # Nothing is contacted until a store is used.
+    assert fake_pinecone.list_calls == 0
+
+    store.query([0.1, 0.2], top_k=3)
+    get_vector_store("docs", "other").query([0.1, 0.2])
+
+    assert fake_pinecone.list_calls == 1
+    assert fake_pinecone.handles == ["docs"]
+    assert get_vector_store("docs", "other").index is store.index
+
+
+def test_missing_index_is_created_once_and_reported_in_stats(fake_pinecone):
+    get_vector_store("videos", "kb").query([0.1])
+    get_vector_store("videos", "kb").query([0.2])
+
+    assert fake_pinecone.created == ["videos"]
+    stats = vector_store_stats()
+    assert stats["client_created"] is True
+    assert stats["indexes"]["videos"]["created"] is True
+    [store_stats] = stats["stores"]
+    assert store_stats["connected"] is True
+    assert store_stats["calls"] == {"query": 2}
@@ -0,0 +1,39 @@
+from app.core.warmup import WarmupState, run_step, run_warmup
+
+
+def test_warmup_runs_steps_in_order_and_marks_ready():
+    state = WarmupState()
+    calls = []
+
+    def failing():
+        calls.append("vector_store")
+        raise RuntimeError("pinecone unavailable")
+
+    assert not state.ready
+    snapshot = run_warmup(
+        steps=[("embedding_model", lambda: calls.append("embedding_model")), ("vector_store", failing)],
+        state=state,
+    )
+
+    assert calls == ["embedding_model", "vector_store"]
+    assert state.ready and snapshot["ready"]
+    assert snapshot["steps"]["embedding_model"]["status"] == "ok"
+    # A failed step is reported but does not keep the worker out of rotation.
+    assert snapshot["steps"]["vector_store"]["status"] == "failed"
+    assert snapshot["steps"]["vector_store"]["detail"] == "pinecone unavailable"
+
+
+def test_optional_steps_are_recorded_and_skip_marks_ready():
+    state = WarmupState()
+
+    assert run_step("whisper", lambda models: None, ["small"], required=False, state=state)
+    assert state.snapshot()["steps"]["whisper"] == {
+        "status": "ok",
+        "required": False,
+        "duration_ms": state.snapshot()["steps"]["whisper"]["duration_ms"],
+    }
+    assert not state.ready
+
+    state.skip()
+    assert state.ready
+    assert state.snapshot()["steps"]["warmup"]["status"] == "skipped"
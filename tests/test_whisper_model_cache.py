@@ -0,0 +1,123 @@
+import threading
+
+from app.transcription.model_cache import WhisperModelCache
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+def make_cache(max_resident=2):
+    loads = []
+
+    def loader(name):
+        loads.append(name)
+        return FakeModel(name)
+
+    cache = WhisperModelCache(loader=loader, max_resident=max_resident, sizer=lambda m: 1000)
+    return cache, loads
+
+
+def test_get_loads_model_once_and_reuses_it():
+    cache, loads = make_cache()
+
+    first = cache.get("small")
+    second = cache.get("small")
+
+    assert first is second
+    assert loads == ["small"]
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_least_recently_used_model_is_evicted():
+    cache, loads = make_cache(max_resident=2)
+
+    cache.get("tiny")
+    cache.get("small")
+    cache.get("tiny")  # small is now least recently used
+    cache.get("base")
+
+    assert cache.is_loaded("tiny")
+    assert cache.is_loaded("base")
+    assert not cache.is_loaded("small")
+    assert cache.evictions == 1
+
+    cache.get("small")
+    assert loads == ["tiny", "small", "base", "small"]
+
+
+def test_preload_swallows_loader_errors():
+    def loader(name):
+        if name == "broken":
+            raise RuntimeError("no weights")
+        return FakeModel(name)
+
+    cache = WhisperModelCache(loader=loader, max_resident=3, sizer=lambda m: None)
+    cache.preload(["broken", "small"])
+
+    assert cache.is_loaded("small")
+    assert not cache.is_loaded("broken")
+
+
+def test_stats_reports_resident_bytes():
+    cache, _ = make_cache(max_resident=3)
+    cache.get("tiny")
+    cache.get("small")
+
+    stats = cache.stats()
+
+    assert set(stats["resident_models"]) == {"tiny", "small"}
+    assert stats["resident_bytes"] == 2000
+    assert stats["max_resident"] == 3
+
+
+def test_concurrent_requests_share_a_single_load():
+    release = threading.Event()
+    loads = []
+
+    def slow_loader(name):
+        loads.append(name)
+        release.wait(timeout=5)
+        return FakeModel(name)
+
+    cache = WhisperModelCache(loader=slow_loader, max_resident=1, sizer=lambda m: None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("small"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert loads == ["small"]
+    assert len({id(m) for m in results}) == 1
+
+
+def test_lease_holds_model_lock():
+    cache, _ = make_cache()
+
+    with cache.lease("small") as model:
+        assert model.name == "small"
+        assert cache.stats()["resident_models"]["small"]["in_use"] is True
+
+    assert cache.stats()["resident_models"]["small"]["in_use"] is False
+
+
+def test_leased_model_is_not_evicted_or_loaded_twice():
+    cache, loads = make_cache(max_resident=1)
+
+    with cache.lease("small") as leased:
+        cache.get("base")  # over the limit, but small is in use
+        assert cache.is_loaded("small")
+        assert cache.get("small") is leased
+        assert loads == ["small", "base"]
+        assert cache.stats()["resident_models"]["small"]["in_use"]
+
+    # The excess goes once the lease ends: small was used last, base goes.
+    assert cache.is_loaded("small")
+    assert not cache.is_loaded("base")
+    assert cache.evictions == 1
+    assert cache.get("small") is leased
+    assert loads == ["small", "base"]
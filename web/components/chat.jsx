@@ -33,9 +33,23 @@
       role: msg.role,
       text: msg.content,
       segments,
+      createdAt: msg.created_at,
     };
   }
 
+  // Messages fetched per page when opening a conversation / scrolling back.
+  const MESSAGE_PAGE_SIZE = 50;
+
+  const messagePageUrl = (sessionId, before) => {
+    const params = new URLSearchParams({ limit: String(MESSAGE_PAGE_SIZE), metadata: 'light' });
+    if (before) {
+      // (created_at, id) keyset, so messages sharing a timestamp are not skipped.
+      params.set('before', before.createdAt);
+      if (before.id) params.set('before_id', before.id);
+    }
+    return `/api/chat/sessions/${sessionId}?${params}`;
+  };
+
   function ChatPage() {
     const { session } = useUser();
     const { routeParams } = window.CFC.RouterContext.useRouter();
@@ -48,7 +62,13 @@
     const [chatHistory, setChatHistory] = React.useState([]);
     const [activeChatId, setActiveChatId] = React.useState(null);
     const [loadingSessions, setLoadingSessions] = React.useState(true);
+    const [hasOlderMessages, setHasOlderMessages] = React.useState(false);
+    const [loadingOlder, setLoadingOlder] = React.useState(false);
     const chatThreadRef = React.useRef(null);
+    // Scroll height before older messages were prepended (keeps the view in place).
+    const prependScrollRef = React.useRef(null);
+    // { message_id: score } for the whole active session, fetched with its first page.
+    const feedbackMapRef = React.useRef({});
     const thinkingTimeoutsRef = React.useRef({});
     const messagesRef = React.useRef(messages);
     messagesRef.current = messages;
@@ -102,7 +122,7 @@
       try {
         // Fetch messages and feedback in parallel
         const [messagesRes, feedbackRes] = await Promise.all([
-          fetch(`/api/chat/sessions/${sessionId}`, {
+          fetch(messagePageUrl(sessionId), {
             headers: authHeaders(token),
           }),
           fetch(`/api/chat/feedback?session_id=${sessionId}`, {
@@ -112,6 +132,7 @@
 
         if (!messagesRes.ok) return;
         const data = await messagesRes.json();
+        setHasOlderMessages(messagesRes.headers.get('X-Has-More') === 'true');
 
         // Parse feedback map: { message_id: score }
         let feedbackMap = {};
@@ -119,6 +140,7 @@
           const fbData = await feedbackRes.json();
           feedbackMap = fbData.feedback || {};
         }
+        feedbackMapRef.current = feedbackMap;
 
         // Merge feedback into UI messages
         const uiMsgs = data.map((msg) => {
@@ -139,6 +161,35 @@
       }
     };
 
+    // ---- Load the page of messages before the oldest one shown ----
+    const loadOlderMessages = async () => {
+      const sessionId = activeChatId;
+      const oldest = messagesRef.current.find((m) => m.createdAt);
+      if (!token || !sessionId || !oldest || loadingOlder) return;
+      setLoadingOlder(true);
+      try {
+        const res = await fetch(messagePageUrl(sessionId, oldest), {
+          headers: authHeaders(token),
+        });
+        if (!res.ok) return;
+        const data = await res.json();
+        setHasOlderMessages(res.headers.get('X-Has-More') === 'true');
+        const older = data.map((msg) => {
+          const ui = dbMsgToUI(msg);
+          const score = feedbackMapRef.current[msg.id];
+          if (score === 1) ui.feedback = 'up';
+          else if (score === -1) ui.feedback = 'down';
+          return ui;
+        });
+        if (chatThreadRef.current) prependScrollRef.current = chatThreadRef.current.scrollHeight;
+        setMessages((prev) => [...older, ...prev]);
+      } catch {
+        // ignore
+      } finally {
+        setLoadingOlder(false);
+      }
+    };
+
     // ---- Conversation history for API context ----
     const prepareConversationHistory = (msgs, maxMessages = 8) => {
       const filtered = msgs.filter((m) => m.role === 'user' || m.role === 'assistant');
@@ -157,9 +208,15 @@
 
     // ---- Auto-scroll on new messages ----
     React.useEffect(() => {
-      if (chatThreadRef.current) {
-        chatThreadRef.current.scrollTop = chatThreadRef.current.scrollHeight;
+      const thread = chatThreadRef.current;
+      if (!thread) return;
+      if (prependScrollRef.current !== null) {
+        // Older messages were prepended: keep the previously visible message in place.
+        thread.scrollTop = thread.scrollHeight - prependScrollRef.current;
+        prependScrollRef.current = null;
+        return;
       }
+      thread.scrollTop = thread.scrollHeight;
     }, [messages]);
 
     // ---- Update sidebar title once per session (first user message) ----
@@ -428,6 +485,7 @@
         setChatHistory((prev) => [newEntry, ...prev]);
         setActiveChatId(sess.id);
         setMessages([]);
+        setHasOlderMessages(false);
         setInput('');
         setAttachedImages([]);
       } catch {
@@ -452,6 +510,7 @@
       setAttachedImages([]);
       // Always load fresh from DB to ensure we have full history
       setMessages([]);
+      setHasOlderMessages(false);
       await loadSessionMessages(chatId);
     };
 
@@ -472,6 +531,7 @@
         setChatHistory([]);
         setActiveChatId(null);
         setMessages([]);
+        setHasOlderMessages(false);
       } else if (chatId === activeChatId) {
         setChatHistory(remaining);
         setActiveChatId(remaining[0].id);
@@ -481,6 +541,7 @@
           setMessages(cached.messages);
         } else {
           setMessages([]);
+          setHasOlderMessages(false);
           loadSessionMessages(remaining[0].id);
         }
       } else {
@@ -510,6 +571,13 @@
                   <p>Ask questions about your software and get quick, informed answers.</p>
                 </div>
               )}
+              {hasOlderMessages && messages.length > 0 && (
+                <div className="chat-load-older">
+                  <button type="button" className="btn btn-secondary" onClick={loadOlderMessages} disabled={loadingOlder}>
+                    {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+                  </button>
+                </div>
+              )}
               {messages.map((m) => (
                 <ChatMessage key={m.id} message={m} onImageClick={handleImageClick} onVideoClick={handleVideoClick} token={token} sessionId={activeChatId} onFeedback={handleFeedbackUpdate} />
               ))}
@@ -16,33 +16,79 @@
     return `${days}d ago`;
   }
 
-  function useHistoryData() {
+  const HISTORY_PAGE_SIZE = 50;
+  const SEARCH_DEBOUNCE_MS = 300;
+  const RANGE_MS = {
+    '24h': 24 * 60 * 60 * 1000,
+    '7d': 7 * 24 * 60 * 60 * 1000,
+    '30d': 30 * 24 * 60 * 60 * 1000,
+  };
+
+  // Search and date range are applied by the server, so they cover every
+  // session and not only the pages loaded so far.
+  function useHistoryData(query, range) {
     const { session } = useUser();
     const [items, setItems] = React.useState([]);
     const [loading, setLoading] = React.useState(true);
+    const [loadingMore, setLoadingMore] = React.useState(false);
+    const [nextCursor, setNextCursor] = React.useState(null);
 
-    React.useEffect(() => {
-      if (!session?.access_token) return;
-      setLoading(true);
-      fetch('/api/chat/sessions?detail=true', {
+    // Bumped on every filter change, so late responses for old filters are dropped.
+    const generation = React.useRef(0);
+
+    const fetchPage = React.useCallback((cursor) => {
+      const params = new URLSearchParams({ detail: 'true', limit: String(HISTORY_PAGE_SIZE) });
+      if (cursor) params.set('cursor', cursor);
+      if (query) params.set('q', query);
+      if (RANGE_MS[range]) params.set('since', new Date(Date.now() - RANGE_MS[range]).toISOString());
+      return fetch(`/api/chat/sessions?${params}`, {
         headers: { 'Authorization': `Bearer ${session.access_token}` },
       })
-        .then(res => res.ok ? res.json() : [])
-        .then(data => {
-          const mapped = data.map(s => ({
+        .then(res => {
+          if (!res.ok) return { data: [], cursor: null };
+          return res.json().then(data => ({ data, cursor: res.headers.get('X-Next-Cursor') }));
+        })
+        .then(({ data, cursor: next }) => ({
+          items: data.map(s => ({
             id: s.id,
             title: s.title || 'Untitled Chat',
             preview: s.last_message || '',
             messageCount: s.message_count || 0,
             updatedAt: s.created_at,
-          }));
-          setItems(mapped);
+          })),
+          cursor: next || null,
+        }));
+    }, [session?.access_token, query, range]);
+
+    React.useEffect(() => {
+      if (!session?.access_token) return;
+      const gen = ++generation.current;
+      setLoading(true);
+      fetchPage(null)
+        .then((page) => {
+          if (gen !== generation.current) return;
+          setItems(page.items);
+          setNextCursor(page.cursor);
+        })
+        .catch(() => { if (gen === generation.current) { setItems([]); setNextCursor(null); } })
+        .finally(() => { if (gen === generation.current) setLoading(false); });
+    }, [session?.access_token, fetchPage]);
+
+    const loadMore = React.useCallback(() => {
+      if (!nextCursor || loadingMore) return;
+      const gen = generation.current;
+      setLoadingMore(true);
+      fetchPage(nextCursor)
+        .then((page) => {
+          if (gen !== generation.current) return;
+          setItems(prev => prev.concat(page.items));
+          setNextCursor(page.cursor);
         })
-        .catch(() => setItems([]))
-        .finally(() => setLoading(false));
-    }, [session?.access_token]);
+        .catch(() => { if (gen === generation.current) setNextCursor(null); })
+        .finally(() => setLoadingMore(false));
+    }, [nextCursor, loadingMore, fetchPage]);
 
-    return { items, loading };
+    return { items, loading, hasMore: Boolean(nextCursor), loadMore, loadingMore };
   }
 
   function HistoryToolbar({ query, onQuery, range, onRange }) {
@@ -113,31 +159,21 @@
   }
 
   function HistoryPage() {
-    const { items, loading: historyLoading } = useHistoryData();
     const { navigate } = useRouter();
     const [query, setQuery] = React.useState('');
     const [range, setRange] = React.useState('all');
+    const [searchQuery, setSearchQuery] = React.useState('');
+    const { items: filtered, loading: historyLoading, hasMore, loadMore, loadingMore } = useHistoryData(searchQuery, range);
+
+    React.useEffect(() => {
+      const timer = setTimeout(() => setSearchQuery(query.trim()), SEARCH_DEBOUNCE_MS);
+      return () => clearTimeout(timer);
+    }, [query]);
 
     const handleOpenChat = (sessionId) => {
       navigate('chat', { withFade: true, params: { sessionId } });
     };
 
-    const filtered = React.useMemo(() => {
-      const now = Date.now();
-      const withinRange = (dateStr) => {
-        const ts = new Date(dateStr).getTime();
-        if (range === 'all') return true;
-        if (range === '24h') return now - ts <= 24 * 60 * 60 * 1000;
-        if (range === '7d') return now - ts <= 7 * 24 * 60 * 60 * 1000;
-        if (range === '30d') return now - ts <= 30 * 24 * 60 * 60 * 1000;
-        return true;
-      };
-      const q = query.trim().toLowerCase();
-      return items.filter((it) => withinRange(it.updatedAt) && (
-        !q || it.title.toLowerCase().includes(q) || it.preview.toLowerCase().includes(q)
-      ));
-    }, [items, query, range]);
-
     return (
       <Layout>
         <div className="page history-page">
@@ -176,6 +212,13 @@
                 ))
               )}
             </div>
+            {!historyLoading && hasMore && (
+              <div className="history-load-more">
+                <button type="button" className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load older conversations'}
+                </button>
+              </div>
+            )}
           </Card>
         </div>
       </Layout>